@@ -1,41 +1,68 @@
 import contextlib
+import hashlib
+import itertools
+import json
 import logging
+import os
 import re
 import shutil
 import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from shutil import make_archive
 
 from bs4 import BeautifulSoup
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 from django.test import Client, override_settings
 from django.utils.timezone import override as override_timezone
 from django_scopes import scope, scopes_disabled
+from i18nfield.utils import I18nJSONEncoder
 
+from pretalx import __version__
+from pretalx.common.exporter import is_volatile_setting
 from pretalx.common.signals import register_data_exporters
 from pretalx.common.utils import rolledback_transaction
 from pretalx.event.models import Event
+from pretalx.person.models import SpeakerProfile
+from pretalx.submission.models import Answer, QuestionTarget
+
+BATCH_SIZE = 50
+USER_EXCLUDE = ("password", "last_login", "pw_reset_token", "pw_reset_time")
 
 
 @contextlib.contextmanager
 def fake_admin(event):
     with rolledback_transaction():
+        # Saving the event would clear the cached exports
+        Event.objects.filter(pk=event.pk).update(is_public=True)
         event.is_public = True
-        event.save()
-        client = Client()
+        yield partial(get_url_content, Client())
 
-        def get(url):
-            try:
-                # Try getting the file from disk directly first, …
-                return get_mediastatic_content(url)
-            except FileNotFoundError:
-                # … then fall back to asking the views.
-                response = client.get(url, is_html_export=True, HTTP_ACCEPT="text/html")
-                content = get_content(response)
-                return content
 
-        yield get
+@contextlib.contextmanager
+def public_client(event):
+    """Like fake_admin, but for worker threads, which use their own database
+    connections and can therefore only export events that are public
+    already."""
+    try:
+        with scope(event=event), override_timezone(event.timezone):
+            yield partial(get_url_content, Client())
+    finally:
+        connection.close()
+
+
+def get_url_content(client, url):
+    try:
+        # Try getting the file from disk directly first, …
+        return get_mediastatic_content(url)
+    except FileNotFoundError:
+        # … then fall back to asking the views.
+        response = client.get(url, is_html_export=True, HTTP_ACCEPT="text/html")
+        return get_content(response)
 
 
 def find_assets(html):
@@ -98,6 +125,123 @@ def event_urls(event):
     yield event.urls.feed
 
 
+class FingerprintEncoder(I18nJSONEncoder):
+    def default(self, obj):
+        try:
+            return super().default(obj)
+        except TypeError:
+            return str(obj)
+
+
+def get_fingerprint(data) -> str:
+    return hashlib.sha1(
+        json.dumps(data, cls=FingerprintEncoder, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def get_instance_data(instance, exclude=()):
+    if instance is None:
+        return None
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in exclude
+    }
+
+
+def event_fingerprint(event) -> str:
+    """Changes whenever a change to the event may show up on any page, like
+    a changed setting or a pretalx update. Settings that pretalx changes on
+    its own, like the release status, are left out."""
+    event_settings = {
+        key: value
+        for key, value in event.settings.freeze().items()
+        if not is_volatile_setting(key)
+    }
+    return get_fingerprint([__version__, get_instance_data(event), event_settings])
+
+
+def event_page_fingerprints(event) -> dict:
+    """Maps the paths of all talk and speaker pages to fingerprints of the
+    data shown on them, so that only pages with changed data have to be
+    exported again."""
+    if not event.current_schedule:
+        return {}
+    slots = defaultdict(list)
+    for slot in event.current_schedule.talks.filter(
+        is_visible=True, submission__isnull=False
+    ).select_related("room"):
+        slots[slot.submission_id].append(
+            [get_instance_data(slot), get_instance_data(slot.room)]
+        )
+    talks = list(
+        event.talks.select_related("track").prefetch_related(
+            "resources", "answers__question"
+        )
+    )
+    talk_data = {}
+    speaker_talks = defaultdict(list)
+    for talk in talks:
+        speakers = list(talk.speakers.all())
+        talk_data[talk.pk] = [
+            get_instance_data(talk),
+            get_instance_data(talk.track),
+            sorted(slots[talk.pk], key=str),
+            [get_instance_data(resource) for resource in talk.resources.all()],
+            [
+                get_instance_data(answer)
+                for answer in talk.answers.all()
+                if answer.question.is_public
+            ],
+            [speaker.name for speaker in speakers],
+        ]
+        for speaker in speakers:
+            speaker_talks[speaker].append(talk.pk)
+
+    profiles = {
+        profile.user_id: profile
+        for profile in SpeakerProfile.objects.filter(
+            event=event, user__in=speaker_talks.keys()
+        )
+    }
+    speaker_answers = defaultdict(list)
+    for answer in Answer.objects.filter(
+        question__event=event,
+        question__is_public=True,
+        question__target=QuestionTarget.SPEAKER,
+        person__in=speaker_talks.keys(),
+    ):
+        speaker_answers[answer.person_id].append(get_instance_data(answer))
+    speaker_data = {
+        speaker.pk: [
+            get_instance_data(speaker, exclude=USER_EXCLUDE),
+            get_instance_data(profiles.get(speaker.pk)),
+            speaker_answers[speaker.pk],
+            [talk_data[talk_id] for talk_id in speaker_talks[speaker]],
+        ]
+        for speaker in speaker_talks
+    }
+
+    result = {}
+    for talk in talks:
+        fingerprint = get_fingerprint(
+            [
+                talk_data[talk.pk],
+                [speaker_data[speaker.pk] for speaker in talk.speakers.all()],
+            ]
+        )
+        result[get_path(talk.urls.public)] = fingerprint
+        result[get_path(talk.urls.ical)] = fingerprint
+    for speaker in speaker_talks:
+        profile = profiles.get(speaker.pk)
+        if not profile:
+            continue
+        fingerprint = get_fingerprint(speaker_data[speaker.pk])
+        result[get_path(profile.urls.public)] = fingerprint
+        result[get_path(profile.urls.talks_ical)] = fingerprint
+    return result
+
+
 def get_path(url):
     return urllib.parse.urlparse(url).path
 
@@ -108,18 +252,73 @@ def get_content(response):
     )
 
 
-def dump_content(destination, path, getter):
-    logging.debug(path)
-    content = getter(path)
+def get_file_path(destination, path):
     if path.endswith("/"):
         path = path + "index.html"
+    return Path(destination) / path.lstrip("/")
 
-    path = Path(destination) / path.lstrip("/")
-    path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(path, "wb") as f:
-        f.write(content)
-    return content
+def export_file(destination, path, getter, fingerprint=None, previous=None):
+    """Exports a single file and returns its manifest entry.
+
+    Files with an unchanged ``fingerprint`` are not rendered again, and files
+    are only written to disk if their content changed.  The manifest entry
+    contains the content hash, the fingerprint, the referenced assets, and
+    whether the file was written."""
+    previous = previous or {}
+    file_path = get_file_path(destination, path)
+    if (
+        fingerprint
+        and previous.get("fingerprint") == fingerprint
+        and file_path.exists()
+    ):
+        return {**previous, "written": False}
+
+    logging.debug(path)
+    content = getter(path)
+    content_hash = hashlib.sha1(content).hexdigest()
+    written = previous.get("hash") != content_hash or not file_path.exists()
+    if written:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    entry = {"hash": content_hash, "written": written}
+    if fingerprint:
+        entry["fingerprint"] = fingerprint
+    if path.endswith(".css"):
+        entry["assets"] = sorted(
+            get_path(urllib.parse.unquote(url)) for url in set(find_urls(content))
+        )
+    elif not path.startswith((settings.STATIC_URL, settings.MEDIA_URL)):
+        entry["assets"] = sorted(set(map(get_path, find_assets(content))))
+    return entry
+
+
+def export_batch(event, destination, batch):
+    with public_client(event) as get:
+        return [export_file(destination, path, get, *args) for path, *args in batch]
+
+
+def export_files(destination, paths, getter, fingerprints, previous, event, workers):
+    """Exports all given paths, in batches on ``workers`` threads if
+    ``getter`` is None, and returns their manifest entries."""
+    items = [(path, fingerprints.get(path), previous.get(path)) for path in paths]
+    if getter:
+        results = [
+            export_file(destination, path, getter, *args) for path, *args in items
+        ]
+    else:
+        batches = [
+            items[index : index + BATCH_SIZE]
+            for index in range(0, len(items), BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = itertools.chain.from_iterable(
+                executor.map(partial(export_batch, event, destination), batches)
+            )
+    return dict(zip((item[0] for item in items), results))
 
 
 def get_mediastatic_content(url):
@@ -134,32 +333,64 @@ def get_mediastatic_content(url):
         return f.read()
 
 
-def export_event(event, destination):
+def export_event(event, destination, manifest=None, workers=1):
+    """Exports the event to ``destination`` and returns the new manifest and
+    whether any file was changed.
+
+    With the ``manifest`` of a previous export to the same destination,
+    only pages with changed data are rendered again, and files that are not
+    part of the export anymore are removed. With more than one worker, pages
+    are rendered in batches in a thread pool."""
+    manifest = manifest or {}
+    fingerprint = event_fingerprint(event)
+    previous = (
+        manifest.get("files", {}) if manifest.get("fingerprint") == fingerprint else {}
+    )
+    if workers > 1 and not event.is_public:
+        logging.warning("Exporting an event that is not public with one worker.")
+        workers = 1
     with override_settings(
         COMPRESS_ENABLED=True, COMPRESS_OFFLINE=True
     ), override_timezone(event.timezone):
-        with fake_admin(event) as get:
+        with (contextlib.nullcontext() if workers > 1 else fake_admin(event)) as get:
+            export = partial(
+                export_files,
+                destination,
+                getter=get,
+                previous=previous,
+                event=event,
+                workers=workers,
+            )
             logging.info("Collecting URLs for export")
-            urls = [*event_urls(event)]
-            assets = set()
+            urls = list(dict.fromkeys(map(get_path, event_urls(event))))
+            fingerprints = event_page_fingerprints(event)
 
             logging.info(f"Exporting {len(urls)} pages")
-            for url in map(get_path, urls):
-                content = dump_content(destination, url, get)
-                assets |= set(map(get_path, find_assets(content)))
-
-            css_assets = set()
+            files = export(urls, fingerprints=fingerprints)
 
+            assets = get_assets(files)
             logging.info(f"Exporting {len(assets)} static files from HTML links")
-            for url in assets:
-                content = dump_content(destination, url, get)
-
-                if url.endswith(".css"):
-                    css_assets |= set(find_urls(content))
+            files.update(export(assets, fingerprints={}))
 
+            css_assets = get_assets(files)
             logging.info(f"Exporting {len(css_assets)} files from CSS links")
-            for url in (get_path(urllib.parse.unquote(url)) for url in css_assets):
-                dump_content(destination, url, get)
+            files.update(export(css_assets, fingerprints={}))
+
+    changed = any([entry.pop("written") for entry in files.values()])
+    for path in manifest.get("files", {}).keys() - files.keys():
+        with contextlib.suppress(FileNotFoundError):
+            get_file_path(destination, path).unlink()
+            changed = True
+    return {"fingerprint": fingerprint, "files": files}, changed
+
+
+def get_assets(files):
+    """Returns all assets referenced by the given manifest entries that have
+    not been exported yet."""
+    assets = itertools.chain.from_iterable(
+        entry.get("assets", []) for entry in files.values()
+    )
+    return sorted(set(assets) - files.keys())
 
 
 def delete_directory(path):
@@ -175,11 +406,36 @@ def get_export_zip_path(event):
     return get_export_path(event).with_suffix(".zip")
 
 
+def get_export_manifest_path(event):
+    export_path = get_export_path(event)
+    return export_path.with_name(f"{export_path.name}.manifest.json")
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
 class Command(BaseCommand):
     def add_arguments(self, parser):
         super().add_arguments(parser)
         parser.add_argument("event", type=str)
         parser.add_argument("--zip", action="store_true")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only export pages whose talks, speakers or settings changed since the last export.",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            metavar="WORKERS",
+            help="Render pages with this many threads. Only used for public events.",
+        )
 
     def handle(self, *args, **options):
         event_slug = options.get("event")
@@ -194,21 +450,35 @@ def handle(self, *args, **options):
             logging.info(f"Exporting {event.name}")
             export_dir = get_export_path(event)
             zip_path = get_export_zip_path(event)
-            tmp_dir = export_dir.with_name(export_dir.name + "-new")
-
-            delete_directory(tmp_dir)
-            tmp_dir.mkdir()
+            manifest_path = get_export_manifest_path(event)
+            workers = max(options.get("parallel") or 1, 1)
+
+            manifest = None
+            if options.get("incremental") and export_dir.exists():
+                manifest = load_manifest(manifest_path)
+            if manifest:
+                manifest, changed = export_event(
+                    event, export_dir, manifest=manifest, workers=workers
+                )
+            else:
+                tmp_dir = export_dir.with_name(export_dir.name + "-new")
 
-            try:
-                export_event(event, tmp_dir)
-                delete_directory(export_dir)
-                tmp_dir.rename(export_dir)
-            finally:
                 delete_directory(tmp_dir)
+                tmp_dir.mkdir()
+
+                try:
+                    manifest, changed = export_event(event, tmp_dir, workers=workers)
+                    delete_directory(export_dir)
+                    tmp_dir.rename(export_dir)
+                finally:
+                    delete_directory(tmp_dir)
+
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f)
 
             logging.info(f"Exported to {export_dir}")
 
-            if options.get("zip"):
+            if options.get("zip") and (changed or not zip_path.exists()):
                 make_archive(
                     root_dir=settings.HTMLEXPORT_ROOT,
                     base_dir=event.slug,
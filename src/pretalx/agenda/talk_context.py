@@ -0,0 +1,178 @@
+from collections import defaultdict
+from uuid import uuid4
+
+from django.utils.translation import gettext_lazy as _
+
+
+class TalkContext:
+    """The data shown on the public talk pages of a schedule: the visible
+    talk slots, the speakers and their other sessions (as
+    ``other_submissions``), and the public answers. Speakers are plain
+    dictionaries of their public fields, shaped like the speaker profiles
+    the ``agenda/speaker_block.html`` template expects.
+
+    The data of released schedules is kept in the event cache per talk.
+    It is built in bulk for all talks when a schedule is released, and
+    rebuilt per talk after :meth:`invalidate` (for example when a talk,
+    its speakers, their names or profile pictures, a speaker profile, a
+    question, an answer or a room changes).
+    """
+
+    timeout = 24 * 60 * 60
+
+    def __init__(self, event, schedule=None):
+        self.event = event
+        self.schedule = schedule
+
+    @staticmethod
+    def invalidate(event):
+        """Marks the cached talk page data of all schedules of this event as
+        outdated."""
+        event.cache.set("talk_context_stamp", uuid4().hex, None)
+
+    def get_key(self, submission_id, stamp) -> str:
+        return f"talk_context_{self.schedule.pk}_{stamp}_{submission_id}"
+
+    @property
+    def cacheable(self) -> bool:
+        return bool(self.schedule and self.schedule.version)
+
+    def get_slots(self):
+        from pretalx.schedule.models import TalkSlot
+
+        # Cached objects must not reference the event or schedule objects
+        slots = TalkSlot.objects.filter(schedule_id=self.schedule.pk)
+        if self.schedule.version:
+            return slots.filter(is_visible=True)
+        return slots.filter(room__isnull=False)
+
+    def build(self, submission_ids=None, speakers=None) -> dict:
+        """Returns the talk page data of the given proposals, or of all talks
+        in the schedule, by proposal ID.
+
+        :param speakers: Optional dictionary of the speakers (users) of the
+            given proposals, by proposal ID, if they have been loaded
+            already.
+        """
+        from pretalx.person.models import SpeakerProfile
+        from pretalx.submission.models import Answer, QuestionTarget, Submission
+
+        slots = defaultdict(list)
+        if self.schedule:
+            slot_qs = self.get_slots().select_related("room").order_by("start")
+            if submission_ids is not None:
+                slot_qs = slot_qs.filter(submission_id__in=submission_ids)
+            for slot in slot_qs:
+                slots[slot.submission_id].append(slot)
+        if submission_ids is None:
+            submission_ids = list(slots)
+
+        if speakers is None:
+            speakers = defaultdict(list)
+            for speaker in (
+                Submission.speakers.through.objects.filter(
+                    submission_id__in=submission_ids
+                )
+                .select_related("user")
+                .order_by("pk")
+            ):
+                speakers[speaker.submission_id].append(speaker.user)
+        users = {user.pk: user for users in speakers.values() for user in users}
+
+        profiles = {
+            profile.user_id: profile
+            for profile in SpeakerProfile.objects.filter(
+                event_id=self.event.pk, user_id__in=users
+            )
+        }
+        for user_id in set(users) - set(profiles):
+            profiles[user_id] = users[user_id].event_profile(self.event)
+
+        speaker_sessions = defaultdict(dict)
+        if self.schedule:
+            for speaker in (
+                Submission.speakers.through.objects.filter(
+                    user_id__in=users,
+                    submission__slots__schedule_id=self.schedule.pk,
+                    submission__slots__is_visible=True,
+                )
+                .select_related("submission")
+                .order_by("submission_id")
+            ):
+                submission = speaker.submission
+                submission.event = self.event
+                speaker_sessions[speaker.user_id].setdefault(
+                    submission.pk,
+                    {
+                        "title": submission.title,
+                        "urls": {"public": str(submission.urls.public)},
+                    },
+                )
+
+        answers = defaultdict(list)
+        for answer in Answer.objects.filter(
+            submission_id__in=submission_ids,
+            question__is_public=True,
+            question__event_id=self.event.pk,
+            question__target=QuestionTarget.SUBMISSION,
+        ).select_related("question"):
+            answers[answer.submission_id].append(answer)
+
+        result = {}
+        for submission_id in submission_ids:
+            talk_speakers = []
+            for user in speakers.get(submission_id, []):
+                profile = profiles[user.pk]
+                profile.event = self.event
+                profile.user = user
+                # Only the shown fields are cached, not the user objects
+                talk_speakers.append(
+                    {
+                        "user": {"name": user.name, "avatar_url": user.avatar_url},
+                        "biography": profile.biography,
+                        "urls": {"public": str(profile.urls.public)},
+                        "other_submissions": [
+                            session
+                            for pk, session in speaker_sessions[user.pk].items()
+                            if pk != submission_id
+                        ],
+                    }
+                )
+            result[submission_id] = {
+                "slots": slots[submission_id],
+                "speakers": talk_speakers,
+                "answers": answers[submission_id],
+            }
+        return result
+
+    def store(self, submission_ids=None, speakers=None) -> dict:
+        """Builds the talk page data like :meth:`build`, and stores it in the
+        cache if the schedule has been released."""
+        result = self.build(submission_ids, speakers=speakers)
+        if result and self.cacheable:
+            stamp = self.event.cache.get("talk_context_stamp")
+            self.event.cache.set_many(
+                {
+                    self.get_key(submission_id, stamp): data
+                    for submission_id, data in result.items()
+                },
+                self.timeout,
+            )
+        return result
+
+    def get(self, submission) -> dict:
+        """Returns the talk page data of this proposal, from the cache if
+        possible."""
+        data = None
+        if self.cacheable:
+            stamp = self.event.cache.get("talk_context_stamp")
+            data = self.event.cache.get(self.get_key(submission.pk, stamp))
+        if data is None:
+            data = self.store(
+                [submission.pk], speakers={submission.pk: submission.speakers.all()}
+            )[submission.pk]
+        for speaker in data["speakers"]:
+            speaker["user"]["get_display_name"] = speaker["user"]["name"] or _(
+                "Unnamed user"
+            )
+        return data
@@ -1,21 +1,26 @@
 import logging
 
+from django.conf import settings
+from django.utils.translation import override
 from django_scopes import scope, scopes_disabled
 
 from pretalx.celery_app import app
+from pretalx.common.exporter import ExporterCache
+from pretalx.common.signals import register_data_exporters
 from pretalx.event.models import Event
 
 LOGGER = logging.getLogger(__name__)
 
 
 @app.task()
-def export_schedule_html(*, event_id: int, make_zip=True):
+def export_schedule_html(*, event_id: int, make_zip=True, incremental=True):
+    """Runs the ``export_schedule_html`` command. By default, an existing
+    export is updated incrementally, using ``HTMLEXPORT_WORKERS`` threads
+    for public events."""
     from django.core.management import call_command
 
     with scopes_disabled():
-        event = (
-            Event.objects.prefetch_related("submissions").filter(pk=event_id).first()
-        )
+        event = Event.objects.filter(pk=event_id).first()
     if not event:
         LOGGER.error(f"Could not find Event ID {event_id} for export.")
         return
@@ -30,4 +35,40 @@ def export_schedule_html(*, event_id: int, make_zip=True):
     cmd = ["export_schedule_html", event.slug]
     if make_zip:
         cmd.append("--zip")
+    if incremental:
+        cmd.append("--incremental")
+    cmd.append(f"--parallel={settings.HTMLEXPORT_WORKERS}")
     call_command(*cmd)
+
+
+@app.task()
+def render_schedule_exports(*, event_id: int):
+    """Renders all public, cacheable exporters for the current schedule
+    version in all event locales, so that the first requests after a release
+    can be served from the :class:`~pretalx.common.exporter.ExporterCache`."""
+    with scopes_disabled():
+        event = Event.objects.filter(pk=event_id).first()
+    if not event:
+        LOGGER.error(f"Could not find Event ID {event_id} for export.")
+        return
+
+    with scope(event=event):
+        schedule = event.current_schedule
+        if not schedule:
+            return
+        artifact_cache = ExporterCache(event)
+        for __, response in register_data_exporters.send(event):
+            exporter = response(event)
+            if not exporter.public or not exporter.cacheable:
+                continue
+            exporter.schedule = schedule
+            exporter.is_orga = False
+            for locale in event.locales:
+                with override(locale):
+                    key = artifact_cache.get_key(exporter, schedule, locale)
+                    try:
+                        artifact_cache.set(key, *exporter.render())
+                    except Exception:
+                        LOGGER.exception(
+                            f"Failed to use {exporter.identifier} for {event.slug}"
+                        )
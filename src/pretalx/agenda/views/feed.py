@@ -2,6 +2,8 @@
 from django.http import Http404
 from django.utils import feedgenerator
 
+from pretalx.schedule.models import Schedule
+
 
 class ScheduleFeed(Feed):
 
@@ -29,7 +31,9 @@ def description(self, obj):
         return f"Updates to the {obj.name} schedule."
 
     def items(self, obj):
-        return obj.schedules.filter(version__isnull=False).order_by("-published")
+        return Schedule.prefetch_changes(
+            obj.schedules.filter(version__isnull=False).order_by("-published")
+        )
 
     def item_title(self, item):
         return f"New {item.event.name} schedule released ({item.version})"
@@ -1,5 +1,8 @@
+import gzip
 import hashlib
+import itertools
 import logging
+import re
 import textwrap
 from urllib.parse import unquote
 
@@ -10,22 +13,30 @@
     HttpResponseNotModified,
     HttpResponsePermanentRedirect,
     HttpResponseRedirect,
+    StreamingHttpResponse,
 )
 from django.urls import resolve, reverse
+from django.utils.cache import patch_vary_headers
 from django.utils.functional import cached_property
-from django.utils.timezone import now
-from django.utils.translation import activate
+from django.utils.timezone import get_current_timezone, now
+from django.utils.timezone import override as tzoverride
+from django.utils.translation import activate, get_language
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import override
 from django.views.generic import TemplateView
 from django_context_decorator import context
+from django_scopes import scope
 
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.mixins.views import EventPermissionRequired
 from pretalx.common.signals import register_data_exporters
 from pretalx.common.utils import safe_filename
 from pretalx.schedule.ascii import draw_ascii_schedule
 from pretalx.schedule.exporters import ScheduleData
+from pretalx.schedule.models import Schedule
 
 logger = logging.getLogger(__name__)
+accepts_gzip = re.compile(r"\bgzip\b")
 
 
 class ScheduleMixin:
@@ -99,6 +110,44 @@ def get_exporter(self, request):
                 if ex.public or request.is_orga:
                     return ex
 
+    def get_headers(self, exporter, file_name, file_type):
+        headers = {}
+        if file_type not in ["application/json", "text/xml"]:
+            headers[
+                "Content-Disposition"
+            ] = f'attachment; filename="{safe_filename(file_name)}"'
+        if exporter.cors:
+            headers["Access-Control-Allow-Origin"] = exporter.cors
+        return headers
+
+    def stream(self, chunks, language, tz):
+        # Streamed content is generated after the view and its middleware
+        # have returned, so we have to restore the event scope, language and
+        # timezone.
+        with scope(event=self.request.event), override(language), tzoverride(tz):
+            yield from chunks
+
+    def get_streaming_response(self, exporter, artifact_cache=None, artifact_key=None):
+        try:
+            file_name, file_type, chunks = exporter.render_stream()
+            chunks = iter(chunks)
+            # Generate the first chunk right away, to catch errors early
+            chunks = itertools.chain([next(chunks, "")], chunks)
+        except Exception:
+            logger.exception(
+                f"Failed to use {exporter.identifier} for {self.request.event.slug}"
+            )
+            raise Http404()
+        if artifact_key:
+            chunks = artifact_cache.set_from_stream(
+                artifact_key, file_name, file_type, chunks
+            )
+        return StreamingHttpResponse(
+            self.stream(chunks, get_language(), get_current_timezone()),
+            content_type=file_type,
+            headers=self.get_headers(exporter, file_name, file_type),
+        )
+
     def get(self, request, *args, **kwargs):
         exporter = self.get_exporter(request)
         if not exporter:
@@ -112,25 +161,52 @@ def get(self, request, *args, **kwargs):
         exporter.schedule = self.schedule
         exporter.is_orga = getattr(self.request, "is_orga", False)
 
-        try:
-            file_name, file_type, data = exporter.render()
-            etag = hashlib.sha1(str(data).encode()).hexdigest()
-        except Exception:
-            logger.exception(
-                f"Failed to use {exporter.identifier} for {self.request.event.slug}"
+        artifact = None
+        artifact_cache = None
+        artifact_key = None
+        if exporter.cacheable and self.schedule and self.schedule.version:
+            artifact_cache = ExporterCache(request.event)
+            artifact_key = artifact_cache.get_key(
+                exporter, self.schedule, get_language(), exporter.is_orga
             )
-            raise Http404()
+            etag = artifact_cache.get_etag(artifact_key)
+            if etag and request.headers.get("If-None-Match") == etag:
+                return HttpResponseNotModified()
+            artifact = artifact_cache.get(artifact_key)
+
+        if artifact:
+            file_name, file_type, compressed_data, etag = artifact
+        elif exporter.streaming:
+            return self.get_streaming_response(exporter, artifact_cache, artifact_key)
+        else:
+            try:
+                file_name, file_type, data = exporter.render()
+                etag = hashlib.sha1(str(data).encode()).hexdigest()
+            except Exception:
+                logger.exception(
+                    f"Failed to use {exporter.identifier} for {self.request.event.slug}"
+                )
+                raise Http404()
+            if artifact_key:
+                file_name, file_type, compressed_data, etag = artifact_cache.set(
+                    artifact_key, file_name, file_type, data
+                )
         if "If-None-Match" in request.headers:
             if request.headers["If-None-Match"] == etag:
                 return HttpResponseNotModified()
-        headers = {"ETag": etag}
-        if file_type not in ["application/json", "text/xml"]:
-            headers[
-                "Content-Disposition"
-            ] = f'attachment; filename="{safe_filename(file_name)}"'
-        if exporter.cors:
-            headers["Access-Control-Allow-Origin"] = exporter.cors
-        return HttpResponse(data, content_type=file_type, headers=headers)
+        headers = self.get_headers(exporter, file_name, file_type)
+        headers["ETag"] = etag
+        if artifact_key and accepts_gzip.search(
+            request.headers.get("Accept-Encoding", "")
+        ):
+            headers["Content-Encoding"] = "gzip"
+            data = compressed_data
+        elif artifact:
+            data = gzip.decompress(compressed_data)
+        response = HttpResponse(data, content_type=file_type, headers=headers)
+        if artifact_key:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
 
 
 class ScheduleView(EventPermissionRequired, ScheduleMixin, TemplateView):
@@ -262,3 +338,9 @@ class ScheduleNoJsView(ScheduleView):
 class ChangelogView(EventPermissionRequired, TemplateView):
     template_name = "agenda/changelog.html"
     permission_required = "agenda.view_schedule"
+
+    @context
+    def schedules(self):
+        return Schedule.prefetch_changes(
+            self.request.event.schedules.filter(version__isnull=False)
+        )
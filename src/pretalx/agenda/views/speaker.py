@@ -1,3 +1,4 @@
+from collections import defaultdict
 from urllib.parse import urlparse
 
 import vobject
@@ -6,8 +7,11 @@
 from django.core.files.storage import Storage
 from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
+from django.template.loader import get_template
 from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 from django.views.generic import DetailView, ListView, TemplateView
 from django_context_decorator import context
 
@@ -28,6 +32,8 @@ class SpeakerList(EventPermissionRequired, Filterable, ListView):
     permission_required = "agenda.view_schedule"
     default_filters = ("user__name__icontains",)
 
+    cache_timeout = 15 * 60
+
     def get_queryset(self):
         qs = (
             SpeakerProfile.objects.filter(
@@ -36,13 +42,42 @@ def get_queryset(self):
             .select_related("user", "event")
             .order_by("user__name")
         )
-        qs = self.filter_queryset(qs)
-        all_talks = list(self.request.event.talks.all().prefetch_related("speakers"))
-        for profile in qs:
-            profile.talks = [
-                talk for talk in all_talks if profile.user in talk.speakers.all()
-            ]
-        return qs
+        return self.filter_queryset(qs)
+
+    def get_speakers(self) -> list:
+        """Returns the speaker profiles with their talks in the current
+        schedule as ``talks``, grouped in a single pass over all talks."""
+        talks_by_speaker = defaultdict(list)
+        for talk in dict.fromkeys(self.request.event.talks):
+            for speaker in talk.speakers.all():
+                talks_by_speaker[speaker.pk].append(talk)
+        speakers = list(self.object_list)
+        for profile in speakers:
+            profile.talks = talks_by_speaker[profile.user_id]
+        return speakers
+
+    @context
+    def speaker_list(self):
+        """The rendered speaker index. Unless the list is being searched, it
+        is cached per schedule version and language."""
+        search = self.request.GET.get("q")
+        schedule = self.request.event.current_schedule
+        cache_key = None
+        if schedule and not search:
+            cache_key = f"speaker_list_{schedule.pk}_{get_language()}"
+            result = self.request.event.cache.get(cache_key)
+            if result is not None:
+                return mark_safe(result)
+        result = get_template("agenda/speaker_list.html").render(
+            {
+                "event": self.request.event,
+                "speakers": self.get_speakers(),
+                "search": search,
+            }
+        )
+        if cache_key:
+            self.request.event.cache.set(cache_key, result, self.cache_timeout)
+        return mark_safe(result)
 
 
 @method_decorator(csp_update(IMG_SRC="https://www.gravatar.com"), name="dispatch")
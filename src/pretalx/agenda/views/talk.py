@@ -12,12 +12,12 @@
 from django_context_decorator import context
 
 from pretalx.agenda.signals import register_recording_provider
+from pretalx.agenda.talk_context import TalkContext
 from pretalx.cfp.views.event import EventPageMixin
 from pretalx.common.mixins.views import PermissionRequired
 from pretalx.common.phrases import phrases
-from pretalx.schedule.models import Schedule, TalkSlot
 from pretalx.submission.forms import FeedbackForm
-from pretalx.submission.models import QuestionTarget, Submission, SubmissionStates
+from pretalx.submission.models import Submission, SubmissionStates
 
 
 class TalkView(PermissionRequired, TemplateView):
@@ -80,36 +80,17 @@ def get(self, request, *args, **kwargs):
         response._csp_update = csp_update
         return response
 
+    @cached_property
+    def talk_context(self) -> dict:
+        schedule = self.request.event.current_schedule
+        if not schedule and self.request.is_orga:
+            schedule = self.request.event.wip_schedule
+        return TalkContext(self.request.event, schedule).get(self.submission)
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        qs = TalkSlot.objects.none()
-        schedule = Schedule.objects.none()
-        if self.request.event.current_schedule:
-            schedule = self.request.event.current_schedule
-            qs = schedule.talks.filter(is_visible=True).select_related("room")
-        elif self.request.is_orga:
-            schedule = self.request.event.wip_schedule
-            qs = schedule.talks.filter(room__isnull=False).select_related("room")
-        ctx["talk_slots"] = (
-            qs.filter(submission=self.submission)
-            .order_by("start")
-            .select_related("room")
-        )
-        result = []
-        other_slots = (
-            schedule.talks.exclude(submission_id=self.submission.pk).filter(
-                is_visible=True
-            )
-            if schedule
-            else TalkSlot.objects.none()
-        )
-        for speaker in self.submission.speakers.all():
-            speaker.talk_profile = speaker.event_profile(event=self.request.event)
-            speaker.other_submissions = self.request.event.submissions.filter(
-                slots__in=other_slots, speakers__in=[speaker]
-            ).select_related("event")
-            result.append(speaker)
-        ctx["speakers"] = result
+        ctx["talk_slots"] = self.talk_context["slots"]
+        ctx["speakers"] = self.talk_context["speakers"]
         return ctx
 
     @context
@@ -126,11 +107,7 @@ def submission_description(self):
     @context
     @cached_property
     def answers(self):
-        return self.submission.answers.filter(
-            question__is_public=True,
-            question__event=self.request.event,
-            question__target=QuestionTarget.SUBMISSION,
-        ).select_related("question")
+        return self.talk_context["answers"]
 
 
 class TalkReviewView(TalkView):
@@ -1,19 +1,28 @@
 import datetime as dt
+import gzip
+import json
 from urllib.parse import unquote
 
 import pytz
 from django.conf import settings
-from django.db.models import Q
 from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
 from django.utils.timezone import now
 from django.views.decorators.cache import cache_page
 from django.views.decorators.http import condition
 from i18nfield.utils import I18nJSONEncoder
 
-from pretalx.agenda.views.schedule import ScheduleView
+from pretalx.agenda.views.schedule import ScheduleView, accepts_gzip
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.tasks import generate_widget_css, generate_widget_js
 from pretalx.common.utils import language
-from pretalx.schedule.exporters import ScheduleData
+from pretalx.schedule.exporters import (
+    WIDGET_DATA_KEY,
+    ScheduleData,
+    get_widget_data,
+    store_widget_data,
+)
 
 
 def widget_css_etag(request, **kwargs):
@@ -24,8 +33,9 @@ def widget_js_etag(request, event, locale, version, **kwargs):
     return request.event.settings.get(f"widget_checksum_{version}_{locale}")
 
 
-def widget_data_etag(request, **kwargs):
-    return request.event.settings.widget_data_checksum
+def widget_data_etag(request, event, version=None):
+    if not (version or request.GET.get("v")):
+        return ExporterCache(request.event).get_etag(WIDGET_DATA_KEY)
 
 
 class WidgetData(ScheduleView):
@@ -112,8 +122,7 @@ def get(self, request, *args, **kwargs):
                     "event": {
                         "url": request.event.urls.schedule.full(),
                         "tracks": [
-                            {"name": track.name}
-                            for track in request.event.tracks.all()
+                            {"name": track.name} for track in request.event.tracks.all()
                         ],
                     },
                 },
@@ -123,9 +132,7 @@ def get(self, request, *args, **kwargs):
             return response
 
 
-@condition(etag_func=widget_data_etag)
-@cache_page(60)
-def widget_data_v2(request, event, version=None):
+def get_widget_schedule(request, version=None):
     event = request.event
     if not request.user.has_perm("agenda.view_widget", event):
         raise Http404()
@@ -142,92 +149,47 @@ def widget_data_v2(request, event, version=None):
     schedule = schedule or event.current_schedule
     if not schedule:
         raise Http404()
+    return schedule
 
-    if schedule.version:
-        talks = schedule.talks.filter(is_visible=True)
-    else:
-        talks = schedule.talks.filter(
-            Q(submission__state="confirmed") | Q(submission__isnull=True),
-            start__isnull=False,
-            room__isnull=False,
-        )
 
-    talks = (
-        talks.select_related(
-            "submission",
-            "room",
-            "submission__track",
-            "submission__event",
-        ).prefetch_related("submission__speakers")
-    ).order_by("start")
-    rooms = set()
-    tracks = set()
-    speakers = set()
-    result = {
-        "talks": [],
-        "version": schedule.version,
-        "timezone": event.timezone,
-    }
-    for talk in talks:
-        rooms.add(talk.room)
-        if talk.submission:
-            tracks.add(talk.submission.track)
-            speakers |= set(talk.submission.speakers.all())
-            result["talks"].append(
-                {
-                    "code": talk.submission.code if talk.submission else None,
-                    "title": talk.submission.title
-                    if talk.submission
-                    else talk.description,
-                    "abstract": talk.submission.abstract if talk.submission else None,
-                    "speakers": [
-                        speaker.code for speaker in talk.submission.speakers.all()
-                    ]
-                    if talk.submission
-                    else None,
-                    "track": talk.submission.track_id if talk.submission else None,
-                    "start": talk.start.astimezone(event.tz),
-                    "end": talk.real_end.astimezone(event.tz),
-                    "room": talk.room_id,
-                }
-            )
-        else:
-            result["talks"].append(
-                {
-                    "title": talk.description,
-                    "start": talk.start,
-                    "end": talk.real_end,
-                    "room": talk.room_id,
-                }
-            )
+def get_current_widget_data(request):
+    """Returns the stored widget data snapshot of the current schedule,
+    rendering it if necessary."""
+    event = request.event
+    if not request.user.has_perm("agenda.view_widget", event):
+        raise Http404()
+    artifact = ExporterCache(event).get(WIDGET_DATA_KEY)
+    if not artifact:
+        if not event.current_schedule:
+            raise Http404()
+        artifact = store_widget_data(event.current_schedule)
+    return artifact
 
-    result["tracks"] = [
-        {
-            "id": track.id,
-            "name": track.name,
-        }
-        for track in tracks
-        if track
-    ]
-    result["rooms"] = [
-        {
-            "id": room.id,
-            "name": room.name,
-        }
-        for room in event.rooms.all()
-        if room in rooms
-    ]
-    result["speakers"] = [
-        {
-            "code": user.code,
-            "name": user.name,
-            "avatar": user.get_avatar_url(),
-        }
-        for user in speakers
-    ]
 
-    response = JsonResponse(result, encoder=I18nJSONEncoder)
-    response["Access-Control-Allow-Origin"] = "*"
+@condition(etag_func=widget_data_etag)
+def widget_data_v2(request, event, version=None):
+    if version or request.GET.get("v"):
+        # Other versions and the WIP schedule are rendered on request, and
+        # kept for a minute.
+        schedule = get_widget_schedule(request, version)
+        cache_key = f"widget_data_{schedule.pk}"
+        content = request.event.cache.get(cache_key)
+        if content is None:
+            content = json.dumps(get_widget_data(schedule), cls=I18nJSONEncoder)
+            request.event.cache.set(cache_key, content, 60)
+        response = HttpResponse(content, content_type="application/json")
+        response["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    file_name, file_type, compressed_data, etag = get_current_widget_data(request)
+    headers = {"ETag": quote_etag(etag), "Access-Control-Allow-Origin": "*"}
+    if accepts_gzip.search(request.headers.get("Accept-Encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        data = compressed_data
+    else:
+        data = gzip.decompress(compressed_data)
+    response = HttpResponse(data, content_type=file_type, headers=headers)
+    patch_vary_headers(response, ("Accept-Encoding",))
     return response
 
 
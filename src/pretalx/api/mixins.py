@@ -0,0 +1,66 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+def get_list_parameter(request, name):
+    """Returns the comma-separated values of a query parameter as a set, or
+    None if the parameter is not present."""
+    if name not in request.query_params:
+        return None
+    return {
+        value.strip()
+        for value in ",".join(request.query_params.getlist(name)).split(",")
+        if value.strip()
+    }
+
+
+class FlexFieldsSerializerMixin:
+    """Serializers with this mixin accept the keyword arguments ``fields``
+    and ``expand``. ``fields`` limits the output to the given field names.
+    ``expand`` lists fields from ``expandable_fields`` that should be shown
+    as full objects rather than as identifiers, which the serializer
+    checks with :meth:`is_expanded`."""
+
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        self.expand = {
+            name
+            for name in expand or ()
+            if name in self.expandable_fields and name in self.fields
+        }
+
+    def is_requested(self, name) -> bool:
+        return name in self.fields
+
+    def is_expanded(self, name) -> bool:
+        return name in self.expand
+
+    def prefetch_queryset(self, queryset):
+        """Returns the queryset with all related objects loaded that this
+        serializer needs for its requested fields."""
+        return queryset
+
+
+class FlexFieldsViewSetMixin:
+    """Passes the ``fields`` and ``expand`` query parameters of read
+    requests on to the serializer, and applies the serializer's
+    prefetch plan to :meth:`get_base_queryset`."""
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in SAFE_METHODS:
+            kwargs.setdefault("fields", get_list_parameter(self.request, "fields"))
+            kwargs.setdefault("expand", get_list_parameter(self.request, "expand"))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_base_queryset(self):
+        return super().get_queryset()
+
+    def get_queryset(self):
+        queryset = self.get_base_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return self.get_serializer().prefetch_queryset(queryset)
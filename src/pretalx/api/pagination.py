@@ -0,0 +1,49 @@
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """Cursor pagination ordered by primary key, which stays stable and fast
+    when clients iterate over large result sets. Authenticated clients (for
+    example integrations using an API token) may request larger pages."""
+
+    ordering = "pk"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    authenticated_max_page_size = 1000
+
+    def get_page_size(self, request):
+        if request.user.is_authenticated:
+            self.max_page_size = self.authenticated_max_page_size
+        return super().get_page_size(request)
+
+
+class ApiPagination(pagination.LimitOffsetPagination):
+    """Paginates with ``limit`` and ``offset`` by default, and switches to
+    :class:`CursorPagination` when the request contains a ``cursor``
+    parameter (which may be empty to request the first page)."""
+
+    def __init__(self):
+        self.cursor_pagination = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if CursorPagination.cursor_query_param in request.query_params:
+            self.cursor_pagination = CursorPagination()
+            page = self.cursor_pagination.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor_pagination.display_page_controls
+            return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_pagination:
+            return self.cursor_pagination.get_html_context()
+        return super().get_html_context()
+
+    def to_html(self):
+        if self.cursor_pagination:
+            return self.cursor_pagination.to_html()
+        return super().to_html()
@@ -1,5 +1,10 @@
-from rest_framework.serializers import ModelSerializer, SlugRelatedField
+from rest_framework.serializers import (
+    ModelSerializer,
+    SerializerMethodField,
+    SlugRelatedField,
+)
 
+from pretalx.api.mixins import FlexFieldsSerializerMixin
 from pretalx.person.models import User
 from pretalx.submission.models import Answer, AnswerOption, Question, Submission
 
@@ -10,9 +15,15 @@ class Meta:
         fields = ("id", "answer")
 
 
-class QuestionSerializer(ModelSerializer):
+class QuestionSerializer(FlexFieldsSerializerMixin, ModelSerializer):
     options = AnswerOptionSerializer(many=True, required=False)
 
+    def prefetch_queryset(self, queryset):
+        queryset = super().prefetch_queryset(queryset)
+        if self.is_requested("options"):
+            queryset = queryset.prefetch_related("options")
+        return queryset
+
     class Meta:
         model = Question
         fields = (
@@ -88,8 +99,29 @@ class Meta:
         )
 
 
-class AnswerSerializer(AnswerWriteSerializer):
-    question = MinimalQuestionSerializer(Question.objects.none())
+class AnswerSerializer(FlexFieldsSerializerMixin, AnswerWriteSerializer):
+    question = SerializerMethodField()
+    expandable_fields = ("question",)
+
+    def prefetch_queryset(self, queryset):
+        queryset = super().prefetch_queryset(queryset)
+        related = [
+            name
+            for name in ("question", "person", "review", "submission")
+            if self.is_requested(name)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        if self.is_requested("options"):
+            queryset = queryset.prefetch_related("options")
+        if self.is_expanded("question"):
+            queryset = queryset.prefetch_related("question__options")
+        return queryset
+
+    def get_question(self, obj):
+        if self.is_expanded("question"):
+            return QuestionSerializer(obj.question, context=self.context).data
+        return MinimalQuestionSerializer(obj.question, context=self.context).data
 
     class Meta(AnswerWriteSerializer.Meta):
         pass
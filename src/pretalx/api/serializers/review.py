@@ -1,17 +1,53 @@
+from django.db.models import Prefetch
 from rest_framework.serializers import (
     ModelSerializer,
     SerializerMethodField,
     SlugRelatedField,
 )
 
+from pretalx.api.mixins import FlexFieldsSerializerMixin
 from pretalx.api.serializers.question import AnswerSerializer
-from pretalx.submission.models import Answer, Review
+from pretalx.api.serializers.submission import SubmissionSerializer
+from pretalx.submission.models import Answer, Review, Submission
 
 
-class AnonymousReviewSerializer(ModelSerializer):
+class AnonymousReviewSerializer(FlexFieldsSerializerMixin, ModelSerializer):
     """Does not include the user and answer fields."""
 
-    submission = SlugRelatedField(slug_field="code", read_only=True)
+    submission = SerializerMethodField()
+    expandable_fields = ("submission",)
+
+    def __init__(self, *args, **kwargs):
+        self.can_view_speakers = kwargs.pop("can_view_speakers", False)
+        self.event = kwargs.pop("event", None)
+        super().__init__(*args, **kwargs)
+
+    def get_submission_serializer(self, *args, **kwargs):
+        return SubmissionSerializer(
+            *args, event=self.event, can_view_speakers=self.can_view_speakers, **kwargs
+        )
+
+    def prefetch_queryset(self, queryset):
+        queryset = super().prefetch_queryset(queryset)
+        if self.is_expanded("submission"):
+            return queryset.prefetch_related(
+                Prefetch(
+                    "submission",
+                    queryset=self.get_submission_serializer().prefetch_queryset(
+                        Submission.objects.all()
+                    ),
+                )
+            )
+        if self.is_requested("submission"):
+            return queryset.select_related("submission")
+        return queryset
+
+    def get_submission(self, obj):
+        if self.is_expanded("submission"):
+            return self.get_submission_serializer(
+                obj.submission, context=self.context
+            ).data
+        return obj.submission.code
 
     class Meta:
         model = Review
@@ -29,8 +65,23 @@ class ReviewSerializer(AnonymousReviewSerializer):
     user = SlugRelatedField(slug_field="name", read_only=True)
     answers = SerializerMethodField()
 
+    def prefetch_queryset(self, queryset):
+        queryset = super().prefetch_queryset(queryset)
+        if self.is_requested("user"):
+            queryset = queryset.select_related("user")
+        if self.is_requested("answers"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "answers",
+                    queryset=Answer.objects.select_related(
+                        "question", "submission", "person"
+                    ).prefetch_related("options"),
+                )
+            )
+        return queryset
+
     def get_answers(self, obj):
-        return AnswerSerializer(Answer.objects.filter(review=obj), many=True).data
+        return AnswerSerializer(obj.answers.all(), many=True).data
 
     class Meta(AnonymousReviewSerializer.Meta):
         model = Review
@@ -1,10 +1,12 @@
+from django.db.models import Prefetch
 from rest_framework.serializers import CharField, ModelSerializer, SerializerMethodField
 
+from pretalx.api.mixins import FlexFieldsSerializerMixin
 from pretalx.api.serializers.question import AnswerSerializer
 from pretalx.api.serializers.room import AvailabilitySerializer
 from pretalx.person.models import SpeakerProfile, User
-from pretalx.schedule.models import Availability
-from pretalx.submission.models import Answer
+from pretalx.schedule.models import Availability, TalkSlot
+from pretalx.submission.models import Answer, Submission
 
 
 class SubmitterSerializer(ModelSerializer):
@@ -12,9 +14,9 @@ class SubmitterSerializer(ModelSerializer):
 
     def get_biography(self, obj):
         if self.event:
-            return getattr(
-                obj.profiles.filter(event=self.event).first(), "biography", ""
-            )
+            for profile in obj.profiles.all():
+                if profile.event_id == self.event.pk:
+                    return profile.biography
         return ""
 
     def __init__(self, *args, **kwargs):
@@ -26,24 +28,86 @@ class Meta:
         fields = ("code", "name", "biography", "avatar")
 
 
-class SpeakerSerializer(ModelSerializer):
+class SpeakerSerializer(FlexFieldsSerializerMixin, ModelSerializer):
     code = CharField(source="user.code")
     name = CharField(source="user.name")
     avatar = SerializerMethodField()
     submissions = SerializerMethodField()
+    expandable_fields = ("submissions",)
+
+    def __init__(self, *args, **kwargs):
+        self.event = kwargs.pop("event", None)
+        self.can_view_speakers = kwargs.pop("can_view_speakers", False)
+        super().__init__(*args, **kwargs)
 
-    @staticmethod
-    def get_avatar(obj):
-        return obj.user.get_avatar_url(event=obj.event)
+    def get_submission_serializer(self, *args, **kwargs):
+        from pretalx.api.serializers.submission import SubmissionSerializer
 
-    @staticmethod
-    def get_submissions(obj):
-        talks = (
-            obj.event.current_schedule.talks.all() if obj.event.current_schedule else []
+        return SubmissionSerializer(
+            *args,
+            event=self.event,
+            can_view_speakers=self.can_view_speakers,
+            **kwargs,
+        )
+
+    def get_submission_queryset(self):
+        queryset = Submission.objects.filter(event=self.event)
+        if self.is_expanded("submissions"):
+            return self.get_submission_serializer().prefetch_queryset(queryset)
+        return queryset
+
+    def prefetch_queryset(self, queryset):
+        """Loads everything this serializer needs for a list of speaker
+        profiles in a fixed number of queries."""
+        queryset = super().prefetch_queryset(queryset).select_related("user")
+        if not self.is_requested("submissions"):
+            return queryset
+        queryset = queryset.prefetch_related(
+            Prefetch("user__submissions", queryset=self.get_submission_queryset())
+        )
+        if self.is_expanded("submissions"):
+            # The submission serializer loads all slots in the current schedule
+            return queryset
+        return queryset.prefetch_related(
+            Prefetch(
+                "user__submissions__slots",
+                queryset=TalkSlot.objects.filter(schedule=self.event.current_schedule),
+            )
         )
-        return obj.user.submissions.filter(
-            event=obj.event, slots__in=talks
-        ).values_list("code", flat=True)
+
+    def get_avatar(self, obj):
+        return obj.user.get_avatar_url(event=self.event or obj.event)
+
+    def get_submission_objects(self, obj):
+        event = self.event or obj.event
+        schedule = event.current_schedule
+        if not schedule:
+            return []
+        return [
+            submission
+            for submission in obj.user.submissions.all()
+            if submission.event_id == event.pk
+            and any(
+                slot.schedule_id == schedule.pk and slot.is_visible
+                for slot in submission.slots.all()
+            )
+        ]
+
+    def get_submissions(self, obj):
+        submissions = self.get_submission_objects(obj)
+        if self.is_expanded("submissions"):
+            # Share the event and its current schedule between all proposals
+            # and their slots, which may belong to another speaker's copy of
+            # the proposal.
+            event = self.event or obj.event
+            for submission in submissions:
+                submission.event = event
+                for slot in submission.slots.all():
+                    slot.submission = submission
+            return self.get_submission_serializer(
+                submissions, many=True, context=self.context
+            ).data
+        return [submission.code for submission in submissions]
 
     class Meta:
         model = SpeakerProfile
@@ -52,22 +116,66 @@ class Meta:
 
 class SpeakerOrgaSerializer(SpeakerSerializer):
     email = CharField(source="user.email")
-    answers = AnswerSerializer(Answer.objects.none(), many=True, read_only=True)
+    answers = SerializerMethodField()
     availabilities = AvailabilitySerializer(
         Availability.objects.none(), many=True, read_only=True
     )
 
-    def get_submissions(self, obj):
-        return obj.user.submissions.filter(event=obj.event).values_list(
-            "code", flat=True
-        )
+    def prefetch_queryset(self, queryset):
+        queryset = queryset.select_related("user")
+        if self.is_requested("submissions") or self.is_requested("answers"):
+            queryset = queryset.prefetch_related(
+                Prefetch("user__submissions", queryset=self.get_submission_queryset())
+            )
+        if self.is_requested("answers"):
+            answers = Answer.objects.select_related(
+                "question", "submission", "person"
+            ).prefetch_related("options")
+            queryset = queryset.prefetch_related(
+                Prefetch("user__submissions__answers", queryset=answers),
+                Prefetch("user__answers", queryset=answers),
+            )
+        if self.is_requested("availabilities"):
+            queryset = queryset.prefetch_related("availabilities")
+        return queryset
+
+    def get_submission_objects(self, obj):
+        event = self.event or obj.event
+        return [
+            submission
+            for submission in obj.user.submissions.all()
+            if submission.event_id == event.pk
+        ]
+
+    def get_answer_objects(self, obj):
+        """All answers the speaker has given for themselves or for their
+        proposals for this event, see
+        :attr:`~pretalx.person.models.profile.SpeakerProfile.answers`."""
+        event = self.event or obj.event
+        answers = {answer.pk: answer for answer in obj.user.answers.all()}
+        for submission in obj.user.submissions.all():
+            if submission.event_id == event.pk:
+                answers.update(
+                    {answer.pk: answer for answer in submission.answers.all()}
+                )
+        return [answers[pk] for pk in sorted(answers)]
+
+    def get_answers(self, obj):
+        return AnswerSerializer(
+            self.get_answer_objects(obj), many=True, context=self.context
+        ).data
 
     class Meta(SpeakerSerializer.Meta):
         fields = SpeakerSerializer.Meta.fields + ("answers", "email", "availabilities")
 
 
 class SpeakerReviewerSerializer(SpeakerOrgaSerializer):
-    answers = AnswerSerializer(many=True, source="reviewer_answers")
+    def get_answer_objects(self, obj):
+        return [
+            answer
+            for answer in super().get_answer_objects(obj)
+            if answer.question.is_visible_to_reviewers
+        ]
 
     class Meta(SpeakerOrgaSerializer.Meta):
         pass
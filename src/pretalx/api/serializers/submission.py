@@ -1,5 +1,6 @@
 from functools import partial
 
+from django.db.models import Prefetch, Q
 from i18nfield.rest_framework import I18nAwareModelSerializer
 from rest_framework.serializers import (
     Field,
@@ -8,10 +9,18 @@
     SlugRelatedField,
 )
 
+from pretalx.api.mixins import FlexFieldsSerializerMixin
 from pretalx.api.serializers.question import AnswerSerializer
 from pretalx.api.serializers.speaker import SubmitterSerializer
+from pretalx.person.models import SpeakerProfile
 from pretalx.schedule.models import Schedule, TalkSlot
-from pretalx.submission.models import Resource, Submission, SubmissionStates, Tag
+from pretalx.submission.models import (
+    Answer,
+    Resource,
+    Submission,
+    SubmissionStates,
+    Tag,
+)
 
 
 class FileField(Field):
@@ -47,11 +56,9 @@ class Meta:
         fields = ("room", "start", "end")
 
 
-class SubmissionSerializer(I18nAwareModelSerializer):
+class SubmissionSerializer(FlexFieldsSerializerMixin, I18nAwareModelSerializer):
     track = SlugRelatedField(slug_field="name", read_only=True)
-    slot = SlotSerializer(
-        TalkSlot.objects.none().filter(is_visible=True), read_only=True
-    )
+    slot = SerializerMethodField()
     duration = SerializerMethodField()
     speakers = SerializerMethodField()
     resources = ResourceSerializer(Resource.objects.none(), read_only=True, many=True)
@@ -63,9 +70,48 @@ class SubmissionSerializer(I18nAwareModelSerializer):
     def get_duration(obj):
         return obj.get_duration()
 
+    def prefetch_queryset(self, queryset):
+        """Loads everything this serializer needs for a list of submissions
+        in a fixed number of queries: visible slots and all slots in the
+        current schedule, speakers with their profiles for this event, and
+        resources. Relations that were not requested are not loaded."""
+        queryset = super().prefetch_queryset(queryset)
+        if self.is_requested("track"):
+            queryset = queryset.select_related("track")
+        if self.is_requested("slot") or self.is_requested("speakers"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "slots",
+                    queryset=TalkSlot.objects.filter(
+                        Q(is_visible=True) | Q(schedule=self.event.current_schedule)
+                    ).select_related("room"),
+                )
+            )
+        if self.is_requested("speakers"):
+            queryset = queryset.prefetch_related(
+                "speakers",
+                Prefetch(
+                    "speakers__profiles",
+                    queryset=SpeakerProfile.objects.filter(event=self.event),
+                ),
+            )
+        if self.is_requested("resources"):
+            queryset = queryset.prefetch_related("resources")
+        return queryset
+
+    def get_slot(self, obj):
+        schedule = obj.event.current_schedule
+        if not schedule:
+            return None
+        slots = [slot for slot in obj.slots.all() if slot.schedule_id == schedule.pk]
+        if not slots:
+            return None
+        slot = min(slots, key=lambda slot: slot.pk)
+        return SlotSerializer(slot, context=self.context).data
+
     def get_speakers(self, obj):
         has_slots = (
-            obj.slots.filter(is_visible=True)
+            any(slot.is_visible for slot in obj.slots.all())
             and obj.state == SubmissionStates.CONFIRMED
         )
         if has_slots or self.can_view_speakers:
@@ -124,8 +170,23 @@ class SubmissionOrgaSerializer(SubmissionSerializer):
     def get_created(self, obj):
         return obj.created.astimezone(obj.event.tz).isoformat()
 
+    def prefetch_queryset(self, queryset):
+        queryset = super().prefetch_queryset(queryset)
+        if self.is_requested("answers"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "answers",
+                    queryset=Answer.objects.select_related(
+                        "question", "person"
+                    ).prefetch_related("options"),
+                )
+            )
+        if self.is_requested("tags"):
+            queryset = queryset.prefetch_related("tags")
+        return queryset
+
     def get_tags(self, obj):
-        return list(obj.tags.all().values_list("tag", flat=True))
+        return [tag.tag for tag in obj.tags.all()]
 
     class Meta(SubmissionSerializer.Meta):
         fields = SubmissionSerializer.Meta.fields + [
@@ -138,7 +199,15 @@ class Meta(SubmissionSerializer.Meta):
 
 
 class SubmissionReviewerSerializer(SubmissionOrgaSerializer):
-    answers = AnswerSerializer(many=True, source="reviewer_answers")
+    answers = SerializerMethodField()
+
+    def get_answers(self, obj):
+        answers = [
+            answer
+            for answer in obj.answers.all()
+            if answer.question.is_visible_to_reviewers
+        ]
+        return AnswerSerializer(answers, many=True, context=self.context).data
 
     class Meta(SubmissionOrgaSerializer.Meta):
         pass
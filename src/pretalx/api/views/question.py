@@ -2,6 +2,7 @@
 from rest_framework import viewsets
 from rest_framework.permissions import SAFE_METHODS
 
+from pretalx.api.mixins import FlexFieldsViewSetMixin
 from pretalx.api.serializers.question import (
     AnswerSerializer,
     AnswerWriteSerializer,
@@ -25,14 +26,14 @@ def get_questions_for_user(event, user):
     return event.questions.none()
 
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(FlexFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Question.objects.none()
     serializer_class = QuestionSerializer
     write_permission_required = "orga.edit_question"
     filterset_fields = ("is_public", "is_visible_to_reviewers", "target", "variant")
     search_fields = ("question",)
 
-    def get_queryset(self):
+    def get_base_queryset(self):
         return get_questions_for_user(self.request.event, self.request.user)
 
     def perform_create(self, serializer):
@@ -63,22 +64,18 @@ class Meta:
         fields = ("question", "submission", "person", "review")
 
 
-class AnswerViewSet(viewsets.ModelViewSet):
+class AnswerViewSet(FlexFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Answer.objects.none()
     serializer_class = AnswerSerializer
     write_permission_required = "orga.change_submissions"
     filterset_class = AnswerFilterSet
     search_fields = ("answer",)
 
-    def get_queryset(self):
-        return (
-            Answer.objects.filter(
-                question_id__in=get_questions_for_user(
-                    self.request.event, self.request.user
-                ).values_list("id", flat=True)
-            )
-            .prefetch_related("options")
-            .select_related("question", "person", "review", "submission")
+    def get_base_queryset(self):
+        return Answer.objects.filter(
+            question_id__in=get_questions_for_user(
+                self.request.event, self.request.user
+            ).values_list("id", flat=True)
         )
 
     def get_serializer_class(self):
@@ -1,12 +1,13 @@
 from django.db import models
 from rest_framework import viewsets
 
+from pretalx.api.mixins import FlexFieldsViewSetMixin
 from pretalx.api.serializers.review import AnonymousReviewSerializer, ReviewSerializer
 from pretalx.submission.models import Review
 from pretalx.submission.models.submission import SubmissionStates
 
 
-class ReviewViewSet(viewsets.ReadOnlyModelViewSet):
+class ReviewViewSet(FlexFieldsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = ReviewSerializer
     queryset = Review.objects.none()
     filterset_fields = ("submission__code",)
@@ -18,7 +19,18 @@ def get_serializer_class(self):
             return AnonymousReviewSerializer
         return self.serializer_class
 
-    def get_queryset(self):
+    def get_serializer(self, *args, **kwargs):
+        can_view_speakers = self.request.user.has_perm(
+            "orga.view_speakers", self.request.event
+        )
+        return super().get_serializer(
+            *args,
+            can_view_speakers=can_view_speakers,
+            event=self.request.event,
+            **kwargs
+        )
+
+    def get_base_queryset(self):
         if not self.request.user.has_perm("orga.view_reviews", self.request.event):
             return Review.objects.none()
         queryset = (
@@ -1,5 +1,6 @@
 from rest_framework import viewsets
 
+from pretalx.api.mixins import FlexFieldsViewSetMixin
 from pretalx.api.serializers.speaker import (
     SpeakerOrgaSerializer,
     SpeakerReviewerSerializer,
@@ -8,7 +9,7 @@
 from pretalx.person.models import SpeakerProfile
 
 
-class SpeakerViewSet(viewsets.ReadOnlyModelViewSet):
+class SpeakerViewSet(FlexFieldsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = SpeakerSerializer
     queryset = SpeakerProfile.objects.none()
     lookup_field = "user__code__iexact"
@@ -39,5 +40,13 @@ def get_base_queryset(self):
             ).distinct()
         return SpeakerProfile.objects.none()
 
-    def get_queryset(self):
-        return self.get_base_queryset() or self.queryset
+    def get_serializer(self, *args, **kwargs):
+        can_view_speakers = self.request.user.has_perm(
+            "agenda.view_schedule", self.request.event
+        ) or self.request.user.has_perm("orga.view_speakers", self.request.event)
+        return super().get_serializer(
+            *args,
+            can_view_speakers=can_view_speakers,
+            event=self.request.event,
+            **kwargs,
+        )
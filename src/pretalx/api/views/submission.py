@@ -1,5 +1,6 @@
 from rest_framework import viewsets
 
+from pretalx.api.mixins import FlexFieldsViewSetMixin
 from pretalx.api.serializers.submission import (
     ScheduleListSerializer,
     ScheduleSerializer,
@@ -12,14 +13,14 @@
 from pretalx.submission.models import Submission, Tag
 
 
-class SubmissionViewSet(viewsets.ReadOnlyModelViewSet):
+class SubmissionViewSet(FlexFieldsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = SubmissionSerializer
     queryset = Submission.objects.none()
     lookup_field = "code__iexact"
     filterset_fields = ("state", "content_locale")
     search_fields = ("title", "speakers__name")
 
-    def get_queryset(self):
+    def get_base_queryset(self):
         if self.request._request.path.endswith(
             "/talks/"
         ) or not self.request.user.has_perm(
@@ -25,6 +25,7 @@
 
 from pretalx.cfp.forms.submissions import SubmissionInvitationForm
 from pretalx.cfp.views.event import LoggedInEventPageMixin
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.phrases import phrases
 from pretalx.common.views import is_form_bound
 from pretalx.person.forms import LoginInfoForm, SpeakerProfileForm
@@ -107,10 +108,12 @@ def post(self, request, *args, **kwargs):
             profile.log_action("pretalx.user.profile.update", person=request.user)
             if self.profile_form.has_changed():
                 self.request.event.cache.set("rebuild_schedule_export", True, None)
+                ExporterCache(self.request.event).clear()
         elif self.questions_form.is_bound and self.questions_form.is_valid():
             self.questions_form.save()
             if self.questions_form.has_changed():
                 self.request.event.cache.set("rebuild_schedule_export", True, None)
+                ExporterCache(self.request.event).clear()
         else:
             messages.error(self.request, phrases.base.error_saving_changes)
             return super().get(request, *args, **kwargs)
@@ -397,6 +400,7 @@ def form_valid(self, form):
                     "pretalx.submission.update", person=self.request.user
                 )
                 self.request.event.cache.set("rebuild_schedule_export", True, None)
+                ExporterCache(self.request.event).clear()
             messages.success(self.request, phrases.base.saved)
         else:
             messages.error(self.request, phrases.cfp.submission_uneditable)
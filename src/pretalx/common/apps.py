@@ -7,6 +7,7 @@ class CommonConfig(AppConfig):
     name = "pretalx.common"
 
     def ready(self):
+        from . import exporter  # noqa
         from . import log_display  # noqa
         from . import signals  # noqa
         from . import update_check  # noqa
@@ -21,7 +21,8 @@ def _prefix_key(self, original_key: str, known_prefix=None) -> str:
         prefix = known_prefix or self.cache.get(self.prefixkey)
         if prefix is None:
             prefix = int(time.time())
-            self.cache.set(self.prefixkey, prefix)
+            # The prefix must not expire before the keys it namespaces
+            self.cache.set(self.prefixkey, prefix, None)
         self._last_prefix = prefix
         key = "%s:%d:%s" % (self.prefixkey, prefix, original_key)
         if len(key) > 200:  # Hash long keys, as memcached has a length limit
@@ -38,7 +39,7 @@ def clear(self) -> None:
             prefix = self.cache.incr(self.prefixkey, 1)
         except ValueError:  # pragma: no cover
             prefix = int(time.time())
-            self.cache.set(self.prefixkey, prefix)
+            self.cache.set(self.prefixkey, prefix, None)
 
     def set(self, key: str, value: str, timeout: int = 300):
         return self.cache.set(self._prefix_key(key), value, timeout)
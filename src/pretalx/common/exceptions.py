@@ -15,6 +15,10 @@ class TrackError(Exception):
     pass
 
 
+class ScheduleReleaseError(Exception):
+    pass
+
+
 class PretalxExceptionReporter(ExceptionReporter):
     def get_traceback_text(self):
         traceback_text = super().get_traceback_text()
@@ -1,16 +1,30 @@
+import gzip
+import hashlib
+import zlib
 from io import StringIO
-from typing import Tuple
+from typing import Iterable, Iterator, Optional, Tuple
 from urllib.parse import quote
 from xml.etree import ElementTree as ET
 
 import qrcode
 import qrcode.image.svg
 from defusedcsv import csv
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 
+from pretalx.common.cache import NamespacedCache
 from pretalx.common.urls import EventUrls
 
+# Event settings that pretalx changes on its own, and that are not shown in
+# any export.
+VOLATILE_SETTINGS = {"schedule_release"}
+
+
+def is_volatile_setting(key: str) -> bool:
+    return key in VOLATILE_SETTINGS or key.startswith("sent_mail_")
+
 
 class BaseExporter:
     """The base class for all data exporters."""
@@ -65,6 +79,17 @@ def show_qrcode(self) -> bool:
         """
         return False
 
+    @property
+    def cacheable(self) -> bool:
+        """Return True if the exported data depends only on the schedule
+        version, the active locale and whether the user is an organiser.
+
+        The output of cacheable exporters is rendered once per released
+        schedule version and served from the :class:`ExporterCache`
+        afterwards.
+        """
+        return False
+
     @property
     def icon(self) -> str:
         """Return either a fa- string or some other symbol to accompany the
@@ -86,6 +111,27 @@ def render(self, **kwargs) -> Tuple[str, str, str]:
         name, a file type and file content."""
         raise NotImplementedError()  # NOQA
 
+    @property
+    def streaming(self) -> bool:
+        """Return True if the exported file should be sent to the client
+        while it is being generated, by using ``render_stream``.
+
+        This is useful for large exports, as they don't have to be kept
+        in memory as a whole.
+        """
+        return False
+
+    def render_stream(self, **kwargs) -> Tuple[str, str, Iterator[str]]:
+        """Render the exported file and return a tuple consisting of a file
+        name, a file type and an iterator of file content chunks.
+
+        Override this method together with the ``streaming`` attribute.
+        By default, it returns the result of ``render`` as a single
+        chunk.
+        """
+        file_name, file_type, content = self.render(**kwargs)
+        return file_name, file_type, iter([content])
+
     class urls(EventUrls):
         """The base attribute of this class contains the relative URL where
         this exporter's data will be found, e.g. /event/schedule/export/my-
@@ -110,3 +156,82 @@ def render(self, **kwargs):
         writer.writerows(data)
         content = output.getvalue()
         return self.filename, "text/plain", content
+
+
+class ExporterCache:
+    """Stores the rendered output of cacheable exporters for released
+    schedule versions.
+
+    Every artifact is stored gzipped, and its ETag is stored separately, so
+    that conditional requests can be answered without loading the file
+    content. The cache is cleared when the event, its settings, rooms or
+    tracks change. Call ``clear()`` whenever other exported data changes.
+    """
+
+    timeout = 24 * 60 * 60
+
+    def __init__(self, event):
+        self.cache = NamespacedCache(f"exporters:{event.slug}")
+
+    @staticmethod
+    def get_key(exporter, schedule, locale, is_orga=False) -> str:
+        audience = "orga" if is_orga else "public"
+        return f"{schedule.pk}:{exporter.identifier}:{locale}:{audience}"
+
+    def get_etag(self, key: str) -> Optional[str]:
+        return self.cache.get(f"{key}:etag")
+
+    def get(self, key: str) -> Optional[Tuple[str, str, bytes, str]]:
+        """Returns a tuple of file name, file type, gzipped content and
+        ETag, or None."""
+        return self.cache.get(key)
+
+    def set(self, key: str, file_name: str, file_type: str, content) -> tuple:
+        if isinstance(content, str):
+            content = content.encode()
+        etag = hashlib.sha1(content).hexdigest()
+        artifact = (file_name, file_type, gzip.compress(content), etag)
+        self.cache.set_many({key: artifact, f"{key}:etag": etag}, self.timeout)
+        return artifact
+
+    def set_from_stream(
+        self, key: str, file_name: str, file_type: str, chunks: Iterable
+    ) -> Iterator:
+        """Passes on all content chunks, and stores the artifact once the
+        last chunk has been consumed."""
+        checksum = hashlib.sha1()
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip format
+        compressed = []
+        for chunk in chunks:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            checksum.update(data)
+            compressed.append(compressor.compress(data))
+            yield chunk
+        compressed.append(compressor.flush())
+        etag = checksum.hexdigest()
+        artifact = (file_name, file_type, b"".join(compressed), etag)
+        self.cache.set_many({key: artifact, f"{key}:etag": etag}, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+@receiver(post_save, sender="event.Event")
+def clear_event_exporter_cache(sender, instance, created=False, **kwargs):
+    if not created:
+        ExporterCache(instance).clear()
+
+
+@receiver(post_save, sender="event.Event_SettingsStore")
+@receiver(post_delete, sender="event.Event_SettingsStore")
+def clear_settings_exporter_cache(sender, instance, **kwargs):
+    if not is_volatile_setting(instance.key):
+        ExporterCache(instance.object).clear()
+
+
+@receiver(post_save, sender="schedule.Room")
+@receiver(post_delete, sender="schedule.Room")
+@receiver(post_save, sender="submission.Track")
+@receiver(post_delete, sender="submission.Track")
+def clear_exporter_cache(sender, instance, **kwargs):
+    ExporterCache(instance.event).clear()
@@ -1,13 +1,27 @@
+import hashlib
+import json
 import logging
+import re
+import time
+from collections import defaultdict
 from email.utils import formataddr
+from functools import lru_cache
 from smtplib import SMTPResponseException, SMTPSenderRefused
 
+import bleach
+import cssutils
+import markdown
 from django.conf import settings
+from django.core.cache import caches
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.mail.backends.smtp import EmailBackend
+from django.template.loader import get_template
+from django.utils.html import escape
+from django.utils.translation import get_language, override
 
 from pretalx.celery_app import app
 from pretalx.common.exceptions import SendMailException
+from pretalx.common.templatetags.rich_text import ALLOWED_TAGS
 from pretalx.event.models import Event
 
 logger = logging.getLogger(__name__)
@@ -40,47 +54,160 @@ def __missing__(self, key):
         return key
 
 
-@app.task(bind=True)
-def mail_send_task(
-    self,
+MAIL_SUBJECT_PLACEHOLDER = "PRETALX_MAIL_SUBJECT_8d3e0c"
+MAIL_BODY_PLACEHOLDER = "PRETALX_MAIL_BODY_8d3e0c"
+
+
+@lru_cache(maxsize=1024)
+def render_mail_body(text: str) -> str:
+    """Renders the Markdown text of a mail to sanitised HTML."""
+    return bleach.linkify(
+        bleach.clean(markdown.markdown(text), tags=ALLOWED_TAGS),
+        parse_email=True,
+    )
+
+
+def get_tag_styles(html: str) -> dict:
+    """Returns the declarations of all CSS rules in the ``<style>`` blocks
+    of the given document that apply to plain tag selectors like ``a``, as
+    a mapping of tag names to style attributes."""
+    parser = cssutils.CSSParser(loglevel=logging.CRITICAL)
+    styles = defaultdict(dict)
+    for css in re.findall(r"<style[^>]*>(.*?)</style>", html, flags=re.DOTALL):
+        for rule in parser.parseString(css):
+            if rule.type != rule.STYLE_RULE:
+                continue
+            for selector in rule.selectorList:
+                if re.fullmatch(r"[a-z][a-z0-9]*", selector.selectorText):
+                    for declaration in rule.style:
+                        styles[selector.selectorText][
+                            declaration.name
+                        ] = declaration.value
+    return {
+        tag: ";".join(f"{name}: {value}" for name, value in declarations.items())
+        for tag, declarations in styles.items()
+    }
+
+
+def get_mail_wrapper(event=None, locale=None):
+    """Returns the HTML mail wrapper of an event with all CSS inlined, and
+    the styles to apply to the elements of the mail body.
+
+    The wrapper contains placeholders for the subject and the body. It is
+    cached per event, colour, signature and locale, so that CSS only has to
+    be inlined once per mail run rather than once per mail.
+    """
+    signature = None
+    if event:
+        signature = event.settings.mail_signature
+        if signature.strip().startswith("-- "):
+            signature = signature.strip()[3:].strip()
+    context = {
+        "body": MAIL_BODY_PLACEHOLDER,
+        "event": event,
+        "color": (event.primary_color if event else "") or "#3aa57c",
+        "locale": locale,
+        "rtl": locale in settings.LANGUAGES_RTL,
+        "subject": MAIL_SUBJECT_PLACEHOLDER,
+        "signature": signature,
+    }
+    language = locale or get_language()
+    key = (
+        "mail_wrapper:"
+        + hashlib.sha1(
+            json.dumps(
+                [
+                    language,
+                    str(event.name) if event else None,
+                    event.urls.base.full() if event else None,
+                    context["color"],
+                    context["rtl"],
+                    signature,
+                ]
+            ).encode()
+        ).hexdigest()
+    )
+    cache = event.cache if event else caches["default"]
+    result = cache.get(key)
+    if result:
+        return result
+    from inlinestyler.utils import inline_css
+
+    with override(language):
+        html = get_template("mail/mailwrapper.html").render(context)
+    result = (inline_css(html), get_tag_styles(html))
+    cache.set(key, result, timeout=3600)
+    return result
+
+
+def make_mail_html(body: str, subject: str, event=None, locale=None) -> str:
+    """Puts the rendered HTML ``body`` of a mail into the cached mail
+    wrapper of the event, see :func:`get_mail_wrapper`."""
+    import lxml.html
+
+    wrapper, tag_styles = get_mail_wrapper(event, locale)
+    if body and tag_styles:
+        fragment = lxml.html.fragment_fromstring(body, create_parent="div")
+        for element in fragment.iter():
+            if element is not fragment and element.tag in tag_styles:
+                element.set("style", tag_styles[element.tag])
+        body = "".join(
+            [fragment.text or ""]
+            + [lxml.html.tostring(element, encoding="unicode") for element in fragment]
+        )
+    return wrapper.replace(MAIL_SUBJECT_PLACEHOLDER, escape(subject)).replace(
+        MAIL_BODY_PLACEHOLDER, body
+    )
+
+
+def get_mail_sender(event=None):
+    """Returns the sender address and the default reply-to address for
+    mails of the given event."""
+    if not event:
+        return formataddr(("pretalx", settings.MAIL_FROM)), []
+    sender = settings.MAIL_FROM
+    if event.settings.smtp_use_custom:
+        sender = event.settings.mail_from or sender
+
+    reply_to = event.settings.mail_reply_to
+    if not reply_to and sender == settings.MAIL_FROM:
+        reply_to = event.email
+    reply_to = [formataddr((str(event.name), reply_to))] if reply_to else []
+    sender = formataddr((str(event.name), sender or settings.MAIL_FROM))
+    return sender, reply_to
+
+
+def make_mail(
     to: list,
     subject: str,
     body: str,
     html: str,
     reply_to: list = None,
-    event: int = None,
     cc: list = None,
     bcc: list = None,
     headers: dict = None,
+    html_context: dict = None,
+    sender: tuple = None,
+    event=None,
 ):
+    """Builds an email message, or returns None if there are no valid
+    recipients. ``sender`` is a tuple as returned by
+    :func:`get_mail_sender`.
+
+    ``html`` is a full HTML document, which will have its CSS inlined.
+    Alternatively, ``html_context`` can contain the ``body``, ``subject``
+    and ``locale`` for :func:`make_mail_html`.
+    """
     if isinstance(to, str):
         to = [to]
     to = [t for t in to if not t.endswith("@localhost")]
     if not to:
-        return
+        return None
     reply_to = (
         [] if not reply_to or (len(reply_to) == 1 and reply_to[0] == "") else reply_to
     )
     reply_to = reply_to.split(",") if isinstance(reply_to, str) else reply_to
-    if event:
-        event = Event.objects.get(pk=event)
-        backend = event.get_mail_backend()
-
-        sender = settings.MAIL_FROM
-        if event.settings.smtp_use_custom:
-            sender = event.settings.mail_from or sender
-
-        reply_to = reply_to or event.settings.mail_reply_to
-        if not reply_to and sender == settings.MAIL_FROM:
-            reply_to = event.email
-
-        if isinstance(reply_to, str):
-            reply_to = [formataddr((str(event.name), reply_to))]
-
-        sender = formataddr((str(event.name), sender or settings.MAIL_FROM))
-    else:
-        sender = formataddr(("pretalx", settings.MAIL_FROM))
-        backend = get_connection(fail_silently=False)
+    sender, default_reply_to = sender or get_mail_sender()
 
     email = EmailMultiAlternatives(
         subject,
@@ -90,26 +217,174 @@ def mail_send_task(
         cc=cc,
         bcc=bcc,
         headers=headers or {},
-        reply_to=reply_to,
+        reply_to=reply_to or default_reply_to,
     )
-    if html is not None:
+    if html_context is not None:
+        email.attach_alternative(
+            make_mail_html(event=event, **html_context), "text/html"
+        )
+    elif html is not None:
         from inlinestyler.utils import inline_css
 
         email.attach_alternative(inline_css(html), "text/html")
+    return email
+
+
+def get_mail_backend(event=None):
+    if event:
+        return event.get_mail_backend()
+    return get_connection(fail_silently=False)
+
+
+def get_mail_server_key(backend) -> str:
+    """Identifies the mail server a backend sends to, so that all tasks
+    sending mails over the same server share one rate limit."""
+    server = [type(backend).__name__] + [
+        str(getattr(backend, attr, "")) for attr in ("host", "port", "username")
+    ]
+    return hashlib.sha1(":".join(server).encode()).hexdigest()
+
+
+def wait_for_mail_rate_limit(backend):
+    """Blocks until another mail may be sent over the given backend, as
+    configured in the ``mail.rate_limit`` setting.
+
+    The limit is shared by all tasks and processes: the cache counts the
+    mails sent to each mail server per time window (one second, or longer
+    for limits below one mail per second). If the cache does not keep
+    values, every mail waits for the interval of the limit instead.
+    """
+    rate = settings.MAIL_RATE_LIMIT
+    if not rate:
+        return
+    window = max(1, 1 / rate)
+    tokens = max(1, int(rate * window))
+    key = f"mail_rate_limit:{get_mail_server_key(backend)}"
+    cache = caches["default"]
+    while True:
+        current = time.time()
+        window_index = int(current // window)
+        window_key = f"{key}:{window_index}"
+        cache.add(window_key, 0, timeout=int(window) + 1)
+        try:
+            count = cache.incr(window_key)
+        except ValueError:
+            time.sleep(1 / rate)
+            return
+        if count <= tokens:
+            return
+        time.sleep((window_index + 1) * window - current)
+
+
+# Retry on external problems: Connection issues (101, 111), timeouts (421), filled-up mailboxes (422),
+# out of memory (431), network issues (442), another timeout (447), or too many mails sent (452)
+RETRY_SMTP_CODES = (101, 111, 421, 422, 431, 442, 447, 452)
+
+
+@app.task(bind=True)
+def mail_send_task(
+    self,
+    to: list,
+    subject: str,
+    body: str,
+    html: str,
+    reply_to: list = None,
+    event: int = None,
+    cc: list = None,
+    bcc: list = None,
+    headers: dict = None,
+    html_context: dict = None,
+):
+    if event:
+        event = Event.objects.get(pk=event)
+    email = make_mail(
+        to,
+        subject,
+        body,
+        html,
+        reply_to=reply_to,
+        cc=cc,
+        bcc=bcc,
+        headers=headers,
+        html_context=html_context,
+        sender=get_mail_sender(event),
+        event=event,
+    )
+    if not email:
+        return
+    backend = get_mail_backend(event)
+    wait_for_mail_rate_limit(backend)
 
     try:
         backend.send_messages([email])
     except SMTPResponseException as exception:  # pragma: no cover
-        # Retry on external problems: Connection issues (101, 111), timeouts (421), filled-up mailboxes (422),
-        # out of memory (431), network issues (442), another timeout (447), or too many mails sent (452)
-        if exception.smtp_code in (101, 111, 421, 422, 431, 442, 447, 452):
+        if exception.smtp_code in RETRY_SMTP_CODES:
             self.retry(max_retries=5, countdown=2 ** (self.request.retries * 2))
         logger.exception("Error sending email")
         raise SendMailException(
-            "Failed to send an email to {}: {}".format(to, exception)
+            "Failed to send an email to {}: {}".format(email.to, exception)
         )
     except Exception as exception:  # pragma: no cover
         logger.exception("Error sending email")
         raise SendMailException(
-            "Failed to send an email to {}: {}".format(to, exception)
+            "Failed to send an email to {}: {}".format(email.to, exception)
+        )
+
+
+@app.task(bind=True)
+def mail_send_batch_task(self, mails: list, event: int = None, failed: list = None):
+    """Sends a list of mails over a single mail server connection.
+
+    ``mails`` contains the keyword arguments of :func:`mail_send_task`
+    (except for ``event``) for each mail. Mails are sent within the
+    ``mail.rate_limit`` setting, see :func:`wait_for_mail_rate_limit`. If
+    the mail server reports a temporary problem, the task is retried with
+    all mails that have not been sent yet. Once the retries are used up,
+    the remaining mails are still attempted, and all mails that could not
+    be sent are logged and reported in the task's exception. ``failed``
+    carries the recipients and errors of failed mails over retries.
+    """
+    max_retries = 5
+    if event:
+        event = Event.objects.get(pk=event)
+    sender = get_mail_sender(event)
+    backend = get_mail_backend(event)
+    failed = failed or []
+    try:
+        for index, mail in enumerate(mails):
+            email = make_mail(**mail, sender=sender, event=event)
+            if not email:
+                continue
+            wait_for_mail_rate_limit(backend)
+            try:
+                backend.open()
+                backend.send_messages([email])
+            except SMTPResponseException as exception:
+                if (
+                    exception.smtp_code in RETRY_SMTP_CODES
+                    and self.request.retries < max_retries
+                ):
+                    backend.close()
+                    self.retry(
+                        kwargs={
+                            "mails": mails[index:],
+                            "event": event.pk if event else None,
+                            "failed": failed,
+                        },
+                        max_retries=max_retries,
+                        countdown=2 ** (self.request.retries * 2),
+                    )
+                logger.exception(f"Error sending email to {email.to}")
+                failed.append((email.to, str(exception)))
+            except Exception as exception:  # pragma: no cover
+                logger.exception(f"Error sending email to {email.to}")
+                failed.append((email.to, str(exception)))
+    finally:
+        backend.close()
+    if failed:
+        raise SendMailException(
+            "Failed to send {} emails: {}".format(
+                len(failed),
+                ", ".join(f"{to}: {exception}" for to, exception in failed),
+            )
         )
@@ -7,16 +7,15 @@
     SessionMiddleware as BaseSessionMiddleware,
 )
 from django.core.exceptions import DisallowedHost
-from django.db.models import Q
 from django.http import Http404
 from django.http.request import split_domain_port
 from django.middleware.csrf import CsrfViewMiddleware as BaseCsrfMiddleware
-from django.shortcuts import get_object_or_404, redirect
-from django.urls import resolve
+from django.shortcuts import redirect
 from django.utils.cache import patch_vary_headers
 from django.utils.http import http_date
 
-from pretalx.event.models.event import Event, Event_SettingsStore
+from pretalx.common.middleware.event import get_request_event, get_request_url
+from pretalx.event.models import Event
 
 LOCAL_HOST_NAMES = ("testserver", "localhost")
 ANY_DOMAIN_ALLOWED = ("robots.txt",)
@@ -48,12 +47,12 @@ def process_request(self, request):
         request.port = int(port) if port else None
         request.uses_custom_domain = False
 
-        resolved = resolve(request.path)
+        resolved = get_request_url(request)
         if resolved.url_name in ANY_DOMAIN_ALLOWED or request.path.startswith("/api/"):
             return None
         event_slug = resolved.kwargs.get("event")
         if event_slug:
-            event = get_object_or_404(Event, slug__iexact=event_slug)
+            event = get_request_event(request, event_slug)
             request.event = event
             if event.settings.custom_domain:
                 custom_domain = urlparse(event.settings.custom_domain)
@@ -75,17 +74,14 @@ def process_request(self, request):
             return redirect(urljoin(default_domain, request.get_full_path()))
 
         # If this domain is used as custom domain, redirect to most recent event
-        event_settings = Event_SettingsStore.objects.filter(
-            Q(value=f"{request.scheme}://{domain}")
-            | Q(value=f"{request.scheme}://{host}"),
-            key="custom_domain",
-        )
-        if event_settings:
-            events = [s.object for s in event_settings if s.object.is_public]
-            if events:
-                events.sort(key=lambda x: x.date_from, reverse=True)
-                return redirect(events[0].urls.base.full())
-            else:
+        custom_domains = Event.get_custom_domain_table()
+        for custom_domain in (
+            f"{request.scheme}://{domain}".lower(),
+            f"{request.scheme}://{host}".lower(),
+        ):
+            if custom_domain in custom_domains:
+                if custom_domains[custom_domain]:
+                    return redirect(custom_domains[custom_domain])
                 raise Http404()
         raise DisallowedHost(f"Unknown host: {host}")
 
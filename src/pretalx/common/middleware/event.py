@@ -3,6 +3,7 @@
 
 import pytz
 from django.conf import settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, reverse
 from django.urls import resolve
 from django.utils import timezone, translation
@@ -17,6 +18,40 @@
 from pretalx.event.models import Event, Organiser, Team
 
 
+def get_request_url(request):
+    """Resolves the request path, once per request."""
+    if not hasattr(request, "_resolved_url"):
+        request._resolved_url = resolve(request.path_info)
+    return request._resolved_url
+
+
+def get_request_event(request, slug):
+    """Returns the event with the given slug, loading it at most once per
+    request. Large text fields that are only used on single pages are
+    loaded on demand, and related objects are not prefetched.
+
+    :raises Http404: if there is no event with this slug.
+    """
+    event = getattr(request, "event", None)
+    if event and event.slug.lower() == slug.lower():
+        return event
+    queryset = Event.objects.defer("landing_page_text", "featured_sessions_text")
+    with scopes_disabled():
+        event_id = Event.get_id_for_slug(slug)
+        event = (
+            queryset.filter(pk=event_id, slug__iexact=slug).first()
+            if event_id
+            else None
+        )
+        if not event and event_id:
+            # The cached ID is outdated, e.g. because the slug changed
+            Event.clear_slug_cache(slug)
+            event = queryset.filter(slug__iexact=slug).first()
+    if not event:
+        raise Http404()
+    return event
+
+
 class EventPermissionMiddleware:
     UNAUTHENTICATED_ORGA_URLS = (
         "invitation.view",
@@ -43,15 +78,16 @@ def _set_orga_events(request):
                 request.is_orga = True
                 request.is_reviewer = True
             else:
-                request.orga_events = request.user.get_events_for_permission().order_by(
+                events = request.user.get_permission_matrix()["events"]
+                request.orga_events = Event.objects.filter(pk__in=events).order_by(
                     "date_from"
                 )
                 event = getattr(request, "event", None)
                 if event:
-                    request.is_orga = event in request.orga_events
-                    request.is_reviewer = event.teams.filter(
-                        members__in=[request.user], is_reviewer=True
-                    ).exists()
+                    request.is_orga = event.pk in events
+                    request.is_reviewer = "is_reviewer" in events.get(event.pk, {}).get(
+                        "permissions", ()
+                    )
 
     def _handle_orga_url(self, request, url):
         if request.uses_custom_domain:
@@ -74,7 +110,7 @@ def _handle_orga_url(self, request, url):
         return None
 
     def __call__(self, request):
-        url = resolve(request.path_info)
+        url = get_request_url(request)
 
         organiser_slug = url.kwargs.get("organiser")
         if organiser_slug:
@@ -96,11 +132,7 @@ def __call__(self, request):
 
         event_slug = url.kwargs.get("event")
         if event_slug:
-            with scopes_disabled():
-                request.event = get_object_or_404(
-                    Event.objects.prefetch_related("schedules", "submissions"),
-                    slug__iexact=event_slug,
-                )
+            request.event = get_request_event(request, event_slug)
         event = getattr(request, "event", None)
 
         self._set_orga_events(request)
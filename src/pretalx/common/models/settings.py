@@ -40,6 +40,7 @@ def i18n_unserialise(value):
 )  # always, never, pre-schedule
 hierarkey.add_default("show_widget_if_not_public", "False", bool)
 hierarkey.add_default("export_html_on_schedule_release", "False", bool)
+hierarkey.add_default("schedule_release", None, dict)
 hierarkey.add_default("imprint_url", None, str)
 hierarkey.add_default("html_export_url", "", str)
 hierarkey.add_default("custom_domain", "", str)
@@ -105,6 +105,14 @@
             "default": "False",
             "env": os.getenv("PRETALX_MAIL_SSL"),
         },
+        "batch_size": {
+            "default": "50",
+            "env": os.getenv("PRETALX_MAIL_BATCH_SIZE"),
+        },
+        "rate_limit": {
+            "default": "0",
+            "env": os.getenv("PRETALX_MAIL_RATE_LIMIT"),
+        },
     },
     "redis": {
         "location": {
@@ -125,6 +133,10 @@
             "default": "",
             "env": os.getenv("PRETALX_CELERY_BACKEND"),
         },
+        "export_workers": {
+            "default": "1",
+            "env": os.getenv("PRETALX_CELERY_EXPORT_WORKERS"),
+        },
     },
     "logging": {
         "email": {
@@ -1,14 +1,17 @@
 import datetime as dt
 from contextlib import suppress
+from uuid import uuid4
 
 import pytz
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from django.core.mail import get_connection
 from django.core.mail.backends.base import BaseEmailBackend
 from django.core.validators import RegexValidator
 from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.utils.functional import cached_property
 from django.utils.timezone import make_aware, now
 from django.utils.translation import gettext_lazy as _
@@ -23,6 +26,12 @@
 from pretalx.common.utils import daterange, path_with_hash
 
 SLUG_CHARS = "a-zA-Z0-9.-"
+# Maps lower-case event slugs to event IDs, see Event.get_id_for_slug
+EVENT_SLUG_CACHE = {}
+# The version and content of the custom domain routing table, see
+# Event.get_custom_domain_table
+CUSTOM_DOMAIN_TABLE = {}
+CUSTOM_DOMAIN_SETTINGS = ("custom_domain", "html_export_url")
 
 
 def validate_event_slug_permitted(value):
@@ -320,6 +329,7 @@ class orga_urls(EventUrls):
         schedule_export_trigger = "{schedule_export}trigger"
         schedule_export_download = "{schedule_export}download"
         release_schedule = "{schedule}release"
+        release_schedule_status = "{release_schedule}/status"
         reset_schedule = "{schedule}reset"
         toggle_schedule = "{schedule}toggle"
         reviews = "{base}reviews/"
@@ -390,10 +400,98 @@ def cache(self):
     def save(self, *args, **kwargs):
         was_created = not bool(self.pk)
         super().save(*args, **kwargs)
+        self.clear_slug_cache(self.slug)
+        self.clear_custom_domain_table()
 
         if was_created:
+            # Events get their organiser on creation, which changes the
+            # permissions of the organiser's team members.
+            from pretalx.person.models import User
+
+            User.invalidate_permission_matrices(
+                User.objects.filter(teams__organiser_id=self.organiser_id)
+                .values_list("pk", flat=True)
+            )
             self.build_initial_data()
 
+    @staticmethod
+    def get_slug_cache_key(slug) -> str:
+        return f"event_slug_{slug.lower()}"
+
+    @classmethod
+    def get_id_for_slug(cls, slug):
+        """Returns the ID of the event with this slug (case-insensitive), or
+        ``None``. The result is cached in the process and in the shared
+        cache, so callers have to check that the event with this ID still
+        has this slug."""
+        key = cls.get_slug_cache_key(slug)
+        if key in EVENT_SLUG_CACHE:
+            return EVENT_SLUG_CACHE[key]
+        event_id = caches["default"].get(key)
+        if event_id is None:
+            event_id = (
+                cls.objects.filter(slug__iexact=slug)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if event_id is None:
+                return None
+            caches["default"].set(key, event_id, 60 * 60)
+        EVENT_SLUG_CACHE[key] = event_id
+        return event_id
+
+    @classmethod
+    def clear_slug_cache(cls, slug):
+        key = cls.get_slug_cache_key(slug)
+        EVENT_SLUG_CACHE.pop(key, None)
+        caches["default"].delete(key)
+
+    @classmethod
+    def _build_custom_domain_table(cls) -> dict:
+        domains = {}
+        for value, event_id in cls.objects.filter(
+            _settings_objects__key="custom_domain"
+        ).values_list("_settings_objects__value", "pk"):
+            if value:
+                domains.setdefault(value.lower().rstrip("/"), set()).add(event_id)
+        events = list(
+            cls.objects.filter(
+                pk__in=set().union(*domains.values()), is_public=True
+            ).order_by("-date_from")
+        )
+        table = {}
+        for domain, event_ids in domains.items():
+            event = next((event for event in events if event.pk in event_ids), None)
+            table[domain] = event.urls.base.full() if event else None
+        return table
+
+    @classmethod
+    def get_custom_domain_table(cls) -> dict:
+        """Returns a dictionary mapping all custom domains (like
+        ``https://example.org``) to the URL of the most recent public event
+        using them, or to ``None`` if none of their events are public.
+
+        The table is kept in the process and in the shared cache, and is
+        rebuilt after :meth:`clear_custom_domain_table`."""
+        cache = caches["default"]
+        version = cache.get("custom_domain_table_version")
+        if version and CUSTOM_DOMAIN_TABLE.get("version") == version:
+            return CUSTOM_DOMAIN_TABLE["table"]
+        table = cache.get(f"custom_domain_table_{version}") if version else None
+        if table is None:
+            table = cls._build_custom_domain_table()
+            if not version:
+                version = uuid4().hex
+                cache.set("custom_domain_table_version", version, None)
+            cache.set(f"custom_domain_table_{version}", table, 24 * 60 * 60)
+        CUSTOM_DOMAIN_TABLE.update(version=version, table=table)
+        return table
+
+    @staticmethod
+    def clear_custom_domain_table():
+        CUSTOM_DOMAIN_TABLE.clear()
+        caches["default"].set("custom_domain_table_version", uuid4().hex, None)
+
     @property
     def plugin_list(self) -> list:
         """Provides a list of active plugins as strings, and is also an
@@ -467,14 +565,14 @@ def fixed_templates(self) -> list:
 
     def build_initial_data(self):
         from pretalx.mail.default_templates import (
-            ACK_TRACK_TEXT,
-            TRACK_SUBJECT,
             ACCEPT_TEXT,
             ACK_TEXT,
+            ACK_TRACK_TEXT,
             GENERIC_SUBJECT,
             QUESTION_SUBJECT,
             QUESTION_TEXT,
             REJECT_TEXT,
+            TRACK_SUBJECT,
             UPDATE_SUBJECT,
             UPDATE_TEXT,
         )
@@ -934,5 +1032,15 @@ def shred(self):
                     obj.delete()
             else:
                 entry.delete()
+        self.clear_slug_cache(self.slug)
 
     shred.alters_data = True
+
+
+def clear_custom_domain_table(sender, instance, **kwargs):
+    if instance.key in CUSTOM_DOMAIN_SETTINGS:
+        Event.clear_custom_domain_table()
+
+
+post_save.connect(clear_custom_domain_table, sender="event.Event_SettingsStore")
+post_delete.connect(clear_custom_domain_table, sender="event.Event_SettingsStore")
@@ -2,6 +2,8 @@
 
 from django.core.validators import RegexValidator
 from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
 from django.utils.crypto import get_random_string
 from django.utils.functional import cached_property
 from django.utils.translation import get_language
@@ -127,6 +129,46 @@ class orga_urls(EventUrls):
         delete = "{base}delete"
 
 
+@receiver(post_save, sender=Team)
+@receiver(pre_delete, sender=Team)
+def invalidate_team_permission_matrices(sender, instance, **kwargs):
+    User.invalidate_permission_matrices(
+        instance.members.all().values_list("pk", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def invalidate_member_permission_matrices(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = instance.members.all().values_list("pk", flat=True)
+    elif action in ("post_add", "post_remove"):
+        user_ids = pk_set
+    else:
+        return
+    User.invalidate_permission_matrices(user_ids)
+
+
+@receiver(m2m_changed, sender=Team.limit_tracks.through)
+def invalidate_track_permission_matrices(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        if not action.startswith("post_"):
+            return
+        users = instance.members.all()
+    elif action == "pre_clear":
+        users = User.objects.filter(teams__in=instance.team_set.all())
+    elif action in ("post_add", "post_remove"):
+        users = User.objects.filter(teams__in=pk_set)
+    else:
+        return
+    User.invalidate_permission_matrices(users.values_list("pk", flat=True))
+
+
 def generate_invite_token():
     return get_random_string(
         allowed_chars=string.ascii_lowercase + string.digits, length=32
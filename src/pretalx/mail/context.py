@@ -1,3 +1,7 @@
+import re
+import string
+from contextlib import suppress
+
 from django.dispatch import receiver
 from django.template.defaultfilters import date as _date
 from django.utils.timezone import now
@@ -7,31 +11,63 @@
 from pretalx.mail.signals import register_mail_placeholders
 
 
-def get_mail_context(**kwargs):
+def get_mail_placeholders(event) -> dict:
+    """Returns all placeholders registered for the event, by identifier."""
+    result = {}
+    for recv, placeholders in register_mail_placeholders.send(sender=event):
+        if not isinstance(placeholders, (list, tuple)):
+            placeholders = [placeholders]
+        for placeholder in placeholders:
+            result[placeholder.identifier] = placeholder
+    return result
+
+
+def get_used_placeholders(*texts) -> set:
+    """Returns the identifiers of all placeholders used in the given
+    texts. Internationalised texts are checked in all their languages."""
+    result = set()
+    for text in texts:
+        data = getattr(text, "data", text)
+        for value in data.values() if isinstance(data, dict) else [data]:
+            with suppress(ValueError):  # Broken format strings use nothing
+                for __, field_name, __, __ in string.Formatter().parse(
+                    str(value or "")
+                ):
+                    if field_name:
+                        result.add(re.split(r"[.\[]", field_name)[0])
+    return result
+
+
+def get_mail_context(placeholders=None, **kwargs):
+    """Renders the placeholders for the given context objects.
+
+    :param placeholders: Only render these placeholder objects. Defaults
+        to all placeholders registered for the event.
+    """
     event = kwargs["event"]
-    if "submission" in kwargs and "slot" not in kwargs:
+    if placeholders is None:
+        placeholders = get_mail_placeholders(event).values()
+    if (
+        "submission" in kwargs
+        and "slot" not in kwargs
+        and any("slot" in placeholder.required_context for placeholder in placeholders)
+    ):
         slot = kwargs["submission"].slot
         if slot and slot.start and slot.room:
             kwargs["slot"] = kwargs["submission"].slot
     context = {}
-    for recv, placeholders in register_mail_placeholders.send(sender=event):
-        if not isinstance(placeholders, (list, tuple)):
-            placeholders = [placeholders]
-        for placeholder in placeholders:
-            if all(required in kwargs for required in placeholder.required_context):
-                context[placeholder.identifier] = placeholder.render(kwargs)
+    for placeholder in placeholders:
+        if all(required in kwargs for required in placeholder.required_context):
+            context[placeholder.identifier] = placeholder.render(kwargs)
     return context
 
 
 def get_available_placeholders(event, kwargs):
-    params = {}
-    for recv, placeholders in register_mail_placeholders.send(sender=event):
-        if not isinstance(placeholders, (list, tuple)):
-            placeholders = [placeholders]
-        for placeholder in placeholders:
-            if all(required in kwargs for required in placeholder.required_context):
-                params[placeholder.identifier] = placeholder
-    return params
+    return {
+        identifier: placeholder
+        for identifier, placeholder in get_mail_placeholders(event).items()
+        if all(required in kwargs for required in placeholder.required_context)
+    }
 
 
 @receiver(register_mail_placeholders, dispatch_uid="pretalx_register_base_placeholders")
@@ -1,10 +1,8 @@
+from collections import defaultdict
 from copy import deepcopy
 
-import bleach
-import markdown
 from django.conf import settings
-from django.db import models, transaction
-from django.template.loader import get_template
+from django.db import connection, models, transaction
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import override
@@ -13,9 +11,12 @@
 
 from pretalx.common.exceptions import SendMailException
 from pretalx.common.mixins.models import LogMixin
-from pretalx.common.templatetags.rich_text import ALLOWED_TAGS
 from pretalx.common.urls import EventUrls
-from pretalx.mail.context import get_mail_context
+from pretalx.mail.context import (
+    get_mail_context,
+    get_mail_placeholders,
+    get_used_placeholders,
+)
 
 
 class MailTemplate(LogMixin, models.Model):
@@ -71,6 +72,16 @@ def __str__(self):
         """Help with debugging."""
         return f"MailTemplate(event={self.event.slug}, subject={self.subject})"
 
+    def get_placeholders(self) -> list:
+        """Returns the placeholder objects used in this template's subject
+        and text."""
+        used = get_used_placeholders(self.subject, self.text)
+        return [
+            placeholder
+            for identifier, placeholder in get_mail_placeholders(self.event).items()
+            if identifier in used
+        ]
+
     def to_mail(
         self,
         user,
@@ -81,6 +92,7 @@ def to_mail(
         commit: bool = True,
         full_submission_content: bool = False,
         allow_empty_address: bool = False,
+        placeholders: list = None,
     ):
         """Creates a :class:`~pretalx.mail.models.QueuedMail` object from a
         MailTemplate.
@@ -98,6 +110,8 @@ def to_mail(
         :param commit: Set ``False`` to return an unsaved object.
         :param full_submission_content: Attach the complete submission with
             all its fields to the email.
+        :param placeholders: The result of ``get_placeholders``, to avoid
+            looking up placeholders again when rendering many emails.
         """
         from pretalx.person.models import User
 
@@ -122,7 +136,11 @@ def to_mail(
         with override(locale):
             context_kwargs = context_kwargs or dict()
             context_kwargs["event"] = self.event
-            default_context = get_mail_context(**context_kwargs)
+            if placeholders is None:
+                placeholders = self.get_placeholders()
+            default_context = get_mail_context(
+                placeholders=placeholders, **context_kwargs
+            )
             default_context.update(context or {})
             context = default_context
             try:
@@ -240,26 +258,14 @@ def __str__(self):
         return f"OutboxMail(to={self.to}, subject={self.subject}, sent={sent})"
 
     def make_html(self):
-        event = getattr(self, "event", None)
-        sig = None
-        if event:
-            sig = event.settings.mail_signature
-            if sig.strip().startswith("-- "):
-                sig = sig.strip()[3:].strip()
-        body_md = bleach.linkify(
-            bleach.clean(markdown.markdown(self.text), tags=ALLOWED_TAGS),
-            parse_email=True,
+        from pretalx.common.mail import make_mail_html, render_mail_body
+
+        return make_mail_html(
+            render_mail_body(self.text),
+            self.subject,
+            event=getattr(self, "event", None),
+            locale=self.locale,
         )
-        html_context = {
-            "body": body_md,
-            "event": event,
-            "color": (event.primary_color if event else "") or "#3aa57c",
-            "locale": self.locale,
-            "rtl": self.locale in settings.LANGUAGES_RTL,
-            "subject": self.subject,
-            "signature": sig,
-        }
-        return get_template("mail/mailwrapper.html").render(html_context)
 
     def make_text(self):
         event = getattr(self, "event", None)
@@ -279,41 +285,35 @@ def make_subject(self):
             prefix = f"[{prefix}]"
         return f"{prefix} {self.subject}"
 
-    @transaction.atomic
-    def send(self, requestor=None, orga: bool = True):
-        """Sends an email.
+    def make_task_kwargs(self) -> dict:
+        """Returns the keyword arguments for
+        :func:`~pretalx.common.mail.mail_send_task` to send this mail.
 
-        :param requestor: The user issuing the command. Used for logging.
-        :type requestor: :class:`~pretalx.person.models.user.User`
-        :param orga: Was this email sent as by a privileged user?
+        The HTML version of the mail is assembled by the task.
         """
-        if self.sent:
-            raise Exception(
-                _("This mail has been sent already. It cannot be sent again.")
-            )
+        from pretalx.common.mail import render_mail_body
 
         has_event = getattr(self, "event", None)
-        text = self.make_text()
-        body_html = self.make_html()
-
-        from pretalx.common.mail import mail_send_task
-
         to = self.to.split(",") if self.to else []
         if self.id:
             to += [user.email for user in self.to_users.all()]
-        mail_send_task.apply_async(
-            kwargs={
-                "to": to,
-                "subject": self.make_subject(),
-                "body": text,
-                "html": body_html,
-                "reply_to": (self.reply_to or "").split(","),
-                "event": self.event.pk if has_event else None,
-                "cc": (self.cc or "").split(","),
-                "bcc": (self.bcc or "").split(","),
-            }
-        )
+        return {
+            "to": to,
+            "subject": self.make_subject(),
+            "body": self.make_text(),
+            "html": None,
+            "html_context": {
+                "body": render_mail_body(self.text),
+                "subject": self.subject,
+                "locale": self.locale,
+            },
+            "reply_to": (self.reply_to or "").split(","),
+            "event": self.event.pk if has_event else None,
+            "cc": (self.cc or "").split(","),
+            "bcc": (self.bcc or "").split(","),
+        }
 
+    def _mark_sent(self, requestor=None, orga: bool = True):
         self.sent = now()
         if self.pk:
             self.log_action(
@@ -326,8 +326,82 @@ def send(self, requestor=None, orga: bool = True):
             )
             self.save()
 
+    @transaction.atomic
+    def send(self, requestor=None, orga: bool = True):
+        """Sends an email.
+
+        :param requestor: The user issuing the command. Used for logging.
+        :type requestor: :class:`~pretalx.person.models.user.User`
+        :param orga: Was this email sent as by a privileged user?
+        """
+        if self.sent:
+            raise Exception(
+                _("This mail has been sent already. It cannot be sent again.")
+            )
+
+        from pretalx.common.mail import mail_send_task
+
+        mail_send_task.apply_async(kwargs=self.make_task_kwargs())
+        self._mark_sent(requestor=requestor, orga=orga)
+
     send.alters_data = True
 
+    @classmethod
+    def save_many(cls, mails):
+        """Saves the given unsaved mails, and adds the users given in their
+        ``to_users`` lists as recipients, with bulk inserts where the
+        database supports it.
+
+        :param mails: A list of ``(mail, to_users)`` tuples.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            cls.objects.bulk_create([mail for mail, __ in mails])
+        else:
+            for mail, __ in mails:
+                mail.save()
+        through = cls.to_users.through
+        through.objects.bulk_create(
+            [
+                through(queuedmail_id=mail.pk, user_id=user.pk)
+                for mail, users in mails
+                for user in users
+            ]
+        )
+        return [mail for mail, __ in mails]
+
+    @classmethod
+    @transaction.atomic
+    def send_many(cls, mails, requestor=None, orga: bool = True):
+        """Sends all given mails that have not been sent yet.
+
+        Mails are grouped by event and sent in batches of
+        ``settings.MAIL_BATCH_SIZE``, each batch in a single task that
+        reuses one mail server connection. Prefetch ``to_users`` on the
+        mails to avoid additional queries.
+
+        :param requestor: The user issuing the command. Used for logging.
+        :type requestor: :class:`~pretalx.person.models.user.User`
+        :param orga: Were these emails sent by a privileged user?
+        """
+        from pretalx.common.mail import mail_send_batch_task
+
+        mails = [mail for mail in mails if not mail.sent]
+        batches = defaultdict(list)
+        for mail in mails:
+            kwargs = mail.make_task_kwargs()
+            batches[kwargs.pop("event")].append(kwargs)
+        for event, batch in batches.items():
+            for start in range(0, len(batch), settings.MAIL_BATCH_SIZE):
+                mail_send_batch_task.apply_async(
+                    kwargs={
+                        "mails": batch[start : start + settings.MAIL_BATCH_SIZE],
+                        "event": event,
+                    }
+                )
+        for mail in mails:
+            mail._mark_sent(requestor=requestor, orga=orga)
+        return len(mails)
+
     def copy_to_draft(self):
         """Copies an already sent email to a new object and adds it to the
         outbox."""
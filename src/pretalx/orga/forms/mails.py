@@ -269,9 +269,24 @@ def save(self):
         self.instance.is_auto_created = True
         template = super().save()
 
-        submissions = self.get_recipient_submissions()
+        submissions = list(self.get_recipient_submissions())
+        placeholders = template.get_placeholders()
+        if self.event.current_schedule and any(
+            "slot" in placeholder.required_context for placeholder in placeholders
+        ):
+            slots = {}
+            for slot in (
+                self.event.current_schedule.talks.filter(
+                    submission__in=[submission.pk for submission in submissions]
+                )
+                .select_related("room")
+                .order_by("-pk")
+            ):
+                slots[slot.submission_id] = slot
+            for submission in submissions:
+                submission.slot = slots.get(submission.pk)
+
         mails_by_user = defaultdict(list)
-        result = []
         # First, render all emails
         for submission in submissions:
             for speaker in submission.speakers.all():
@@ -284,19 +299,18 @@ def save(self):
                         context_kwargs={"submission": submission, "user": speaker},
                         commit=False,
                         allow_empty_address=True,
+                        placeholders=placeholders,
                     )
                     mails_by_user[speaker].append(mail)
 
+        result = []
         for user, user_mails in mails_by_user.items():
             # Second, deduplicate mails: we don't want speakers to receive the same
             # email twice, just because they have multiple submissions.
             mail_dict = {m.subject + m.text: m for m in user_mails}
             # Now we can create the emails and add the speakers to them
-            for mail in mail_dict.values():
-                mail.save()
-                mail.to_users.add(user)
-                result.append(mail)
-        return result
+            result += [(mail, [user]) for mail in mail_dict.values()]
+        return QueuedMail.save_many(result)
 
     class Meta:
         model = MailTemplate
@@ -5,7 +5,6 @@
 
 from pretalx.person.permissions import (
     can_change_submissions,
-    get_reviewer_teams,
     is_administrator,
     is_reviewer,
 )
@@ -25,20 +24,19 @@ def can_change_event_settings(user, obj):
         return False
     return (
         user.is_administrator
-        or event.teams.filter(
-            members__in=[user], can_change_event_settings=True
-        ).exists()
+        or "can_change_event_settings" in user.get_permissions_for_event(event)
     )
 
 
 @rules.predicate
 def can_change_organiser_settings(user, obj):
+    if user.is_anonymous:
+        return False
     event = getattr(obj, "event", None)
     if event:
         obj = event.organiser
-    return (
-        user.is_administrator
-        or user.teams.filter(organiser=obj, can_change_organiser_settings=True).exists()
+    return user.is_administrator or "can_change_organiser_settings" in (
+        user.get_permission_matrix()["organisers"].get(getattr(obj, "pk", None), ())
     )
 
 
@@ -46,13 +44,18 @@ def can_change_organiser_settings(user, obj):
 def can_change_any_organiser_settings(user, obj):
     return not user.is_anonymous and (
         user.is_administrator
-        or user.teams.filter(can_change_organiser_settings=True).exists()
+        or any(
+            "can_change_organiser_settings" in permissions
+            for permissions in user.get_permission_matrix()["organisers"].values()
+        )
     )
 
 
 @rules.predicate
 def can_create_events(user, obj):
-    return user.is_administrator or user.teams.exists()
+    return not user.is_anonymous and (
+        user.is_administrator or bool(user.get_permission_matrix()["organisers"])
+    )
 
 
 @rules.predicate
@@ -62,13 +65,15 @@ def can_change_teams(user, obj):
     if isinstance(obj, Team):
         obj = obj.organiser
     if isinstance(obj, Organiser):
-        return user.teams.filter(organiser=obj, can_change_teams=True).exists()
+        return not user.is_anonymous and "can_change_teams" in (
+            user.get_permission_matrix()["organisers"].get(obj.pk, ())
+        )
     event = getattr(obj, "event", None)
     if not user or user.is_anonymous or not obj or not event:
         return False
     return (
         user.is_administrator
-        or event.teams.filter(members__in=[user], can_change_teams=True).exists()
+        or "can_change_teams" in user.get_permissions_for_event(event)
     )
 
 
@@ -99,10 +104,8 @@ def is_event_over(user, obj):
 def can_view_speaker_names(user, obj):
     """ONLY in use with users who don't have change permissions."""
     event = obj.event
-    reviewer_teams = get_reviewer_teams(user, event)
-    if reviewer_teams and all(
-        [team.force_hide_speaker_names for team in reviewer_teams]
-    ):
+    entry = user.get_permission_matrix()["events"].get(event.pk)
+    if entry and entry["hide_speaker_names"]:
         return False
     return event.active_review_phase and event.active_review_phase.can_see_speaker_names
 
@@ -629,6 +629,11 @@
                                 schedule.ScheduleReleaseView.as_view(),
                                 name="schedule.release",
                             ),
+                            path(
+                                "schedule/release/status",
+                                schedule.ScheduleReleaseStatusView.as_view(),
+                                name="schedule.release.status",
+                            ),
                             path(
                                 "schedule/quick/<code>/",
                                 schedule.QuickScheduleView.as_view(),
@@ -262,8 +262,11 @@ def form_valid(self, form):
             return self.get(self.request, *self.args, **self.kwargs)
         form.save()
         if self.scores_formset.has_changed():
-            recalculate_all_review_scores.apply_async(
-                kwargs={"event_id": self.request.event.pk}
+            event_id = self.request.event.pk
+            transaction.on_commit(
+                lambda: recalculate_all_review_scores.apply_async(
+                    kwargs={"event_id": event_id}
+                )
             )
         return super().form_valid(form)
 
@@ -325,12 +328,9 @@ def scores_formset(self):
     def save_scores(self):
         if not self.scores_formset.is_valid():
             return False
-        weights_changed = False
         for form in self.scores_formset.initial_forms:
             # Deleting is handled elsewhere, so we skip it here
             if form.has_changed():
-                if "weight" in form.changed_data:
-                    weights_changed = True
                 form.instance.event = self.request.event
                 form.save()
 
@@ -342,9 +342,7 @@ def save_scores(self):
         for form in extra_forms:
             form.instance.event = self.request.event
             form.save()
-
-        if weights_changed:
-            ReviewScoreCategory.recalculate_scores(self.request.event)
+        # Changed weights are applied by recalculate_all_review_scores
         return True
 
 
@@ -359,7 +357,14 @@ def get_object(self):
     def dispatch(self, request, *args, **kwargs):
         super().dispatch(request, *args, **kwargs)
         category = self.get_object()
-        category.delete()
+        event_id = self.request.event.pk
+        with transaction.atomic():
+            category.delete()
+            transaction.on_commit(
+                lambda: recalculate_all_review_scores.apply_async(
+                    kwargs={"event_id": event_id}
+                )
+            )
         return redirect(self.request.event.orga_urls.review_settings)
 
 
@@ -112,10 +112,9 @@ def queryset(self):
         return qs
 
     def post(self, request, *args, **kwargs):
-        qs = self.queryset
-        count = qs.count()
-        for mail in qs:
-            mail.send(requestor=self.request.user)
+        count = QueuedMail.send_many(
+            self.queryset.prefetch_related("to_users"), requestor=self.request.user
+        )
         messages.success(
             request, _("{count} mails have been sent.").format(count=count)
         )
@@ -1,10 +1,9 @@
-import statistics
-from collections import defaultdict
 from contextlib import suppress
 
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models import F, Max, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404, redirect
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
@@ -20,14 +19,20 @@
 from pretalx.orga.forms.review import ReviewForm, TagsForm
 from pretalx.orga.views.submission import ReviewerSubmissionFilter
 from pretalx.submission.forms import QuestionsForm, SubmissionFilterForm
-from pretalx.submission.models import Review, Submission, SubmissionStates
+from pretalx.submission.models import (
+    Review,
+    ReviewAggregate,
+    Submission,
+    SubmissionStates,
+)
+from pretalx.submission.review_queue import ReviewQueue
 
 
 class ReviewDashboard(
     EventPermissionRequired, Filterable, ReviewerSubmissionFilter, ListView
 ):
     template_name = "orga/review/dashboard.html"
-    paginate_by = None
+    paginate_by = 100
     context_object_name = "submissions"
     permission_required = "orga.view_review_dashboard"
     filter_fields = (
@@ -72,10 +77,6 @@ def filter_range(self, queryset):
         return queryset
 
     def get_queryset(self):
-        aggregate_method = self.request.event.settings.review_score_aggregate
-        statistics_method = (
-            statistics.median if aggregate_method == "median" else statistics.fmean
-        )
         queryset = (
             super()
             .get_queryset(for_reviews=True)
@@ -89,65 +90,34 @@ def get_queryset(self):
             )
         )
         queryset = self.filter_queryset(queryset).annotate(
-            review_count=Count("reviews", distinct=True)
+            review_count=Coalesce("review_aggregate__review_count", 0)
         )
         queryset = self.filter_range(queryset)
 
         user_reviews = Review.objects.filter(
             user=self.request.user, submission_id=OuterRef("pk")
         ).values("score")
-
-        queryset = (
-            queryset.annotate(user_score=Subquery(user_reviews))
-            .select_related("track")
-            .prefetch_related("speakers", "reviews", "reviews__user", "reviews__scores")
-        )
-
-        for submission in queryset:
-            if self.can_see_all_reviews:
-                submission.current_score = (
-                    submission.median_score
-                    if aggregate_method == "median"
-                    else submission.mean_score
+        queryset = queryset.annotate(user_score=Subquery(user_reviews))
+        if self.can_see_all_reviews:
+            aggregate_method = self.request.event.settings.review_score_aggregate
+            queryset = queryset.annotate(
+                current_score=F(f"review_aggregate__{aggregate_method}_score")
+            )
+        else:
+            queryset = queryset.annotate(current_score=F("user_score"))
+
+        queryset = queryset.select_related("track", "review_aggregate")
+        queryset = queryset.prefetch_related("speakers")
+        if self.independent_categories and not self.can_see_all_reviews:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "reviews",
+                    queryset=Review.objects.filter(
+                        user=self.request.user
+                    ).prefetch_related("scores"),
+                    to_attr="user_reviews",
                 )
-                if (
-                    self.independent_categories
-                ):  # Assemble medians/means on the fly. Yay.
-                    independent_ids = [cat.pk for cat in self.independent_categories]
-                    mapping = defaultdict(list)
-                    for review in submission.reviews.all():
-                        for score in review.scores.all():
-                            if score.category_id in independent_ids:
-                                mapping[score.category_id].append(score.value)
-                    mapping = {
-                        key: round(statistics_method(value), 1)
-                        for key, value in mapping.items()
-                    }
-                    result = []
-                    for category in self.independent_categories:
-                        result.append(mapping.get(category.pk))
-                    submission.independent_scores = result
-            else:
-                reviews = [
-                    review
-                    for review in submission.reviews.all()
-                    if review.user == self.request.user
-                ]
-                submission.current_score = None
-                if reviews:
-                    review = reviews[0]
-                    submission.current_score = review.score
-                    if self.independent_categories:
-                        mapping = {s.category_id: s.value for s in review.scores.all()}
-                        result = []
-                        for category in self.independent_categories:
-                            result.append(mapping.get(category.pk))
-                        submission.independent_scores = result
-                elif self.independent_categories:
-                    submission.independent_scores = [
-                        None for _ in range(len(self.independent_categories))
-                    ]
-
+            )
         return self.sort_queryset(queryset)
 
     def sort_queryset(self, queryset):
@@ -164,22 +134,35 @@ def sort_queryset(self, queryset):
             ordering = ordering[1:]
 
         order = order_prevalence.get(ordering, order_prevalence["default"])
-
-        def get_order_tuple(obj):
-            result = []
-            for key in order:
-                value = getattr(obj, key)
-                if value is None:
-                    value = 100 * -int(reverse or -1)
-                result.append(value)
-            return tuple(result)
-
-        return sorted(
-            queryset,
-            key=get_order_tuple,
-            reverse=reverse,
+        return queryset.order_by(
+            *[
+                F(key).desc(nulls_last=True) if reverse else F(key).asc(nulls_last=True)
+                for key in order
+            ]
         )
 
+    def add_independent_scores(self, submissions):
+        aggregate_method = self.request.event.settings.review_score_aggregate
+        for submission in submissions:
+            if self.can_see_all_reviews:
+                aggregate = getattr(submission, "review_aggregate", None)
+                submission.independent_scores = [
+                    aggregate.get_category_score(category, aggregate_method)
+                    if aggregate
+                    else None
+                    for category in self.independent_categories
+                ]
+            else:
+                mapping = {}
+                if submission.user_reviews:
+                    mapping = {
+                        score.category_id: score.value
+                        for score in submission.user_reviews[0].scores.all()
+                    }
+                submission.independent_scores = [
+                    mapping.get(category.pk) for category in self.independent_categories
+                ]
+
     @context
     @cached_property
     def can_accept_submissions(self):
@@ -198,8 +181,7 @@ def can_see_all_reviews(self):
     @cached_property
     def max_review_count(self):
         return (
-            self.request.event.submissions.all()
-            .annotate(review_count=Count("reviews", distinct=True))
+            ReviewAggregate.objects.filter(submission__event=self.request.event)
             .aggregate(Max("review_count"))
             .get("review_count__max")
         )
@@ -228,38 +210,45 @@ def show_tracks(self):
 
     def get_context_data(self, **kwargs):
         result = super().get_context_data(**kwargs)
-        missing_reviews = Review.find_missing_reviews(
-            self.request.event, self.request.user
-        )
-        result[
-            "missing_reviews"
-        ] = (
-            missing_reviews.count()
-        )  # Do NOT use len() here! It yields a different result.
-        result["next_submission"] = missing_reviews[0] if missing_reviews else None
+        if self.independent_categories:
+            self.add_independent_scores(result["submissions"])
+        review_queue = ReviewQueue(self.request.event, self.request.user)
+        result["missing_reviews"] = len(review_queue)
+        result["next_submission"] = review_queue.next_submission()
         return result
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         total = {"accept": 0, "reject": 0, "error": 0}
+        decisions = {}
         for key, value in request.POST.items():
             if not key.startswith("s-") or value not in ["accept", "reject"]:
                 continue
-            code = key.strip("s-")
-            try:
-                submission = request.event.submissions.filter(
-                    state=SubmissionStates.SUBMITTED
-                ).get(code=code)
-            except (Submission.DoesNotExist, ValueError):
-                total["error"] += 1
-                continue
-            if not request.user.has_perm(
+            decisions[key.strip("s-")] = value
+        submissions = {
+            submission.code: submission
+            for submission in request.event.submissions.filter(
+                state=SubmissionStates.SUBMITTED, code__in=decisions
+            )
+        }
+        changes = {"accept": [], "reject": []}
+        for code, value in decisions.items():
+            submission = submissions.get(code)
+            if not submission or not request.user.has_perm(
                 "submission." + value + "_submission", submission
             ):
                 total["error"] += 1
                 continue
-            getattr(submission, value)(person=request.user)
-            total[value] += 1
+            changes[value].append(submission)
+        for value, new_state in (
+            ("accept", SubmissionStates.ACCEPTED),
+            ("reject", SubmissionStates.REJECTED),
+        ):
+            total[value] = len(
+                Submission.bulk_set_state(
+                    request.event, changes[value], new_state, person=request.user
+                )
+            )
         if total["accept"] or total["reject"]:
             msg = str(
                 _(
@@ -420,8 +409,7 @@ def get_context_data(self, **kwargs):
             submission__event=self.request.event
         ).count()
         result["total_reviews"] = (
-            Review.find_missing_reviews(self.request.event, self.request.user).count()
-            + result["done"]
+            len(ReviewQueue(self.request.event, self.request.user)) + result["done"]
         )
         if result["total_reviews"]:
             result["percentage"] = int(result["done"] * 100 / result["total_reviews"])
@@ -474,20 +462,13 @@ def get_success_url(self) -> str:
 
         key = f"{self.request.event.slug}_ignored_reviews"
         ignored_submissions = self.request.session.get(key) or []
-        next_submission = Review.find_missing_reviews(
-            self.request.event,
-            self.request.user,
-            ignore=ignored_submissions,
-        ).first()
+        review_queue = ReviewQueue(self.request.event, self.request.user)
+        next_submission = review_queue.next_submission(ignore=ignored_submissions)
         if not next_submission:
             ignored_submissions = (
                 [self.submission.pk] if action == "skip_for_now" else []
             )
-            next_submission = Review.find_missing_reviews(
-                self.request.event,
-                self.request.user,
-                ignore=ignored_submissions,
-            ).first()
+            next_submission = review_queue.next_submission(ignore=ignored_submissions)
         self.request.session[key] = ignored_submissions
         if next_submission:
             return next_submission.orga_urls.reviews
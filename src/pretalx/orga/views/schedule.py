@@ -1,8 +1,10 @@
 import datetime as dt
 import json
+import logging
 from contextlib import suppress
 
 import dateutil.parser
+from celery.backends.base import DisabledBackend
 from csp.decorators import csp_update
 from django.conf import settings
 from django.contrib import messages
@@ -16,10 +18,14 @@
 from django_context_decorator import context
 from i18nfield.strings import LazyI18nString
 from i18nfield.utils import I18nJSONEncoder
+from kombu.exceptions import OperationalError
 
 from pretalx.agenda.management.commands.export_schedule_html import get_export_zip_path
 from pretalx.agenda.tasks import export_schedule_html
 from pretalx.api.serializers.room import AvailabilitySerializer
+from pretalx.celery_app import app
+from pretalx.common.exceptions import ScheduleReleaseError
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.mixins.views import (
     ActionFromUrl,
     EventPermissionRequired,
@@ -30,9 +36,12 @@
 from pretalx.common.views import CreateOrUpdateView
 from pretalx.orga.forms.schedule import ScheduleExportForm, ScheduleReleaseForm
 from pretalx.schedule.forms import QuickScheduleForm, RoomForm
-from pretalx.schedule.models import Availability, Room, TalkSlot
+from pretalx.schedule.models import Room, TalkSlot
+from pretalx.schedule.models.availability import IntervalSet
 from pretalx.schedule.utils import guess_schedule_version
 
+logger = logging.getLogger(__name__)
+
 
 @method_decorator(csp_update(SCRIPT_SRC="'self' 'unsafe-eval'"), name="dispatch")
 class ScheduleView(EventPermissionRequired, TemplateView):
@@ -81,6 +90,7 @@ class ScheduleExportTriggerView(EventPermissionRequired, View):
     permission_required = "orga.view_schedule"
 
     def post(self, request, event):
+        ExporterCache(self.request.event).clear()
         if settings.HAS_CELERY:
             export_schedule_html.apply_async(kwargs={"event_id": self.request.event.id})
             messages.success(
@@ -120,6 +130,33 @@ def get(self, request, event):
         return response
 
 
+RELEASE_RUNNING_STATES = ("PENDING", "STARTED", "PROGRESS", "RETRY")
+
+
+def get_release_status(event) -> dict:
+    """Returns the state of the background task of the latest schedule
+    release, see :meth:`~pretalx.schedule.models.schedule.Schedule.freeze`.
+    The state is None once the task has finished successfully."""
+    release = event.settings.schedule_release
+    if not release:
+        return {"state": None}
+    if release.get("failed"):
+        return {"version": release["version"], "state": "FAILURE", "value": 0}
+    if isinstance(app.backend, DisabledBackend):
+        # Without a result backend, we only know that the task is not done
+        state, info = "PENDING", None
+    else:
+        result = app.AsyncResult(release["task_id"])
+        state, info = result.state, result.info
+    info = info if isinstance(info, dict) else {}
+    return {
+        "version": release["version"],
+        "state": state,
+        "value": 100 if state == "SUCCESS" else info.get("value", 0),
+        "stage": info.get("stage"),
+    }
+
+
 class ScheduleReleaseView(EventPermissionRequired, FormView):
     form_class = ScheduleReleaseForm
     permission_required = "orga.release_schedule"
@@ -133,15 +170,15 @@ def get_form_kwargs(self):
 
     @context
     def warnings(self):
-        return self.request.event.wip_schedule.warnings
+        return self.request.event.wip_schedule.release_preview["warnings"]
 
     @context
     def changes(self):
-        return self.request.event.wip_schedule.changes
+        return self.request.event.wip_schedule.release_preview["changes"]
 
     @context
     def notifications(self):
-        return len(self.request.event.wip_schedule.generate_notifications(save=False))
+        return self.request.event.wip_schedule.release_preview["notifications"]
 
     @context
     def suggested_version(self):
@@ -153,17 +190,56 @@ def form_invalid(self, form):
         )
         return redirect(self.request.event.orga_urls.release_schedule)
 
+    @context
+    def release_status(self):
+        status = get_release_status(self.request.event)
+        if status["state"] in RELEASE_RUNNING_STATES:
+            return status
+
     def form_valid(self, form):
-        self.request.event.release_schedule(
-            form.cleaned_data["version"],
-            user=self.request.user,
-            notify_speakers=form.cleaned_data["notify_speakers"],
-            comment=form.cleaned_data["comment"],
-        )
+        try:
+            self.request.event.release_schedule(
+                form.cleaned_data["version"],
+                user=self.request.user,
+                notify_speakers=form.cleaned_data["notify_speakers"],
+                comment=form.cleaned_data["comment"],
+            )
+        except ScheduleReleaseError as e:
+            messages.error(
+                self.request,
+                _("Could not release the schedule. ({error})").format(error=str(e)),
+            )
+            return redirect(self.request.event.orga_urls.schedule)
+        except OperationalError:
+            # The release has been committed, but the task finishing it could
+            # not be queued.
+            logger.exception("Could not start the schedule release task")
+            messages.warning(
+                self.request,
+                _(
+                    "Your schedule has been released, but the speaker notifications, "
+                    "widget data and exports could not be generated. Please contact "
+                    "your administrator."
+                ),
+            )
+            return redirect(self.request.event.orga_urls.schedule)
         messages.success(self.request, _("Nice, your schedule has been released!"))
+        if settings.HAS_CELERY:
+            # Show the progress of the background tasks
+            return redirect(self.request.event.orga_urls.release_schedule)
         return redirect(self.request.event.orga_urls.schedule)
 
 
+class ScheduleReleaseStatusView(EventPermissionRequired, View):
+    """Reports the progress of the background tasks of the latest schedule
+    release, for the release page to poll."""
+
+    permission_required = "orga.release_schedule"
+
+    def get(self, request, event):
+        return JsonResponse(get_release_status(self.request.event))
+
+
 class ScheduleResetView(EventPermissionRequired, View):
     permission_required = "orga.edit_schedule"
 
@@ -412,14 +488,14 @@ def get(self, request, event, talkid, roomid):
         room = request.event.rooms.filter(pk=roomid).first()
         if not (talk and room):
             return JsonResponse({"results": []})
-        if talk.submission and talk.submission.availabilities:
-            availabilitysets = [
-                room.availabilities.all(),
-                talk.submission.availabilities,
-            ]
-            availabilities = Availability.intersection(*availabilitysets)
-        else:
-            availabilities = room.availabilities.all()
+        availabilities = room.availabilities.all()
+        if talk.submission:
+            speaker_availabilities = talk.submission.availabilities
+            if speaker_availabilities:
+                availabilities = (
+                    IntervalSet.from_availabilities(availabilities)
+                    & IntervalSet.from_availabilities(speaker_availabilities)
+                ).to_availabilities()
         return JsonResponse(
             {"results": AvailabilitySerializer(availabilities, many=True).data}
         )
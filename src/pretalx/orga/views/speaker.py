@@ -11,6 +11,7 @@
 from django_context_decorator import context
 
 from pretalx.common.exceptions import SendMailException
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.mixins.views import (
     ActionFromUrl,
     EventPermissionRequired,
@@ -179,6 +180,7 @@ def form_valid(self, form):
             )
         if form.has_changed() or self.questions_form.has_changed():
             self.request.event.cache.set("rebuild_schedule_export", True, None)
+            ExporterCache(self.request.event).clear()
         messages.success(self.request, "The speaker profile has been updated.")
         return result
 
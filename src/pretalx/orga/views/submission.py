@@ -23,6 +23,7 @@
 from django.views.generic import DetailView, ListView, TemplateView, UpdateView, View
 
 from pretalx.common.exceptions import SubmissionError
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.mixins.views import (
     ActionFromUrl,
     EventPermissionRequired,
@@ -468,6 +469,7 @@ def form_valid(self, form):
             action = "pretalx.submission." + ("create" if created else "update")
             form.instance.log_action(action, person=self.request.user, orga=True)
             self.request.event.cache.set("rebuild_schedule_export", True, None)
+            ExporterCache(self.request.event).clear()
         return redirect(self.get_success_url())
 
     def get_form_kwargs(self):
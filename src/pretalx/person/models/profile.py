@@ -54,6 +54,13 @@ def __str__(self):
         user = self.user.get_display_name() if self.user else None
         return f"SpeakerProfile(event={self.event.slug}, user={user})"
 
+    def save(self, *args, **kwargs):
+        from pretalx.agenda.talk_context import TalkContext
+
+        result = super().save(*args, **kwargs)
+        TalkContext.invalidate(self.event)
+        return result
+
     @cached_property
     def code(self):
         return self.user.code
@@ -2,6 +2,7 @@
 import random
 from hashlib import md5
 from urllib.parse import urljoin
+from uuid import uuid4
 
 import pytz
 from django.conf import settings
@@ -11,6 +12,7 @@
     PermissionsMixin,
 )
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db import models, transaction
 from django.db.models import Q
 from django.utils.crypto import get_random_string
@@ -25,6 +27,20 @@
 from pretalx.common.urls import build_absolute_uri
 from pretalx.common.utils import path_with_hash
 
+PERMISSION_NAMES = (
+    "can_change_teams",
+    "can_change_organiser_settings",
+    "can_change_event_settings",
+    "can_change_submissions",
+    "is_reviewer",
+)
+PERMISSION_MATRIX_VERSION_KEY = "permission_matrix_version"
+# Fallback for caches that do not persist anything, see
+# User.get_permission_matrix_version
+LOCAL_PERMISSION_MATRIX_VERSIONS = {}
+# User fields shown on public pages and in exports
+PUBLIC_FIELDS = {"name", "email", "avatar", "get_gravatar"}
+
 
 def avatar_path(instance, filename):
     return f"avatars/{path_with_hash(filename)}"
@@ -140,7 +156,20 @@ def get_display_name(self) -> str:
 
     def save(self, *args, **kwargs):
         self.email = self.email.lower().strip()
-        return super().save(*args, **kwargs)
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        result = super().save(*args, **kwargs)
+        if not adding and (
+            update_fields is None or set(update_fields) & PUBLIC_FIELDS
+        ):
+            from pretalx.agenda.talk_context import TalkContext
+            from pretalx.common.exporter import ExporterCache
+            from pretalx.event.models import Event
+
+            for event in Event.objects.filter(submissions__speakers=self).distinct():
+                TalkContext.invalidate(event)
+                ExporterCache(event).clear()
+        return result
 
     def event_profile(self, event):
         """Retrieve (and/or create) the event.
@@ -323,23 +352,125 @@ def get_events_for_permission(self, **kwargs):
             models.Q(organiser__in=orga_teams.values_list("organiser", flat=True))
         ).distinct()
 
+    @staticmethod
+    def get_permission_matrix_version(user_id) -> str:
+        key = f"{PERMISSION_MATRIX_VERSION_KEY}_{user_id}"
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid4().hex, None)
+            version = cache.get(key)
+        if version is None:
+            # The cache does not keep anything (e.g. the dummy cache), so we
+            # can only notice the changes made in this process.
+            version = LOCAL_PERMISSION_MATRIX_VERSIONS.get(user_id, "")
+        return version
+
+    @staticmethod
+    def invalidate_permission_matrices(user_ids):
+        """Marks the cached permission matrices of the given users as
+        outdated. Called whenever their teams, their team memberships or
+        their teams' track limits change."""
+        versions = {user_id: uuid4().hex for user_id in set(user_ids)}
+        LOCAL_PERMISSION_MATRIX_VERSIONS.update(versions)
+        cache.set_many(
+            {
+                f"{PERMISSION_MATRIX_VERSION_KEY}_{user_id}": version
+                for user_id, version in versions.items()
+            },
+            None,
+        )
+
+    def _build_permission_matrix(self) -> dict:
+        from pretalx.event.models import Team
+
+        teams = {}
+        rows = Team.objects.filter(members=self).values_list(
+            "pk",
+            "organiser_id",
+            "organiser__event",
+            "force_hide_speaker_names",
+            "limit_tracks",
+            *PERMISSION_NAMES,
+        )
+        for pk, organiser, event, hide_names, track, *permissions in rows:
+            team = teams.setdefault(
+                pk,
+                {
+                    "organiser": organiser,
+                    "event": event,
+                    "hide_speaker_names": hide_names,
+                    "permissions": {
+                        name
+                        for name, value in zip(PERMISSION_NAMES, permissions)
+                        if value
+                    },
+                    "tracks": set(),
+                },
+            )
+            if track:
+                team["tracks"].add(track)
+
+        organisers = {}
+        events = {}
+        for team in teams.values():
+            organisers.setdefault(team["organiser"], set()).update(
+                team["permissions"]
+            )
+            if not team["event"]:
+                continue
+            entry = events.setdefault(
+                team["event"],
+                {
+                    "permissions": set(),
+                    "reviewer_tracks": set(),
+                    "hide_speaker_names": True,
+                },
+            )
+            entry["permissions"].update(team["permissions"])
+            if "is_reviewer" in team["permissions"]:
+                entry["hide_speaker_names"] &= team["hide_speaker_names"]
+                if not team["tracks"]:
+                    entry["reviewer_tracks"] = None
+                elif entry["reviewer_tracks"] is not None:
+                    entry["reviewer_tracks"].update(team["tracks"])
+        for entry in events.values():
+            if "is_reviewer" not in entry["permissions"]:
+                entry["hide_speaker_names"] = False
+        return {"organisers": organisers, "events": events}
+
+    def get_permission_matrix(self) -> dict:
+        """Returns the permissions this user has through their teams, as a
+        dictionary with the keys ``organisers`` (mapping organiser IDs to
+        permission sets) and ``events`` (mapping event IDs to dictionaries
+        with the ``permissions`` set, the ``reviewer_tracks`` this user may
+        review, or ``None`` for all tracks, and ``hide_speaker_names``).
+
+        The matrix is computed in one query and kept in the shared cache
+        (and on this user object) until :meth:`invalidate_permission_matrices`
+        is called for this user.
+        Administrators have all permissions regardless of this matrix.
+        """
+        version = self.get_permission_matrix_version(self.pk)
+        cached = getattr(self, "_permission_matrix", None)
+        if cached and cached[0] == version:
+            return cached[1]
+        key = f"permission_matrix_{self.pk}_{version}"
+        matrix = cache.get(key)
+        if matrix is None:
+            matrix = self._build_permission_matrix()
+            cache.set(key, matrix, 24 * 60 * 60)
+        self._permission_matrix = (version, matrix)
+        return matrix
+
     def get_permissions_for_event(self, event) -> set:
         """Returns a set of all permission a user has for the given event.
 
         :type event: :class:`~pretalx.event.models.event.Event`
         """
         if self.is_administrator:
-            return {
-                "can_change_teams",
-                "can_change_organiser_settings",
-                "can_change_event_settings",
-                "can_change_submissions",
-                "is_reviewer",
-            }
-        teams = event.teams.filter(members__in=[self])
-        if not teams:
-            return set()
-        return set().union(*[team.permission_set for team in teams])
+            return set(PERMISSION_NAMES)
+        entry = self.get_permission_matrix()["events"].get(event.pk)
+        return set(entry["permissions"]) if entry else set()
 
     def regenerate_token(self) -> Token:
         """Generates a new API access token, deleting the old one."""
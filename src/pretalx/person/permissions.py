@@ -10,7 +10,7 @@ def can_change_submissions(user, obj):
         return False
     return (
         user.is_administrator
-        or event.teams.filter(members__in=[user], can_change_submissions=True).exists()
+        or "can_change_submissions" in user.get_permissions_for_event(event)
     )
 
 
@@ -25,16 +25,12 @@ def can_change_tracks(user, obj):
     )
 
 
-def get_reviewer_teams(user, event):
-    return event.teams.filter(members__in=[user], is_reviewer=True)
-
-
 @rules.predicate
 def is_reviewer(user, obj):
     event = getattr(obj, "event", None)
     if not user or user.is_anonymous or not obj or not event:
         return False
-    return get_reviewer_teams(user, event).exists()
+    return "is_reviewer" in user.get_permissions_for_event(event)
 
 
 @rules.predicate
@@ -0,0 +1,189 @@
+import bisect
+from collections import defaultdict
+
+from django.utils.translation import gettext_lazy as _
+
+from pretalx.person.models import SpeakerProfile
+from pretalx.schedule.models.availability import Availability, IntervalSet
+
+
+class IntervalIndex:
+    """A sorted list of ``(start, end, key)`` intervals, answering overlap
+    queries with a binary search instead of a full scan."""
+
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals)
+        self._starts = None
+        self._max_ends = None
+
+    def add(self, start, end, key=None):
+        bisect.insort(self.intervals, (start, end, key))
+        self._starts = self._max_ends = None
+
+    def remove(self, key):
+        self.intervals = [interval for interval in self.intervals if interval[2] != key]
+        self._starts = self._max_ends = None
+
+    def _build(self):
+        self._starts = [interval[0] for interval in self.intervals]
+        self._max_ends = []
+        for interval in self.intervals:
+            self._max_ends.append(
+                max(interval[1], self._max_ends[-1]) if self._max_ends else interval[1]
+            )
+
+    def overlapping(self, start, end):
+        """Returns the keys of all intervals overlapping the given range.
+        Adjacent intervals do not count as overlapping."""
+        if self._starts is None:
+            self._build()
+        # Only intervals starting before the end of the range can overlap …
+        index = bisect.bisect_left(self._starts, end) - 1
+        # … and we can stop looking once no earlier interval reaches far enough.
+        while index >= 0 and self._max_ends[index] > start:
+            if self.intervals[index][1] > start:
+                yield self.intervals[index][2]
+            index -= 1
+
+
+class ScheduleConflicts:
+    """Finds room availability, speaker availability and speaker overlap
+    warnings for the talks in a
+    :class:`~pretalx.schedule.models.schedule.Schedule`.
+
+    All slots, speakers and availabilities are loaded once, so checking
+    the whole schedule takes a constant number of queries. Use
+    :meth:`update` to reflect a moved slot without reloading everything.
+
+    :param with_speakers: Check speaker availabilities, too. Defaults to
+        the ``cfp_request_availabilities`` event setting.
+    :param talk: Only load the data needed to check this slot: the slots
+        of its speakers, and the availabilities of its room and speakers.
+    """
+
+    def __init__(self, schedule, with_speakers=None, talk=None):
+        self.schedule = schedule
+        self.event = schedule.event
+        if with_speakers is None:
+            with_speakers = self.event.settings.cfp_request_availabilities
+        self.with_speakers = with_speakers
+
+        slots = schedule.talks.filter(submission__isnull=False, start__isnull=False)
+        rooms = self.event.rooms.all()
+        profiles = SpeakerProfile.objects.filter(event=self.event)
+        if talk:
+            speaker_ids = [speaker.pk for speaker in talk.submission.speakers.all()]
+            slots = slots.filter(submission__speakers__in=speaker_ids).distinct()
+            rooms = rooms.filter(pk=talk.room_id)
+            profiles = profiles.filter(user_id__in=speaker_ids)
+
+        self.slots = {}
+        self.slot_speakers = {}
+        self.speaker_slots = defaultdict(IntervalIndex)
+        for slot in slots.select_related("submission", "room").prefetch_related(
+            "submission__speakers"
+        ):
+            slot.submission.event = self.event
+            self.update(slot)
+
+        rooms = list(rooms.prefetch_related("availabilities"))
+        if talk:
+            self.use_room_availabilities = Availability.objects.filter(
+                event=self.event, room__isnull=False
+            ).exists()
+        else:
+            self.use_room_availabilities = any(
+                room.availabilities.all() for room in rooms
+            )
+        self.room_availabilities = {
+            room.pk: IntervalSet.from_availabilities(room.availabilities.all())
+            for room in rooms
+        }
+        self.speaker_availabilities = {}
+        if with_speakers:
+            for profile in profiles.prefetch_related("availabilities"):
+                if profile.availabilities.all():
+                    self.speaker_availabilities[
+                        profile.user_id
+                    ] = IntervalSet.from_availabilities(profile.availabilities.all())
+
+    def update(self, slot):
+        """Adds the given slot to the index, or moves it to its current
+        position and speakers."""
+        for speaker_id in self.slot_speakers.pop(slot.pk, []):
+            self.speaker_slots[speaker_id].remove(slot.pk)
+        self.slots.pop(slot.pk, None)
+        if not slot.start or not slot.submission:
+            return
+        self.slots[slot.pk] = slot
+        self.slot_speakers[slot.pk] = [
+            speaker.pk for speaker in slot.submission.speakers.all()
+        ]
+        for speaker_id in self.slot_speakers[slot.pk]:
+            self.speaker_slots[speaker_id].add(slot.start, slot.real_end, slot.pk)
+
+    def get_warnings(self, talk) -> list:
+        """A list of warnings that apply to this slot.
+
+        Warnings are dictionaries with a ``type`` (``room`` or
+        ``speaker``, for now) and a ``message`` fit for public display.
+        """
+        if not talk.start or not talk.submission:
+            return []
+        warnings = []
+        start, end = talk.start, talk.real_end
+        if talk.room_id and self.use_room_availabilities:
+            availabilities = self.room_availabilities.get(talk.room_id)
+            if not availabilities or not availabilities.contains(start, end):
+                warnings.append(
+                    {
+                        "type": "room",
+                        "message": _(
+                            "The room is not available at the scheduled time."
+                        ),
+                    }
+                )
+        for speaker in talk.submission.speakers.all():
+            if self.with_speakers:
+                availabilities = self.speaker_availabilities.get(speaker.pk)
+                if availabilities and not availabilities.contains(start, end):
+                    warnings.append(
+                        {
+                            "type": "speaker",
+                            "speaker": {
+                                "name": speaker.get_display_name(),
+                                "id": speaker.pk,
+                            },
+                            "message": _(
+                                "A speaker is not available at the scheduled time."
+                            ),
+                        }
+                    )
+            if any(
+                key != talk.pk
+                for key in self.speaker_slots[speaker.pk].overlapping(start, end)
+            ):
+                warnings.append(
+                    {
+                        "type": "speaker",
+                        "speaker": {
+                            "name": speaker.get_display_name(),
+                            "id": speaker.pk,
+                        },
+                        "message": _(
+                            "A speaker is holding another session at the scheduled time."
+                        ),
+                    }
+                )
+        return warnings
+
+    def get_all_warnings(self, talks=None) -> dict:
+        """Returns a dictionary of all talks with warnings, mapped to their
+        lists of warnings."""
+        talks = self.slots.values() if talks is None else talks
+        result = {}
+        for talk in talks:
+            warnings = self.get_warnings(talk)
+            if warnings:
+                result[talk] = warnings
+        return result
@@ -1,16 +1,26 @@
 import datetime as dt
+import itertools
 import json
+from collections import defaultdict
 from urllib.parse import urlparse
 
 import pytz
 import vobject
+from django.db import models
+from django.db.models import prefetch_related_objects
 from django.template.loader import get_template
 from django.utils.functional import cached_property
 from i18nfield.utils import I18nJSONEncoder
+from vobject.icalendar import TimezoneComponent
 
 from pretalx import __version__
-from pretalx.common.exporter import BaseExporter
+from pretalx.common.exporter import BaseExporter, ExporterCache
 from pretalx.common.urls import get_base_url
+from pretalx.person.models import SpeakerProfile
+from pretalx.schedule.models import TalkSlot
+from pretalx.submission.models import Answer
+
+ICAL_END = "END:VCALENDAR\r\n"
 
 
 class ScheduleData(BaseExporter):
@@ -27,23 +37,19 @@ def metadata(self):
         return {"base_url": self.event.urls.schedule.full()}
 
     @cached_property
-    def data(self):
+    def talks(self):
+        """All slots of this schedule, loaded with their submissions, rooms
+        and speakers in a fixed number of queries."""
         if not self.schedule:
             return []
-
-        event = self.event
-        schedule = self.schedule
-        tz = pytz.timezone(event.timezone)
-
         base_qs = (
-            schedule.talks.all()
+            self.schedule.talks.all()
             if self.with_accepted
-            else schedule.talks.filter(is_visible=True)
+            else self.schedule.talks.filter(is_visible=True)
         )
-        talks = (
+        talks = list(
             base_qs.select_related(
                 "submission",
-                "submission__event",
                 "submission__track",
                 "room",
             )
@@ -51,6 +57,93 @@ def data(self):
             .order_by("start")
             .exclude(submission__state="deleted")
         )
+        for talk in talks:
+            # Share one event object, so that its settings are only loaded once
+            if talk.submission:
+                talk.submission.event = self.event
+        if self.event.settings.present_multiple_times:
+            # Fill in TalkSlot.id_suffix for all slots at once, instead of
+            # running one query per slot.
+            slot_ids = defaultdict(list)
+            for pk, submission_id in (
+                TalkSlot.objects.filter(
+                    schedule=self.schedule, submission__isnull=False
+                )
+                .order_by("pk")
+                .values_list("pk", "submission_id")
+            ):
+                slot_ids[submission_id].append(pk)
+            for talk in talks:
+                siblings = slot_ids.get(talk.submission_id, [])
+                talk.id_suffix = (
+                    "-" + str(siblings.index(talk.pk)) if len(siblings) > 1 else ""
+                )
+        return talks
+
+    @cached_property
+    def speakers(self):
+        """All speakers of the scheduled talks, indexed by id."""
+        return {
+            speaker.pk: speaker
+            for talk in self.talks
+            if talk.submission
+            for speaker in talk.submission.speakers.all()
+        }
+
+    @cached_property
+    def speaker_profiles(self):
+        """The event profiles of all speakers, indexed by user id."""
+        if not self.speakers:
+            return {}
+        return {
+            profile.user_id: profile
+            for profile in SpeakerProfile.objects.filter(
+                event=self.event, user_id__in=self.speakers.keys()
+            )
+        }
+
+    @cached_property
+    def _answers(self):
+        submission_ids = {talk.submission_id for talk in self.talks if talk.submission}
+        submission_answers = defaultdict(list)
+        speaker_answers = defaultdict(list)
+        if not submission_ids:
+            return submission_answers, speaker_answers
+        answers = (
+            Answer.objects.filter(question__event=self.event)
+            .filter(
+                models.Q(submission_id__in=submission_ids)
+                | models.Q(person_id__in=self.speakers.keys())
+            )
+            .prefetch_related("options")
+            .order_by("pk")
+        )
+        for answer in answers:
+            if answer.submission_id in submission_ids:
+                submission_answers[answer.submission_id].append(answer)
+            if answer.person_id in self.speakers:
+                speaker_answers[answer.person_id].append(answer)
+        return submission_answers, speaker_answers
+
+    @property
+    def submission_answers(self):
+        """All answers to submission questions, indexed by submission id."""
+        return self._answers[0]
+
+    @property
+    def speaker_answers(self):
+        """All answers given by the speakers in this event, indexed by user
+        id."""
+        return self._answers[1]
+
+    @cached_property
+    def data(self):
+        if not self.schedule:
+            return []
+
+        event = self.event
+        tz = pytz.timezone(event.timezone)
+
         data = {
             current_date.date(): {
                 "index": index + 1,
@@ -67,7 +160,7 @@ def data(self):
             )
         }
 
-        for talk in talks:
+        for talk in self.talks:
             if (
                 not talk.start
                 or not talk.room
@@ -111,8 +204,21 @@ class FrabXmlExporter(ScheduleData):
     show_qrcode = True
     icon = "fa-code"
     cors = "*"
+    cacheable = True
+    streaming = True
 
     def render(self, **kwargs):
+        file_name, file_type, chunks = self.render_stream(**kwargs)
+        return file_name, file_type, "".join(chunks)
+
+    def render_stream(self, **kwargs):
+        return (
+            f"{self.event.slug}-schedule.xml",
+            "text/xml",
+            self._render_chunks(),
+        )
+
+    def _render_chunks(self):
         context = {
             "data": self.data,
             "metadata": self.metadata,
@@ -121,8 +227,25 @@ def render(self, **kwargs):
             "version": __version__,
             "base_url": get_base_url(self.event),
         }
-        content = get_template("agenda/schedule.xml").render(context=context)
-        return f"{self.event.slug}-schedule.xml", "text/xml", content
+        yield get_template("agenda/schedule_xml/header.xml").render(context=context)
+        day_template = get_template("agenda/schedule_xml/day.xml")
+        room_template = get_template("agenda/schedule_xml/room.xml")
+        event_template = get_template("agenda/schedule_xml/event.xml")
+        for day in self.data:
+            yield day_template.render(context={"day": day})
+            for room in day["rooms"]:
+                yield room_template.render(context={"room": room})
+                for talk in room["talks"]:
+                    yield event_template.render(
+                        context={
+                            "talk": talk,
+                            "room": room,
+                            "base_url": context["base_url"],
+                        }
+                    )
+                yield "        </room>\n"
+            yield "    </day>\n"
+        yield "</schedule>\n"
 
 
 class FrabXCalExporter(ScheduleData):
@@ -131,6 +254,7 @@ class FrabXCalExporter(ScheduleData):
     public = True
     icon = "fa-calendar"
     cors = "*"
+    cacheable = True
 
     def render(self, **kwargs):
         url = get_base_url(self.event)
@@ -145,10 +269,23 @@ class FrabJsonExporter(ScheduleData):
     public = True
     icon = "{ }"
     cors = "*"
+    cacheable = True
+
+    @staticmethod
+    def serialize_answers(answers):
+        return [
+            {
+                "question": answer.question_id,
+                "answer": answer.answer,
+                "options": [option.answer for option in answer.options.all()],
+            }
+            for answer in answers
+        ]
 
     def get_data(self, **kwargs):
         tz = pytz.timezone(self.event.timezone)
         schedule = self.schedule
+        is_orga = getattr(self, "is_orga", False)
         return {
             "version": schedule.version,
             "base_url": self.metadata["base_url"],
@@ -195,42 +332,24 @@ def get_data(self, **kwargs):
                                             "code": person.code,
                                             "public_name": person.get_display_name(),
                                             "biography": getattr(
-                                                person.profiles.filter(
-                                                    event=self.event
-                                                ).first(),
+                                                self.speaker_profiles.get(person.id),
                                                 "biography",
                                                 "",
                                             ),
-                                            "answers": [
-                                                {
-                                                    "question": answer.question.id,
-                                                    "answer": answer.answer,
-                                                    "options": [
-                                                        option.answer
-                                                        for option in answer.options.all()
-                                                    ],
-                                                }
-                                                for answer in person.answers.all()
-                                            ]
-                                            if getattr(self, "is_orga", False)
+                                            "answers": self.serialize_answers(
+                                                self.speaker_answers[person.id]
+                                            )
+                                            if is_orga
                                             else [],
                                         }
                                         for person in talk.submission.speakers.all()
                                     ],
                                     "links": [],
                                     "attachments": [],
-                                    "answers": [
-                                        {
-                                            "question": answer.question.id,
-                                            "answer": answer.answer,
-                                            "options": [
-                                                option.answer
-                                                for option in answer.options.all()
-                                            ],
-                                        }
-                                        for answer in talk.submission.answers.all()
-                                    ]
-                                    if getattr(self, "is_orga", False)
+                                    "answers": self.serialize_answers(
+                                        self.submission_answers[talk.submission.id]
+                                    )
+                                    if is_orga
                                     else [],
                                 }
                                 for talk in room["talks"]
@@ -259,24 +378,139 @@ class ICalExporter(BaseExporter):
     show_qrcode = True
     icon = "fa-calendar"
     cors = "*"
+    cacheable = True
+    streaming = True
 
     def __init__(self, event, schedule=None):
         super().__init__(event)
         self.schedule = schedule
 
     def render(self, **kwargs):
+        file_name, file_type, chunks = self.render_stream(**kwargs)
+        return file_name, file_type, "".join(chunks)
+
+    def render_stream(self, **kwargs):
+        return f"{self.event.slug}.ics", "text/calendar", self._render_chunks()
+
+    def _render_chunks(self, chunk_size=200):
         netloc = urlparse(get_base_url(self.event)).netloc
-        cal = vobject.iCalendar()
-        cal.add("prodid").value = "-//pretalx//{}//".format(netloc)
         creation_time = dt.datetime.now(pytz.utc)
+        tz = pytz.timezone(self.event.timezone)
 
+        header = vobject.iCalendar()
+        header.add("prodid").value = "-//pretalx//{}//".format(netloc)
+        if TimezoneComponent.pickTzid(tz):
+            header.add(TimezoneComponent(tz))
+        yield header.serialize()[: -len(ICAL_END)]
+
+        # Iterate over a server-side cursor, and serialize events in chunks,
+        # instead of building the whole calendar in memory.
         talks = (
             self.schedule.talks.filter(is_visible=True)
-            .prefetch_related("submission__speakers")
             .select_related("submission", "room", "submission__event")
             .order_by("start")
+            .iterator(chunk_size=chunk_size)
         )
-        for talk in talks:
-            talk.build_ical(cal, creation_time=creation_time, netloc=netloc)
+        while True:
+            chunk = list(itertools.islice(talks, chunk_size))
+            if not chunk:
+                break
+            prefetch_related_objects(chunk, "submission__speakers")
+            cal = vobject.iCalendar()
+            for talk in chunk:
+                talk.build_ical(cal, creation_time=creation_time, netloc=netloc)
+            yield "".join(
+                vevent.serialize() for vevent in cal.contents.get("vevent", [])
+            )
+        yield ICAL_END
+
+
+def get_widget_data(schedule) -> dict:
+    """Returns the data for the v2 schedule widget, loading talks with their
+    rooms, tracks and speakers in a fixed number of queries."""
+    event = schedule.event
+    if schedule.version:
+        talks = schedule.talks.filter(is_visible=True)
+    else:
+        talks = schedule.talks.filter(
+            models.Q(submission__state="confirmed") | models.Q(submission__isnull=True),
+            start__isnull=False,
+            room__isnull=False,
+        )
+    talks = (
+        talks.select_related("submission", "room", "submission__track")
+        .prefetch_related("submission__speakers")
+        .order_by("start")
+    )
+    room_ids = set()
+    tracks = {}
+    speakers = {}
+    result = {
+        "talks": [],
+        "version": schedule.version,
+        "timezone": event.timezone,
+    }
+    for talk in talks:
+        room_ids.add(talk.room_id)
+        if talk.submission:
+            talk.submission.event = event
+            if talk.submission.track:
+                tracks.setdefault(talk.submission.track_id, talk.submission.track)
+            talk_speakers = talk.submission.speakers.all()
+            for speaker in talk_speakers:
+                speakers.setdefault(speaker.pk, speaker)
+            result["talks"].append(
+                {
+                    "code": talk.submission.code,
+                    "title": talk.submission.title,
+                    "abstract": talk.submission.abstract,
+                    "speakers": [speaker.code for speaker in talk_speakers],
+                    "track": talk.submission.track_id,
+                    "start": talk.start.astimezone(event.tz),
+                    "end": talk.real_end.astimezone(event.tz),
+                    "room": talk.room_id,
+                }
+            )
+        else:
+            result["talks"].append(
+                {
+                    "title": talk.description,
+                    "start": talk.start,
+                    "end": talk.real_end,
+                    "room": talk.room_id,
+                }
+            )
+
+    result["tracks"] = [
+        {"id": track.id, "name": track.name} for track in tracks.values()
+    ]
+    result["rooms"] = [
+        {"id": room.id, "name": room.name}
+        for room in event.rooms.all()
+        if room.id in room_ids
+    ]
+    result["speakers"] = [
+        {
+            "code": user.code,
+            "name": user.name,
+            "avatar": user.get_avatar_url(),
+        }
+        for user in speakers.values()
+    ]
+    return result
+
+
+WIDGET_DATA_KEY = "widget_data"
+
+
+def store_widget_data(schedule) -> tuple:
+    """Renders the widget data of the current schedule and stores it in the
+    :class:`~pretalx.common.exporter.ExporterCache`, where it is kept like
+    the other exports until the cache is cleared, for example when a track,
+    a room, the event or a speaker changes.
 
-        return f"{self.event.slug}.ics", "text/calendar", cal.serialize()
+    Returns a tuple of file name, file type, gzipped content and ETag."""
+    content = json.dumps(get_widget_data(schedule), cls=I18nJSONEncoder)
+    return ExporterCache(schedule.event).set(
+        WIDGET_DATA_KEY, "widget.v2.json", "application/json", content
+    )
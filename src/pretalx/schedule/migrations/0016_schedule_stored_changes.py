@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0015_auto_20211024_1251'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='stored_changes',
+            field=models.TextField(null=True),
+        ),
+    ]
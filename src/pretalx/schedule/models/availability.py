@@ -1,5 +1,7 @@
+import bisect
 import datetime as dt
-from typing import List
+from array import array
+from typing import Iterable, Iterator, List, Tuple
 
 from django.db import models
 from django.utils.functional import cached_property
@@ -8,6 +10,165 @@
 from pretalx.common.mixins.models import LogMixin
 
 zerotime = dt.time(0, 0)
+EPOCH = dt.datetime(1970, 1, 1)
+AWARE_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+MICROSECOND = dt.timedelta(microseconds=1)
+
+
+def overlaps(start, end, other_start, other_end) -> bool:
+    """Test if two ranges overlap, not counting direct adjacency, like
+    :meth:`Availability.overlaps` with ``strict=True``."""
+    return (
+        (start <= other_start < end)
+        or (start < other_end <= end)
+        or (other_start <= start < other_end)
+        or (other_start < end <= other_end)
+    )
+
+
+class IntervalSet:
+    """A set of time ranges, stored as sorted arrays of integer start and end
+    times, in microseconds since the epoch.
+
+    The ranges are always sorted and merged, so that no two ranges overlap
+    or touch. This makes union, intersection, difference and containment
+    checks simple linear sweeps or binary searches. Use this class for
+    availability calculations, and convert to
+    :class:`~pretalx.schedule.models.availability.Availability` objects only
+    when you need them.
+    """
+
+    __slots__ = ("starts", "ends", "tzinfo", "naive")
+
+    def __init__(
+        self, ranges: Iterable[Tuple[int, int]] = (), tzinfo=None, naive=False
+    ):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.tzinfo = tzinfo
+        self.naive = naive
+        for start, end in sorted(ranges):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Tuple[dt.datetime, dt.datetime]]):
+        """Build an IntervalSet from ``(start, end)`` datetime tuples."""
+        ranges = list(ranges)
+        if not ranges:
+            return cls()
+        first = ranges[0][0]
+        naive = first.tzinfo is None
+        epoch = EPOCH if naive else AWARE_EPOCH
+        return cls(
+            (
+                ((start - epoch) // MICROSECOND, (end - epoch) // MICROSECOND)
+                for start, end in ranges
+            ),
+            tzinfo=first.tzinfo,
+            naive=naive,
+        )
+
+    @classmethod
+    def from_availabilities(cls, availabilities: Iterable["Availability"]):
+        return cls.from_ranges(
+            (availability.start, availability.end) for availability in availabilities
+        )
+
+    def _to_datetime(self, value: int) -> dt.datetime:
+        if self.naive:
+            return EPOCH + value * MICROSECOND
+        return (AWARE_EPOCH + value * MICROSECOND).astimezone(self.tzinfo)
+
+    def _to_int(self, value: dt.datetime) -> int:
+        return (value - (EPOCH if self.naive else AWARE_EPOCH)) // MICROSECOND
+
+    def _new(self, ranges, other=None) -> "IntervalSet":
+        other = other if other is not None and not self else self
+        return IntervalSet(ranges, tzinfo=other.tzinfo, naive=other.naive)
+
+    def __iter__(self) -> Iterator[Tuple[dt.datetime, dt.datetime]]:
+        for start, end in zip(self.starts, self.ends):
+            yield self._to_datetime(start), self._to_datetime(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, IntervalSet)
+            and self.starts == other.starts
+            and self.ends == other.ends
+        )
+
+    def to_availabilities(self, **kwargs) -> List["Availability"]:
+        """Return one unsaved Availability object per range. Keyword
+        arguments are passed on to each Availability."""
+        return [Availability(start=start, end=end, **kwargs) for start, end in self]
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        """Return the ranges covered by this or the other set."""
+        return self._new(
+            zip(
+                list(self.starts) + list(other.starts),
+                list(self.ends) + list(other.ends),
+            ),
+            other,
+        )
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        """Return the ranges covered by both this and the other set. Ranges
+        that only touch do not intersect."""
+        result = []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            if overlaps(self.starts[i], self.ends[i], other.starts[j], other.ends[j]):
+                result.append(
+                    (
+                        max(self.starts[i], other.starts[j]),
+                        min(self.ends[i], other.ends[j]),
+                    )
+                )
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return self._new(result, other)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        """Return the ranges covered by this set, but not by the other."""
+        result = []
+        j = 0
+        for start, end in zip(self.starts, self.ends):
+            while j < len(other.starts) and other.ends[j] <= start:
+                j += 1
+            k = j
+            while k < len(other.starts) and other.starts[k] < end:
+                if other.starts[k] > start:
+                    result.append((start, other.starts[k]))
+                start = max(start, other.ends[k])
+                k += 1
+            if start < end:
+                result.append((start, end))
+        return self._new(result)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def contains(self, start: dt.datetime, end: dt.datetime) -> bool:
+        """Test if a single range of this set covers the given time span."""
+        if not self:
+            return False
+        start, end = self._to_int(start), self._to_int(end)
+        index = bisect.bisect_right(self.starts, start) - 1
+        return index >= 0 and self.ends[index] >= end
 
 
 class Availability(LogMixin, models.Model):
@@ -151,39 +312,7 @@ def __and__(self, other: "Availability") -> "Availability":
     def union(cls, availabilities: List["Availability"]) -> List["Availability"]:
         """Return the minimal list of Availability objects which are covered by
         at least one given Availability."""
-        if not availabilities:
-            return []
-
-        availabilities = sorted(availabilities, key=lambda a: a.start)
-        result = [availabilities[0]]
-        availabilities = availabilities[1:]
-
-        for avail in availabilities:
-            if avail.overlaps(result[-1], False):
-                result[-1] = result[-1].merge_with(avail)
-            else:
-                result.append(avail)
-
-        return result
-
-    @classmethod
-    def _pair_intersection(
-        cls,
-        availabilities_a: List["Availability"],
-        availabilities_b: List["Availability"],
-    ) -> List["Availability"]:
-        """return the list of Availabilities, which are covered by each of the
-        given sets."""
-        result = []
-
-        # yay for O(b*a) time! I am sure there is some fancy trick to make this faster,
-        # but we're dealing with less than 100 items in total, sooo.. ¯\_(ツ)_/¯
-        for a in availabilities_a:
-            for b in availabilities_b:
-                if a.overlaps(b, True):
-                    result.append(a.intersect_with(b))
-
-        return result
+        return IntervalSet.from_availabilities(availabilities).to_availabilities()
 
     @classmethod
     def intersection(
@@ -191,17 +320,9 @@ def intersection(
     ) -> List["Availability"]:
         """Return the list of Availabilities which are covered by all of the
         given sets."""
-
-        # get rid of any overlaps and unmerged ranges in each set
-        availabilitysets = [cls.union(avialset) for avialset in availabilitysets]
-        # bail out for obvious cases (there are no sets given, one of the sets is empty)
         if not availabilitysets:
             return []
-        if not all(availabilitysets):
-            return []
-        # start with the very first set ...
-        result = availabilitysets[0]
+        result = IntervalSet.from_availabilities(availabilitysets[0])
         for availset in availabilitysets[1:]:
-            # ... subtract each of the other sets
-            result = cls._pair_intersection(result, availset)
-        return result
+            result &= IntervalSet.from_availabilities(availset)
+        return result.to_availabilities()
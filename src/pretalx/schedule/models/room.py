@@ -3,6 +3,7 @@
 from django_scopes import ScopedManager
 from i18nfield.fields import I18nCharField
 
+from pretalx.agenda.talk_context import TalkContext
 from pretalx.common.mixins.models import LogMixin
 from pretalx.common.urls import EventUrls
 
@@ -62,3 +63,13 @@ class urls(EventUrls):
 
     def __str__(self) -> str:
         return str(self.name)
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        TalkContext.invalidate(self.event)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        TalkContext.invalidate(self.event)
+        return result
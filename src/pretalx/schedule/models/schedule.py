@@ -1,9 +1,13 @@
-from collections import defaultdict, namedtuple
+import hashlib
+import json
+from collections import defaultdict
 from contextlib import suppress
 from urllib.parse import quote
 
 import pytz
+from celery.utils import uuid
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models, transaction
 from django.template.loader import get_template
 from django.utils.functional import cached_property
@@ -14,11 +18,11 @@
 from django_scopes import ScopedManager
 from i18nfield.fields import I18nTextField
 
-from pretalx.agenda.tasks import export_schedule_html
+from pretalx.agenda.tasks import export_schedule_html, render_schedule_exports
+from pretalx.common.exceptions import ScheduleReleaseError
 from pretalx.common.mixins.models import LogMixin
 from pretalx.common.phrases import phrases
 from pretalx.common.urls import EventUrls
-from pretalx.person.models import SpeakerProfile, User
 from pretalx.schedule.signals import schedule_release
 from pretalx.submission.models import SubmissionStates
 
@@ -46,6 +50,7 @@ class Schedule(LogMixin, models.Model):
         + " "
         + phrases.base.use_markdown,
     )
+    stored_changes = models.TextField(null=True, blank=True)
 
     objects = ScopedManager(event="event")
 
@@ -64,6 +69,12 @@ def freeze(
     ):
         """Releases the current WIP schedule as a fixed schedule version.
 
+        Only the version change and the new WIP schedule are created right
+        away, and the :data:`~pretalx.schedule.signals.schedule_release`
+        signal is sent. Speaker notifications, widget data and exports are
+        generated by :meth:`finish_release` – in a background task once the
+        release has been committed, if celery is available.
+
         :param name: The new schedule name. May not be in use in this event,
             and cannot be 'wip' or 'latest'.
         :param user: The :class:`~pretalx.person.models.user.User` initiating
@@ -74,20 +85,26 @@ def freeze(
         :rtype: Schedule
         """
         from pretalx.schedule.models import TalkSlot
+        from pretalx.schedule.tasks import task_finish_schedule_release
 
         if name in ["wip", "latest"]:
-            raise Exception(f'Cannot use reserved name "{name}" for schedule version.')
+            raise ScheduleReleaseError(f'Cannot use reserved name "{name}" for schedule version.')
         if self.version:
-            raise Exception(
+            raise ScheduleReleaseError(
                 f'Cannot freeze schedule version: already versioned as "{self.version}".'
             )
         if not name:
-            raise Exception("Cannot create schedule version without a version name.")
+            raise ScheduleReleaseError("Cannot create schedule version without a version name.")
 
         self.version = name
         self.comment = comment
         self.published = now()
-        self.save(update_fields=["published", "version", "comment"])
+        # Only one of several concurrent releases of the same WIP schedule
+        # may win, so we check and set the version in one query.
+        if not Schedule.objects.filter(pk=self.pk, version__isnull=True).update(
+            version=self.version, comment=self.comment, published=self.published
+        ):
+            raise ScheduleReleaseError("Cannot freeze schedule version: already released.")
         self.log_action("pretalx.schedule.release", person=user, orga=True)
 
         wip_schedule = Schedule.objects.create(event=self.event)
@@ -105,9 +122,6 @@ def freeze(
             talks.append(talk.copy_to_schedule(wip_schedule, save=False))
         TalkSlot.objects.bulk_create(talks)
 
-        if notify_speakers:
-            self.generate_notifications(save=True)
-
         with suppress(AttributeError):
             del wip_schedule.event.wip_schedule
         with suppress(AttributeError):
@@ -115,14 +129,90 @@ def freeze(
 
         schedule_release.send_robust(self.event, schedule=self, user=user)
 
+        if settings.HAS_CELERY:
+            task_id = uuid()
+            # Kept in the settings, as a release may take longer than cache
+            # entries live.
+            self.event.settings.set(
+                "schedule_release", {"task_id": task_id, "version": self.version}
+            )
+            kwargs = {
+                "schedule_id": self.pk,
+                "user_id": user.pk if user else None,
+                "notify_speakers": notify_speakers,
+            }
+            transaction.on_commit(
+                lambda: task_finish_schedule_release.apply_async(
+                    kwargs=kwargs, task_id=task_id
+                )
+            )
+        else:
+            self.finish_release(user=user, notify_speakers=notify_speakers)
+        return self, wip_schedule
+
+    freeze.alters_data = True
+
+    RELEASE_STAGES = (
+        "changes",
+        "widget",
+        "talks",
+        "notifications",
+        "exports",
+    )
+
+    def finish_release(self, user=None, notify_speakers: bool = True, progress=None):
+        """Runs the slower parts of a schedule release after :meth:`freeze`:
+        It stores the changes to the previous version, the widget data and
+        the talk page data, and starts the generation of speaker
+        notifications and the schedule exports, which run in their own
+        background tasks if celery is available.
+
+        :param progress: Optional callable, receiving the percentage of
+            completed stages and the name of the current stage.
+        """
+        from pretalx.agenda.talk_context import TalkContext
+        from pretalx.schedule.exporters import store_widget_data
+        from pretalx.schedule.tasks import task_generate_schedule_notifications
+
+        def set_progress(stage):
+            if progress:
+                index = self.RELEASE_STAGES.index(stage)
+                progress(index * 100 // len(self.RELEASE_STAGES), stage)
+
+        # Compare to the previous release now that visibility is final, and
+        # store the result with this version.
+        set_progress("changes")
+        for attr in ("changes", "changes_data"):
+            with suppress(AttributeError):
+                delattr(self, attr)
+        self.changes_data
+
+        set_progress("widget")
+        store_widget_data(self)
+
+        set_progress("talks")
+        TalkContext(self.event, self).store()
+
+        set_progress("notifications")
+        if notify_speakers:
+            if settings.HAS_CELERY:
+                task_generate_schedule_notifications.apply_async(
+                    kwargs={"schedule_id": self.pk}
+                )
+            else:
+                self.generate_notifications(save=True)
+
+        set_progress("exports")
+        if settings.HAS_CELERY:
+            render_schedule_exports.apply_async(kwargs={"event_id": self.event.id})
+
         if self.event.settings.export_html_on_schedule_release:
             if settings.HAS_CELERY:
                 export_schedule_html.apply_async(kwargs={"event_id": self.event.id})
             else:
                 self.event.cache.set("rebuild_schedule_export", True, None)
-        return self, wip_schedule
 
-    freeze.alters_data = True
+    finish_release.alters_data = True
 
     @transaction.atomic
     def unfreeze(self, user=None):
@@ -199,38 +289,101 @@ def previous_schedule(self):
             queryset = queryset.filter(published__lt=self.published)
         return queryset.order_by("-published").first()
 
-    def _handle_submission_move(self, submission, old_slots, new_slots):
-        new = []
-        canceled = []
-        moved = []
-        all_old_slots = [
-            slot for slot in old_slots if slot.submission_id == submission.pk
-        ]
-        all_new_slots = [
-            slot for slot in new_slots if slot.submission_id == submission.pk
-        ]
+    @cached_property
+    def tz(self):
+        return pytz.timezone(self.event.timezone)
+
+    @staticmethod
+    def _diff_submission_slots(old_slots, new_slots):
+        """Compares the slots of one submission in two schedules, and returns
+        the lists of new and canceled slots, plus a list of moved ``(old,
+        new)`` slot pairs.
+
+        Slots that have the same room and start time in both schedules
+        are ignored.
+        """
+        old_keys = {(slot.room_id, slot.start) for slot in old_slots}
+        new_keys = {(slot.room_id, slot.start) for slot in new_slots}
         old_slots = [
-            slot
-            for slot in all_old_slots
-            if not any(slot.is_same_slot(other_slot) for other_slot in all_new_slots)
+            slot for slot in old_slots if (slot.room_id, slot.start) not in new_keys
         ]
         new_slots = [
-            slot
-            for slot in all_new_slots
-            if not any(slot.is_same_slot(other_slot) for other_slot in all_old_slots)
+            slot for slot in new_slots if (slot.room_id, slot.start) not in old_keys
         ]
+        new = []
+        canceled = []
         diff = len(old_slots) - len(new_slots)
         if diff > 0:
             canceled = old_slots[:diff]
             old_slots = old_slots[diff:]
         elif diff < 0:
-            diff = -diff
-            new = new_slots[:diff]
-            new_slots = new_slots[diff:]
-        for move in zip(old_slots, new_slots):
-            old_slot = move[0]
-            new_slot = move[1]
-            moved.append(
+            new = new_slots[:-diff]
+            new_slots = new_slots[-diff:]
+        return new, canceled, list(zip(old_slots, new_slots))
+
+    def _compute_changes_data(self) -> dict:
+        """Compares this schedule to the previous version, and returns the
+        result as a serializable dictionary of slot IDs.
+
+        Slots are grouped by submission once, so this runs in linear
+        time.
+        """
+        if not self.previous_schedule:
+            return {"action": "create"}
+
+        old_by_submission = defaultdict(list)
+        new_by_submission = defaultdict(list)
+        for slot in self.previous_schedule.scheduled_talks.order_by("start", "pk"):
+            old_by_submission[slot.submission_id].append(slot)
+        for slot in self.scheduled_talks.order_by("start", "pk"):
+            new_by_submission[slot.submission_id].append(slot)
+
+        result = {
+            "action": "update",
+            "new_talks": [],
+            "canceled_talks": [],
+            "moved_talks": [],
+        }
+        submission_ids = list(new_by_submission) + [
+            submission_id
+            for submission_id in old_by_submission
+            if submission_id not in new_by_submission
+        ]
+        for submission_id in submission_ids:
+            new, canceled, moved = self._diff_submission_slots(
+                old_by_submission.get(submission_id, []),
+                new_by_submission.get(submission_id, []),
+            )
+            result["new_talks"] += [slot.pk for slot in new]
+            result["canceled_talks"] += [slot.pk for slot in canceled]
+            result["moved_talks"] += [
+                [old_slot.pk, new_slot.pk] for old_slot, new_slot in moved
+            ]
+        return result
+
+    def _build_changes(self, data: dict, slots: dict) -> dict:
+        """Turns the result of ``_compute_changes_data`` into the
+        ``changes`` dictionary, using ``slots``, a dictionary of
+        :class:`~pretalx.schedule.models.slot.TalkSlot` objects by ID."""
+        result = {
+            "count": 0,
+            "action": data["action"],
+            "new_talks": [],
+            "canceled_talks": [],
+            "moved_talks": [],
+        }
+        if data["action"] == "create":
+            return result
+        result["new_talks"] = [slots[pk] for pk in data["new_talks"] if pk in slots]
+        result["canceled_talks"] = [
+            slots[pk] for pk in data["canceled_talks"] if pk in slots
+        ]
+        for old_pk, new_pk in data["moved_talks"]:
+            old_slot = slots.get(old_pk)
+            new_slot = slots.get(new_pk)
+            if not old_slot or not new_slot:
+                continue
+            result["moved_talks"].append(
                 {
                     "submission": new_slot.submission,
                     "old_start": old_slot.start.astimezone(self.tz),
@@ -240,11 +393,59 @@ def _handle_submission_move(self, submission, old_slots, new_slots):
                     "new_info": new_slot.room.speaker_info,
                 }
             )
-        return new, canceled, moved
+        result["count"] = (
+            len(result["new_talks"])
+            + len(result["canceled_talks"])
+            + len(result["moved_talks"])
+        )
+        return result
 
     @cached_property
-    def tz(self):
-        return pytz.timezone(self.event.timezone)
+    def changes_data(self) -> dict:
+        """The changes compared to the previous version, as a dictionary of
+        slot IDs.
+
+        Released schedules don't change anymore, so their changes are
+        computed once and stored in the database.
+        """
+        if self.version and self.stored_changes:
+            with suppress(ValueError):
+                return json.loads(self.stored_changes)
+        data = self._compute_changes_data()
+        if self.version:
+            self.stored_changes = json.dumps(data)
+            Schedule.objects.filter(pk=self.pk).update(
+                stored_changes=self.stored_changes
+            )
+        return data
+
+    @staticmethod
+    def prefetch_changes(schedules):
+        """Populates the ``changes`` of all given schedules, loading the
+        involved slots in a single query."""
+        from pretalx.schedule.models import TalkSlot
+
+        schedules = list(schedules)
+        slot_ids = set()
+        for schedule in schedules:
+            data = schedule.changes_data
+            if data["action"] == "create":
+                continue
+            slot_ids.update(data["new_talks"])
+            slot_ids.update(data["canceled_talks"])
+            for pair in data["moved_talks"]:
+                slot_ids.update(pair)
+        slots = {}
+        if slot_ids:
+            slots = (
+                TalkSlot.objects.filter(pk__in=slot_ids)
+                .select_related("submission", "submission__event", "room")
+                .prefetch_related("submission__speakers")
+                .in_bulk()
+            )
+        for schedule in schedules:
+            schedule.changes = schedule._build_changes(schedule.changes_data, slots)
+        return schedules
 
     @cached_property
     def changes(self) -> dict:
@@ -255,73 +456,8 @@ def changes(self) -> dict:
         an update, the ``count`` integer, and the ``new_talks``,
         ``canceled_talks`` and ``moved_talks`` lists are also present.
         """
-        result = {
-            "count": 0,
-            "action": "update",
-            "new_talks": [],
-            "canceled_talks": [],
-            "moved_talks": [],
-        }
-        if not self.previous_schedule:
-            result["action"] = "create"
-            return result
-
-        old_slots = list(self.previous_schedule.scheduled_talks)
-        new_slots = list(self.scheduled_talks)
-
-        Slot = namedtuple("Slot", ["submission", "room", "start"])
-        old_slot_set = set(
-            Slot(slot.submission, slot.room, slot.start) for slot in old_slots
-        )
-        new_slot_set = set(
-            Slot(slot.submission, slot.room, slot.start) for slot in new_slots
-        )
-        old_submissions = set(slot.submission for slot in old_slots)
-        new_submissions = set(slot.submission for slot in new_slots)
-        handled_submissions = set()
-        new_by_submission = defaultdict(list)
-        old_by_submission = defaultdict(list)
-        for slot in new_slot_set:
-            new_by_submission[slot.submission].append(slot)
-        for slot in old_slot_set:
-            old_by_submission[slot.submission].append(slot)
-
-        moved_or_missing = old_slot_set - new_slot_set - {None}
-        moved_or_new = new_slot_set - old_slot_set - {None}
-
-        for entry in moved_or_missing:
-            if entry.submission in handled_submissions or not entry.submission:
-                continue
-            if entry.submission not in new_submissions:
-                result["canceled_talks"] += old_by_submission[entry.submission]
-            else:
-                new, canceled, moved = self._handle_submission_move(
-                    entry.submission, old_slots, new_slots
-                )
-                result["new_talks"] += new
-                result["canceled_talks"] += canceled
-                result["moved_talks"] += moved
-            handled_submissions.add(entry.submission)
-        for entry in moved_or_new:
-            if entry.submission in handled_submissions:
-                continue
-            if entry.submission not in old_submissions:
-                result["new_talks"] += new_by_submission[entry.submission]
-            else:
-                new, canceled, moved = self._handle_submission_move(
-                    entry.submission, old_slots, new_slots
-                )
-                result["new_talks"] += new
-                result["canceled_talks"] += canceled
-                result["moved_talks"] += moved
-            handled_submissions.add(entry.submission)
-
-        result["count"] = (
-            len(result["new_talks"])
-            + len(result["canceled_talks"])
-            + len(result["moved_talks"])
-        )
-        return result
+        self.prefetch_changes([self])
+        return self.changes
 
     @cached_property
     def use_room_availabilities(self):
@@ -330,126 +466,25 @@ def use_room_availabilities(self):
             for room in self.event.rooms.all().prefetch_related("availabilities")
         )
 
-    def get_talk_warnings(
-        self,
-        talk,
-        with_speakers=True,
-        room_avails=None,
-        speaker_avails=None,
-    ) -> list:
+    def get_talk_warnings(self, talk, with_speakers=True) -> list:
         """A list of warnings that apply to this slot.
 
         Warnings are dictionaries with a ``type`` (``room`` or
         ``speaker``, for now) and a ``message`` fit for public display.
         This property only shows availability based warnings.
         """
-        from pretalx.schedule.models import Availability, TalkSlot
+        from pretalx.schedule.conflicts import ScheduleConflicts
 
         if not talk.start or not talk.submission:
             return []
-        warnings = []
-        availability = talk.as_availability
-        if talk.room and self.use_room_availabilities:
-            if room_avails is None:
-                room_avails = talk.room.availabilities.all()
-            if not any(
-                room_availability.contains(availability)
-                for room_availability in Availability.union(room_avails)
-            ):
-                warnings.append(
-                    {
-                        "type": "room",
-                        "message": _(
-                            "The room is not available at the scheduled time."
-                        ),
-                    }
-                )
-        for speaker in talk.submission.speakers.all():
-            if with_speakers:
-                profile = speaker.event_profile(event=self.event)
-                if speaker_avails is not None:
-                    profile_availabilities = speaker_avails.get(profile.pk)
-                else:
-                    profile_availabilities = list(profile.availabilities.all())
-                if profile_availabilities and not any(
-                    speaker_availability.contains(availability)
-                    for speaker_availability in Availability.union(
-                        profile_availabilities
-                    )
-                ):
-                    warnings.append(
-                        {
-                            "type": "speaker",
-                            "speaker": {
-                                "name": speaker.get_display_name(),
-                                "id": speaker.pk,
-                            },
-                            "message": _(
-                                "A speaker is not available at the scheduled time."
-                            ),
-                        }
-                    )
-            overlaps = (
-                TalkSlot.objects.filter(
-                    schedule=self, submission__speakers__in=[speaker]
-                )
-                .filter(
-                    models.Q(start__lt=talk.start, end__gt=talk.start)
-                    | models.Q(start__lt=talk.real_end, end__gt=talk.real_end)
-                    | models.Q(start__gt=talk.start, end__lt=talk.real_end)
-                )
-                .exists()
-            )
-            if overlaps:
-                warnings.append(
-                    {
-                        "type": "speaker",
-                        "speaker": {
-                            "name": speaker.get_display_name(),
-                            "id": speaker.pk,
-                        },
-                        "message": _(
-                            "A speaker is holding another session at the scheduled time."
-                        ),
-                    }
-                )
-
-        return warnings
+        conflicts = ScheduleConflicts(self, with_speakers=with_speakers, talk=talk)
+        conflicts.update(talk)
+        return conflicts.get_warnings(talk)
 
     def get_all_talk_warnings(self, talks=None):
-        talks = talks or self.talks.filter(submission__isnull=False).select_related(
-            "submission", "room"
-        ).prefetch_related("submission__speakers")
-        result = {}
-        with_speakers = self.event.settings.cfp_request_availabilities
-        room_avails = defaultdict(
-            list,
-            {
-                room.pk: room.availabilities.all()
-                for room in self.event.rooms.all().prefetch_related("availabilities")
-            },
-        )
-        speaker_avails = None
-        if with_speakers:
-            speaker_avails = defaultdict(
-                list,
-                {
-                    profile.pk: profile.availabilities.all()
-                    for profile in SpeakerProfile.objects.filter(
-                        event=self.event
-                    ).prefetch_related("availabilities")
-                },
-            )
-        for talk in talks:
-            talk_warnings = self.get_talk_warnings(
-                talk=talk,
-                with_speakers=with_speakers,
-                room_avails=room_avails.get(talk.room_id) if talk.room_id else None,
-                speaker_avails=speaker_avails,
-            )
-            if talk_warnings:
-                result[talk] = talk_warnings
-        return result
+        from pretalx.schedule.conflicts import ScheduleConflicts
+
+        return ScheduleConflicts(self).get_all_warnings(talks)
 
     @cached_property
     def warnings(self) -> dict:
@@ -469,9 +504,7 @@ def warnings(self) -> dict:
         warnings = {
             "talk_warnings": [
                 {"talk": key, "warnings": value}
-                for key, value in self.get_all_talk_warnings(
-                    talks.filter(start__isnull=False)
-                ).items()
+                for key, value in self.get_all_talk_warnings().items()
             ],
             "unscheduled": talks.filter(start__isnull=True).count(),
             "unconfirmed": talks.exclude(
@@ -495,14 +528,16 @@ def speakers_concerned(self):
         """
         if self.changes["action"] == "create":
             result = {}
-            for speaker in User.objects.filter(submissions__slots__schedule=self):
-                talks = self.talks.filter(
-                    submission__speakers=speaker,
-                    room__isnull=False,
-                    start__isnull=False,
+            for talk in (
+                self.talks.filter(
+                    submission__isnull=False, room__isnull=False, start__isnull=False
                 )
-                if talks:
-                    result[speaker] = {"create": talks, "update": []}
+                .select_related("submission", "room")
+                .prefetch_related("submission__speakers")
+            ):
+                for speaker in talk.submission.speakers.all():
+                    result.setdefault(speaker, {"create": [], "update": []})
+                    result[speaker]["create"].append(talk)
             return result
 
         if self.changes["count"] == len(self.changes["canceled_talks"]):
@@ -517,10 +552,61 @@ def speakers_concerned(self):
                 speakers[speaker]["update"].append(moved_talk)
         return speakers
 
+    @property
+    def release_fingerprint(self) -> str:
+        """A hash of all slots in this schedule, their speakers and their
+        proposals' states and tracks, which changes with every slot edit."""
+        previous = self.previous_schedule
+        data = list(
+            self.talks.order_by("pk", "submission__speakers").values_list(
+                "pk",
+                "submission_id",
+                "room_id",
+                "start",
+                "end",
+                "submission__state",
+                "submission__track_id",
+                "submission__speakers",
+            )
+        )
+        content = json.dumps(
+            [previous.pk if previous else None, data], cls=DjangoJSONEncoder
+        )
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    @cached_property
+    def release_preview(self) -> dict:
+        """The ``warnings``, ``changes`` and number of ``notifications`` to be
+        shown before releasing this schedule.
+
+        The preview is cached as long as no slot changes, for at most five
+        minutes, as other changes (like availabilities) can affect the
+        warnings, too. The notification count is taken from
+        :meth:`speakers_concerned`, without rendering any emails.
+        """
+        key = f"release_preview_{self.pk}_{self.release_fingerprint}"
+        preview = self.event.cache.get(key)
+        if preview is None:
+            preview = {
+                "warnings": self.warnings,
+                "changes": self.changes,
+                "notifications": len(self.speakers_concerned),
+            }
+            self.event.cache.set(key, preview, 5 * 60)
+        else:
+            self.warnings = preview["warnings"]
+            self.changes = preview["changes"]
+        return preview
+
     def generate_notifications(self, save=False):
         """A list of unsaved :class:`~pretalx.mail.models.QueuedMail` objects
         to be sent on schedule release."""
+        from pretalx.mail.models import QueuedMail
+
         mails = []
+        template = self.event.update_template
+        placeholders = template.get_placeholders()
+        notification_template = get_template("schedule/speaker_notification.txt")
         for speaker in self.speakers_concerned:
             locale = (
                 speaker.locale
@@ -528,19 +614,23 @@ def generate_notifications(self, save=False):
                 else self.event.locale
             )
             with override(locale), tzoverride(self.tz):
-                notifications = get_template(
-                    "schedule/speaker_notification.txt"
-                ).render({"speaker": speaker, **self.speakers_concerned[speaker]})
-            mails.append(
-                self.event.update_template.to_mail(
-                    user=speaker,
-                    context_kwargs={"user": speaker},
-                    context={"notifications": notifications},
-                    commit=save,
-                    locale=locale,
+                notifications = notification_template.render(
+                    {"speaker": speaker, **self.speakers_concerned[speaker]}
                 )
+            mail = template.to_mail(
+                # Saved mails get the speaker added to their to_users in bulk
+                user=None if save else speaker,
+                context_kwargs={"user": speaker},
+                context={"notifications": notifications},
+                commit=False,
+                locale=locale,
+                allow_empty_address=True,
+                placeholders=placeholders,
             )
-        return mails
+            mails.append((mail, [speaker]))
+        if save:
+            return QueuedMail.save_many(mails)
+        return [mail for mail, __ in mails]
 
     generate_notifications.alters_data = True
 
@@ -9,6 +9,10 @@
 the change (if any).
 Any exceptions raised will be ignored.
 
+The signal is sent during the release, within its database transaction.
+Speaker notifications, widget data and exports are generated afterwards, in a
+background task if celery is available.
+
 As with all plugin signals, the ``sender`` keyword argument will contain the event.
 Additionally, you will receive the keyword arguments ``schedule``
 and ``user`` (which may be ``None``).
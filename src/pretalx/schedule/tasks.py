@@ -0,0 +1,67 @@
+import logging
+
+from django_scopes import scope, scopes_disabled
+
+from pretalx.celery_app import app
+from pretalx.person.models import User
+from pretalx.schedule.models import Schedule
+
+LOGGER = logging.getLogger(__name__)
+
+
+@app.task(bind=True)
+def task_finish_schedule_release(
+    self, *, schedule_id: int, user_id: int = None, notify_speakers: bool = True
+):
+    """Runs :meth:`~pretalx.schedule.models.schedule.Schedule.finish_release`
+    for a freshly released schedule. While it is running, the task state is
+    ``PROGRESS``, with the percentage of completed stages in the ``value``
+    and the current stage in the ``stage`` of the task meta data.
+
+    The ``schedule_release`` event setting written by
+    :meth:`~pretalx.schedule.models.schedule.Schedule.freeze` is removed
+    once the task has finished, or marked as failed."""
+    with scopes_disabled():
+        schedule = (
+            Schedule.objects.select_related("event").filter(pk=schedule_id).first()
+        )
+    if not schedule:
+        LOGGER.error(f"Could not find Schedule ID {schedule_id} for release.")
+        return
+    user = User.objects.filter(pk=user_id).first() if user_id else None
+
+    def set_progress(value, stage):
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta={"value": value, "stage": stage})
+
+    # The release status is kept in the event settings until the task is
+    # done, as task results may expire before the status is checked.
+    event_settings = schedule.event.settings
+    release = event_settings.schedule_release
+    is_current = bool(release) and release.get("task_id") == self.request.id
+    with scope(event=schedule.event):
+        try:
+            schedule.finish_release(
+                user=user, notify_speakers=notify_speakers, progress=set_progress
+            )
+        except Exception:
+            if is_current:
+                event_settings.set("schedule_release", {**release, "failed": True})
+            raise
+    if is_current:
+        event_settings.delete("schedule_release")
+
+
+@app.task()
+def task_generate_schedule_notifications(*, schedule_id: int):
+    """Generates the speaker notifications of a released schedule, see
+    :meth:`~pretalx.schedule.models.schedule.Schedule.generate_notifications`."""
+    with scopes_disabled():
+        schedule = (
+            Schedule.objects.select_related("event").filter(pk=schedule_id).first()
+        )
+    if not schedule:
+        LOGGER.error(f"Could not find Schedule ID {schedule_id} for notifications.")
+        return
+    with scope(event=schedule.event):
+        schedule.generate_notifications(save=True)
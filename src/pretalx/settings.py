@@ -181,6 +181,7 @@ def merge_csp(*options, config=None):
     CELERY_RESULT_BACKEND = config.get("celery", "backend")
 else:
     CELERY_TASK_ALWAYS_EAGER = True
+HTMLEXPORT_WORKERS = config.getint("celery", "export_workers")
 
 ## DATABASE SETTINGS
 db_backend = config.get("database", "backend")
@@ -278,6 +279,8 @@ def merge_csp(*options, config=None):
 
 ## EMAIL SETTINGS
 MAIL_FROM = SERVER_EMAIL = DEFAULT_FROM_EMAIL = config.get("mail", "from")
+MAIL_BATCH_SIZE = config.getint("mail", "batch_size")
+MAIL_RATE_LIMIT = config.getfloat("mail", "rate_limit")
 if DEBUG:
     EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 else:
@@ -544,7 +547,7 @@ def merge_csp(*options, config=None):
         "rest_framework.filters.SearchFilter",
         "django_filters.rest_framework.DjangoFilterBackend",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "pretalx.api.pagination.ApiPagination",
     "PAGE_SIZE": 25,
     "SEARCH_PARAM": "q",
     "ORDERING_PARAM": "o",
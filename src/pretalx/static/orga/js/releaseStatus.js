@@ -0,0 +1,25 @@
+const releaseStatus = document.querySelector("#release-status")
+const releaseProgress = releaseStatus.querySelector(".progress-bar")
+
+const showReleaseResult = (result, alertClass) => {
+  releaseStatus.classList.replace("alert-info", alertClass)
+  releaseStatus.querySelector(`#release-status-${result}`).classList.remove("d-none")
+}
+
+const updateReleaseStatus = () => {
+  fetch(releaseStatus.dataset.url, { credentials: "same-origin" })
+    .then((response) => response.json())
+    .then((status) => {
+      if (status.state === "FAILURE") {
+        showReleaseResult("failed", "alert-danger")
+      } else if (!status.state || status.state === "SUCCESS") {
+        releaseProgress.style.width = "100%"
+        showReleaseResult("done", "alert-success")
+      } else {
+        releaseProgress.style.width = `${status.value}%`
+        window.setTimeout(updateReleaseStatus, 2000)
+      }
+    })
+}
+
+window.setTimeout(updateReleaseStatus, 2000)
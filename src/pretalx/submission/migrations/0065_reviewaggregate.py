@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("submission", "0064_auto_20211127_0152"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewAggregate",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("review_count", models.PositiveIntegerField(default=0)),
+                (
+                    "mean_score",
+                    models.DecimalField(decimal_places=3, max_digits=10, null=True),
+                ),
+                (
+                    "median_score",
+                    models.DecimalField(decimal_places=3, max_digits=10, null=True),
+                ),
+                ("category_scores", models.TextField(default="{}")),
+                (
+                    "submission",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_aggregate",
+                        to="submission.submission",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+import json
+import statistics
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def fill_review_aggregates(apps, schema_editor):
+    Review = apps.get_model("submission", "Review")
+    ReviewAggregate = apps.get_model("submission", "ReviewAggregate")
+
+    reviews_by_submission = defaultdict(list)
+    for review in Review.objects.all().prefetch_related("scores"):
+        reviews_by_submission[review.submission_id].append(review)
+
+    aggregates = []
+    for submission_id, reviews in reviews_by_submission.items():
+        scores = [review.score for review in reviews if review.score is not None]
+        category_values = defaultdict(list)
+        for review in reviews:
+            for score in review.scores.all():
+                category_values[score.category_id].append(score.value)
+        aggregates.append(
+            ReviewAggregate(
+                submission_id=submission_id,
+                review_count=len(reviews),
+                mean_score=round(statistics.fmean(scores), 1) if scores else None,
+                median_score=statistics.median(scores) if scores else None,
+                category_scores=json.dumps(
+                    {
+                        str(category): {
+                            "mean": float(round(statistics.fmean(values), 1)),
+                            "median": float(round(statistics.median(values), 1)),
+                        }
+                        for category, values in category_values.items()
+                    }
+                ),
+            )
+        )
+    ReviewAggregate.objects.bulk_create(aggregates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("submission", "0065_reviewaggregate"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_review_aggregates, migrations.RunPython.noop)
+    ]
@@ -4,7 +4,13 @@
 from .feedback import Feedback
 from .question import Answer, AnswerOption, Question, QuestionTarget, QuestionVariant
 from .resource import Resource
-from .review import Review, ReviewPhase, ReviewScore, ReviewScoreCategory
+from .review import (
+    Review,
+    ReviewAggregate,
+    ReviewPhase,
+    ReviewScore,
+    ReviewScoreCategory,
+)
 from .submission import Submission, SubmissionStates
 from .tag import Tag
 from .track import Track
@@ -13,13 +19,14 @@
     "Answer",
     "AnswerOption",
     "CfP",
-    'CfT',
+    "CfT",
     "Feedback",
     "Question",
     "QuestionTarget",
     "QuestionVariant",
     "Resource",
     "Review",
+    "ReviewAggregate",
     "ReviewPhase",
     "ReviewScore",
     "ReviewScoreCategory",
@@ -5,6 +5,7 @@
 from django_scopes import ScopedManager
 from i18nfield.fields import I18nCharField
 
+from pretalx.agenda.talk_context import TalkContext
 from pretalx.common.choices import Choices
 from pretalx.common.mixins.models import FileCleanupMixin, LogMixin
 from pretalx.common.phrases import phrases
@@ -234,6 +235,16 @@ class urls(EventUrls):
     def __str__(self):
         return str(self.question)
 
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        TalkContext.invalidate(self.event)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        TalkContext.invalidate(self.event)
+        return result
+
     def missing_answers(
         self, filter_speakers: list = False, filter_talks: list = False
     ) -> int:
@@ -343,6 +354,18 @@ def __str__(self):
         """Help when debugging."""
         return f"Answer(question={self.question.question}, answer={self.answer})"
 
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        if self.submission_id:
+            TalkContext.invalidate(self.event)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        if self.submission_id:
+            TalkContext.invalidate(self.event)
+        return result
+
     def remove(self, person=None, force=False):
         """Deletes an answer."""
         for option in self.options.all():
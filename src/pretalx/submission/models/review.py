@@ -1,10 +1,15 @@
+import json
+import statistics
+from collections import defaultdict
+
 from django.db import models
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
-from django_scopes import ScopedManager
+from django_scopes import ScopedManager, scopes_disabled
 from i18nfield.fields import I18nCharField
 
 from pretalx.common.urls import EventUrls
+from pretalx.submission.review_queue import ReviewQueue
 
 
 class ReviewScoreCategory(models.Model):
@@ -36,9 +41,63 @@ class urls(EventUrls):
         delete = "{base}delete"
 
     @classmethod
-    def recalculate_scores(cls, event):
-        for review in event.reviews.all():
-            review.save(update_score=True)
+    @scopes_disabled()
+    def recalculate_scores(cls, event, submissions=None, progress=None):
+        """Recalculates the total score of all reviews in the event, or of
+        all reviews of the given submissions, and updates their
+        :class:`ReviewAggregate`.
+
+        All scores, weights and track limits are loaded once, and reviews
+        are written back in bulk, so that the number of queries does not
+        depend on the number of reviews.
+
+        :param progress: Optional callable that receives the percentage
+            (0–100) of processed reviews.
+        """
+        categories = {}
+        for category in cls.objects.filter(event=event, active=True).prefetch_related(
+            "limit_tracks"
+        ):
+            categories[category.pk] = (
+                category.weight,
+                {track.pk for track in category.limit_tracks.all()},
+            )
+
+        queryset = Review.objects.filter(submission__event=event)
+        if submissions is not None:
+            queryset = queryset.filter(submission__in=submissions)
+        review_scores = defaultdict(list)
+        for review_id, category_id, value in Review.scores.through.objects.filter(
+            review__in=queryset
+        ).values_list("review_id", "reviewscore__category", "reviewscore__value"):
+            review_scores[review_id].append((category_id, value))
+        tracks = dict(
+            event.submissions(manager="all_objects").values_list("pk", "track_id")
+        )
+        reviews = list(queryset.only("score", "submission"))
+
+        changed = []
+        for index, review in enumerate(reviews, start=1):
+            track_id = tracks.get(review.submission_id)
+            values = [
+                value * categories[category_id][0]
+                for category_id, value in review_scores[review.pk]
+                if category_id in categories
+                and (
+                    not categories[category_id][1]
+                    or track_id in categories[category_id][1]
+                )
+            ]
+            score = sum(values) if values else None
+            if score != review.score:
+                review.score = score
+                changed.append(review)
+            if progress and (index % 100 == 0 or index == len(reviews)):
+                progress(round(index / len(reviews) * 100))
+        Review.objects.bulk_update(changed, ["score"], batch_size=500)
+        submission_ids = sorted({review.submission_id for review in changed})
+        for start in range(0, len(submission_ids), 500):
+            ReviewAggregate.update_submissions(submission_ids[start : start + 500])
 
     def save(self, *args, **kwargs):
         if self.is_independent:
@@ -167,13 +226,123 @@ def update_score(self):
     def save(self, *args, update_score=True, **kwargs):
         if self.id and update_score:
             self.update_score()
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        ReviewAggregate.update_submission(self.submission_id)
+        ReviewQueue.remove_submission(
+            self.submission.event, self.user_id, self.submission_id
+        )
+        return result
+
+    def delete(self, *args, **kwargs):
+        submission_id = self.submission_id
+        result = super().delete(*args, **kwargs)
+        ReviewAggregate.update_submission(submission_id)
+        ReviewQueue.clear(self.submission.event, self.user_id)
+        return result
 
     class urls(EventUrls):
         base = "{self.submission.orga_urls.reviews}"
         delete = "{base}{self.pk}/delete"
 
 
+class ReviewAggregate(models.Model):
+    """The review statistics of a
+    :class:`~pretalx.submission.models.submission.Submission`, stored so
+    that they can be filtered and sorted by in the database.
+
+    Aggregates are updated whenever one of the submission's reviews is
+    saved or deleted. Submissions without reviews may not have one.
+
+    :param mean_score: The mean of all review scores, rounded to one digit.
+    :param median_score: The median of all review scores.
+    :param category_scores: JSON mapping of score category IDs to their
+        ``mean`` and ``median`` score. Use ``get_category_score`` to access.
+    """
+
+    submission = models.OneToOneField(
+        to="submission.Submission",
+        related_name="review_aggregate",
+        on_delete=models.CASCADE,
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    mean_score = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True
+    )
+    median_score = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True
+    )
+    category_scores = models.TextField(default="{}")
+
+    objects = ScopedManager(event="submission__event")
+
+    @staticmethod
+    def compute(reviews) -> dict:
+        """Computes aggregate field values from the given reviews, which
+        should have their ``scores`` prefetched."""
+        scores = [review.score for review in reviews if review.score is not None]
+        category_values = defaultdict(list)
+        for review in reviews:
+            for score in review.scores.all():
+                category_values[score.category_id].append(score.value)
+        return {
+            "review_count": len(reviews),
+            "mean_score": round(statistics.fmean(scores), 1) if scores else None,
+            "median_score": statistics.median(scores) if scores else None,
+            "category_scores": json.dumps(
+                {
+                    str(category): {
+                        "mean": float(round(statistics.fmean(values), 1)),
+                        "median": float(round(statistics.median(values), 1)),
+                    }
+                    for category, values in category_values.items()
+                }
+            ),
+        }
+
+    @classmethod
+    def update_submission(cls, submission_id):
+        cls.update_submissions([submission_id])
+
+    @classmethod
+    @scopes_disabled()
+    def update_submissions(cls, submission_ids):
+        """Updates the aggregates of all given submissions with a constant
+        number of queries."""
+        reviews = defaultdict(list)
+        for review in Review.objects.filter(
+            submission_id__in=submission_ids
+        ).prefetch_related("scores"):
+            reviews[review.submission_id].append(review)
+        existing = {
+            aggregate.submission_id: aggregate
+            for aggregate in cls.objects.filter(submission_id__in=submission_ids)
+        }
+        created, updated = [], []
+        for submission_id in submission_ids:
+            values = cls.compute(reviews[submission_id])
+            aggregate = existing.get(submission_id)
+            if aggregate:
+                for key, value in values.items():
+                    setattr(aggregate, key, value)
+                updated.append(aggregate)
+            else:
+                created.append(cls(submission_id=submission_id, **values))
+        cls.objects.bulk_create(created)
+        cls.objects.bulk_update(
+            updated,
+            ["review_count", "mean_score", "median_score", "category_scores"],
+        )
+
+    def get_category_score(self, category, method="median"):
+        """Returns the ``mean`` or ``median`` score of the given category,
+        or None if there are no scores in this category."""
+        try:
+            data = json.loads(self.category_scores)
+        except ValueError:
+            return None
+        return data.get(str(category.pk), {}).get(method)
+
+
 class ReviewPhase(models.Model):
     """ReviewPhases determine reviewer access rights during a (potentially
     open) time frame.
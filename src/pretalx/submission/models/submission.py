@@ -1,11 +1,15 @@
 import datetime as dt
 import json
 import statistics
+from collections import defaultdict
 from itertools import repeat
 
 from django.conf import settings
-from django.db import models
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
 from django.db.models.fields.files import FieldFile
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from django.utils.crypto import get_random_string
 from django.utils.functional import cached_property
 from django.utils.timezone import now
@@ -13,6 +17,7 @@
 from django.utils.translation import pgettext
 from django_scopes import ScopedManager
 
+from pretalx.agenda.talk_context import TalkContext
 from pretalx.common.choices import Choices
 from pretalx.common.exceptions import SubmissionError
 from pretalx.common.mixins.models import FileCleanupMixin, GenerateCode, LogMixin
@@ -20,6 +25,7 @@
 from pretalx.common.urls import EventUrls
 from pretalx.common.utils import path_with_hash
 from pretalx.mail.models import QueuedMail
+from pretalx.submission.review_queue import ReviewQueue
 from pretalx.submission.signals import submission_state_change
 
 
@@ -282,6 +288,15 @@ def is_anonymised(self):
     def reviewer_answers(self):
         return self.answers.filter(question__is_visible_to_reviewers=True)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        result = super().save(*args, **kwargs)
+        if adding:
+            ReviewQueue.invalidate(self.event)
+        else:
+            TalkContext.invalidate(self.event)
+        return result
+
     def get_duration(self) -> int:
         """Returns this submission's duration in minutes.
 
@@ -297,11 +312,7 @@ def update_duration(self):
 
         Should be called whenever the duration changes.
         """
-        for slot in self.event.wip_schedule.talks.filter(
-            submission=self, start__isnull=False
-        ):
-            slot.end = slot.start + dt.timedelta(minutes=self.get_duration())
-            slot.save()
+        self.bulk_update_duration(self.event, [self])
 
     update_duration.alters_data = True
 
@@ -310,8 +321,10 @@ def update_review_scores(self):
 
         Should be called whenever the tracks of a submission change.
         """
-        for review in self.reviews.all():
-            review.save(update_score=True)
+        from pretalx.submission.models import ReviewScoreCategory
+
+        ReviewScoreCategory.recalculate_scores(self.event, submissions=[self])
+        ReviewQueue.invalidate(self.event)
 
     def _set_state(self, new_state, force=False, person=None):
         """Check if the new state is valid for this Submission (based on
@@ -330,6 +343,7 @@ def _set_state(self, new_state, force=False, person=None):
             self.state = new_state
             self.save(update_fields=["state"])
             self.update_talk_slots()
+            ReviewQueue.invalidate(self.event)
             submission_state_change.send_robust(
                 self.event, submission=self, old_state=old_state, user=person
             )
@@ -366,41 +380,7 @@ def update_talk_slots(self):
         deleted, or all created, or the number of talk slots might need
         to be adjusted.
         """
-        from pretalx.schedule.models import TalkSlot
-
-        if self.state not in [SubmissionStates.ACCEPTED, SubmissionStates.CONFIRMED]:
-            TalkSlot.objects.filter(
-                submission=self, schedule=self.event.wip_schedule
-            ).delete()
-            return
-
-        slot_count_current = TalkSlot.objects.filter(
-            submission=self,
-            schedule=self.event.wip_schedule,
-        ).count()
-        diff = slot_count_current - self.slot_count
-
-        if diff > 0:
-            # We build a list of all IDs to delete as .delete() doesn't work on sliced querysets.
-            # We delete unscheduled talks first.
-            talks_to_delete = (
-                TalkSlot.objects.filter(
-                    submission=self,
-                    schedule=self.event.wip_schedule,
-                )
-                .order_by("start", "room", "is_visible")[:diff]
-                .values_list("id", flat=True)
-            )
-            TalkSlot.objects.filter(pk__in=list(talks_to_delete)).delete()
-        elif diff < 0:
-            for __ in repeat(None, abs(diff)):
-                TalkSlot.objects.create(
-                    submission=self,
-                    schedule=self.event.wip_schedule,
-                )
-        TalkSlot.objects.filter(
-            submission=self, schedule=self.event.wip_schedule
-        ).update(is_visible=self.state == SubmissionStates.CONFIRMED)
+        self.bulk_update_talk_slots(self.event, [self])
 
     update_talk_slots.alters_data = True
 
@@ -490,6 +470,203 @@ def remove(self, person=None, force: bool = False, orga: bool = True):
 
     remove.alters_data = True
 
+    STATE_LOG_ACTIONS = {
+        SubmissionStates.REJECTED: "pretalx.submission.reject",
+        SubmissionStates.ACCEPTED: "pretalx.submission.accept",
+        SubmissionStates.CONFIRMED: "pretalx.submission.confirm",
+        SubmissionStates.CANCELED: "pretalx.submission.cancel",
+        SubmissionStates.WITHDRAWN: "pretalx.submission.withdraw",
+    }
+
+    @classmethod
+    def bulk_set_state(cls, event, submissions, new_state, person=None):
+        """Changes the state of many submissions at once, with the same
+        effects as :meth:`accept`, :meth:`reject` etc., but using a fixed
+        number of queries: Submissions are updated, talk slots are created or
+        deleted and actions are logged in bulk. Acceptance and rejection
+        emails are generated in a background task.
+
+        Submissions that cannot be moved to the new state are skipped.
+        Deleting submissions is not supported, use :meth:`remove` instead.
+
+        :returns: The list of changed submissions.
+        """
+        from pretalx.common.models import ActivityLog
+        from pretalx.submission.tasks import task_send_state_mails
+
+        if new_state == SubmissionStates.DELETED:
+            raise SubmissionError("Cannot delete submissions in bulk.")
+        changed = [
+            submission
+            for submission in submissions
+            if new_state in SubmissionStates.valid_next_states.get(submission.state, [])
+        ]
+        if not changed:
+            return []
+        old_states = {submission.pk: submission.state for submission in changed}
+        cls.all_objects.filter(pk__in=old_states).update(state=new_state)
+        for submission in changed:
+            submission.state = new_state
+        cls.bulk_update_talk_slots(event, changed)
+        ReviewQueue.invalidate(event)
+
+        action = cls.STATE_LOG_ACTIONS.get(new_state)
+        if action:
+            content_type = ContentType.objects.get_for_model(cls)
+            ActivityLog.objects.bulk_create(
+                [
+                    ActivityLog(
+                        event=event,
+                        person=person,
+                        content_type=content_type,
+                        object_id=submission.pk,
+                        action_type=action,
+                        is_orga_action=True,
+                    )
+                    for submission in changed
+                ]
+            )
+        for submission in changed:
+            submission_state_change.send_robust(
+                event,
+                submission=submission,
+                old_state=old_states[submission.pk],
+                user=person,
+            )
+
+        mail_ids = [
+            submission.pk
+            for submission in changed
+            if new_state == SubmissionStates.REJECTED
+            or (
+                new_state == SubmissionStates.ACCEPTED
+                and old_states[submission.pk] != SubmissionStates.CONFIRMED
+            )
+        ]
+        if mail_ids:
+            kwargs = {"event_id": event.pk, "submission_ids": mail_ids}
+            if settings.HAS_CELERY:
+                transaction.on_commit(
+                    lambda: task_send_state_mails.apply_async(kwargs=kwargs)
+                )
+            else:
+                task_send_state_mails(**kwargs)
+        return changed
+
+    @classmethod
+    def bulk_update_talk_slots(cls, event, submissions):
+        """Runs :meth:`update_talk_slots` for many submissions of an event.
+
+        The WIP talk slots of all submissions are loaded at once and
+        compared to the wanted slots, and the differences are applied
+        with one bulk create, delete and update each. Unscheduled slots
+        are removed first when there are too many slots.
+        """
+        from pretalx.schedule.models import TalkSlot
+
+        submissions = {submission.pk: submission for submission in submissions}
+        if not submissions:
+            return
+        schedule = event.wip_schedule
+        current = defaultdict(list)
+        for slot in (
+            TalkSlot.objects.filter(schedule=schedule, submission__in=submissions)
+            .order_by("pk")
+            .values("pk", "submission_id", "start", "room_id", "is_visible")
+        ):
+            current[slot["submission_id"]].append(slot)
+
+        new_slots = []
+        delete = []
+        visibility = {True: [], False: []}
+        for submission in submissions.values():
+            slots = current[submission.pk]
+            wanted = (
+                submission.slot_count
+                if submission.state
+                in (SubmissionStates.ACCEPTED, SubmissionStates.CONFIRMED)
+                else 0
+            )
+            if len(slots) > wanted:
+                slots.sort(
+                    key=lambda slot: (
+                        slot["start"] is not None,
+                        slot["start"],
+                        slot["room_id"] is not None,
+                        slot["room_id"],
+                        slot["is_visible"],
+                    )
+                )
+                delete += [slot["pk"] for slot in slots[: len(slots) - wanted]]
+                slots = slots[len(slots) - wanted :]
+            is_visible = submission.state == SubmissionStates.CONFIRMED
+            new_slots += [
+                TalkSlot(
+                    submission=submission, schedule=schedule, is_visible=is_visible
+                )
+                for __ in repeat(None, wanted - len(slots))
+            ]
+            visibility[is_visible] += [
+                slot["pk"] for slot in slots if slot["is_visible"] != is_visible
+            ]
+
+        if delete:
+            TalkSlot.objects.filter(pk__in=delete).delete()
+        if new_slots:
+            TalkSlot.objects.bulk_create(new_slots)
+        for is_visible, slot_ids in visibility.items():
+            if slot_ids:
+                TalkSlot.objects.filter(pk__in=slot_ids).update(is_visible=is_visible)
+
+    @classmethod
+    def bulk_update_duration(cls, event, submissions):
+        """Runs :meth:`update_duration` for many submissions of an event,
+        saving all changed talk slots in one query."""
+        from pretalx.schedule.models import TalkSlot
+
+        durations = {
+            submission.pk: dt.timedelta(minutes=submission.get_duration())
+            for submission in submissions
+        }
+        slots = []
+        for slot in event.wip_schedule.talks.filter(
+            submission__in=durations, start__isnull=False
+        ):
+            end = slot.start + durations[slot.submission_id]
+            if slot.end != end:
+                slot.end = end
+                slots.append(slot)
+        if slots:
+            TalkSlot.objects.bulk_update(slots, ["end"])
+
+    @classmethod
+    def send_state_mails(cls, submissions):
+        """Creates the acceptance and rejection emails for many submissions
+        of the same event, like :meth:`send_state_mail`. Prefetch the
+        speakers to avoid additional queries."""
+        templates = {}
+        mails = []
+        for submission in submissions:
+            if submission.state == SubmissionStates.ACCEPTED:
+                template = submission.event.accept_template
+            elif submission.state == SubmissionStates.REJECTED:
+                template = submission.event.reject_template
+            else:
+                continue
+            if template.pk not in templates:
+                templates[template.pk] = template.get_placeholders()
+            for speaker in submission.speakers.all():
+                mail = template.to_mail(
+                    user=None,
+                    locale=submission.get_email_locale(speaker.locale),
+                    context_kwargs={"submission": submission, "user": speaker},
+                    commit=False,
+                    allow_empty_address=True,
+                    placeholders=templates[template.pk],
+                )
+                mails.append((mail, [speaker]))
+        return QueuedMail.save_many(mails)
+
     @cached_property
     def integer_uuid(self):
         # For import into Engelsystem, we need to somehow convert our submission code into an unique integer. Luckily,
@@ -695,3 +872,16 @@ def send_invite(self, to, _from=None, subject=None, text=None):
             ).send()
 
     send_invite.alters_data = True
+
+
+@receiver(m2m_changed, sender=Submission.speakers.through)
+def invalidate_talk_context(sender, instance, action, pk_set=None, **kwargs):
+    from pretalx.event.models import Event
+
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, Submission):
+        TalkContext.invalidate(instance.event)
+    elif pk_set:
+        for event in Event.objects.filter(submissions__pk__in=pk_set).distinct():
+            TalkContext.invalidate(event)
@@ -1,5 +1,4 @@
 import rules
-from django.db.models import Q
 
 from pretalx.person.permissions import can_change_submissions, can_change_tracks, is_reviewer
 from pretalx.submission.models import SubmissionStates
@@ -112,11 +111,12 @@ def has_reviewer_access(user, obj):
     obj = getattr(obj, "submission", obj)
     if not isinstance(obj, Submission):
         raise Exception("Incorrect use of reviewer permissions")
-    result = user.teams.filter(
-        Q(Q(limit_tracks__isnull=True) | Q(limit_tracks__in=[obj.track])),
-        is_reviewer=True,
-    )
-    return result.exists()
+    if user.is_anonymous:
+        return False
+    entry = user.get_permission_matrix()["events"].get(obj.event_id)
+    if not entry or "is_reviewer" not in entry["permissions"]:
+        return False
+    return entry["reviewer_tracks"] is None or obj.track_id in entry["reviewer_tracks"]
 
 
 @rules.predicate
@@ -0,0 +1,103 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+
+class ReviewQueue:
+    """The proposals a reviewer still has to review in an event, ordered by
+    their review count, as returned by
+    :meth:`~pretalx.submission.models.review.Review.find_missing_reviews`.
+
+    The queue is kept in the cache for :attr:`timeout` seconds, by event
+    and reviewer. It is rebuilt when the reviewer's track limits change or
+    when the queues of the event are invalidated with :meth:`invalidate`
+    (for example by new proposals, state or track changes). New reviews only remove their proposal from
+    their author's queue, so the order of other reviewers' queues is
+    refreshed only when the cache entry times out.
+    """
+
+    timeout = 15 * 60
+
+    def __init__(self, event, user):
+        self.event = event
+        self.user = user
+
+    @staticmethod
+    def get_key(event, user_id) -> str:
+        return f"review_queue:{event.pk}:{user_id}"
+
+    @staticmethod
+    def get_stamp_key(event) -> str:
+        return f"review_queue_stamp:{event.pk}"
+
+    @classmethod
+    def invalidate(cls, event):
+        """Marks the review queues of all reviewers in this event as
+        outdated."""
+        cache.set(cls.get_stamp_key(event), uuid4().hex, None)
+
+    @classmethod
+    def remove_submission(cls, event, user_id, submission_id):
+        """Removes a proposal from a reviewer's queue once they have
+        reviewed it."""
+        key = cls.get_key(event, user_id)
+        entry = cache.get(key)
+        if entry and submission_id in entry["pending"]:
+            entry["pending"].remove(submission_id)
+            cache.set(key, entry, cls.timeout)
+
+    @classmethod
+    def clear(cls, event, user_id):
+        cache.delete(cls.get_key(event, user_id))
+
+    @cached_property
+    def tracks(self):
+        """The sorted IDs of the tracks this reviewer is limited to, or
+        ``None``."""
+        limit_tracks = self.user.teams.filter(limit_tracks__isnull=False).values_list(
+            "limit_tracks__event_id", "limit_tracks"
+        )
+        if not limit_tracks:
+            return None
+        return sorted(
+            {track for event_id, track in limit_tracks if event_id == self.event.pk}
+        )
+
+    @cached_property
+    def pending(self) -> list:
+        """The IDs of all proposals still to be reviewed, in order."""
+        from pretalx.submission.models import Review
+
+        key = self.get_key(self.event, self.user.pk)
+        stamp = cache.get(self.get_stamp_key(self.event))
+        entry = cache.get(key)
+        if entry and entry["stamp"] == stamp and entry["tracks"] == self.tracks:
+            return entry["pending"]
+        pending = list(
+            dict.fromkeys(
+                Review.find_missing_reviews(self.event, self.user).values_list(
+                    "pk", flat=True
+                )
+            )
+        )
+        cache.set(
+            key,
+            {"stamp": stamp, "tracks": self.tracks, "pending": pending},
+            self.timeout,
+        )
+        return pending
+
+    def __len__(self):
+        return len(self.pending)
+
+    def next_submission(self, ignore=None):
+        """Returns the first proposal in the queue that is not in
+        ``ignore``, or ``None``."""
+        ignore = set(ignore or [])
+        for submission_id in self.pending:
+            if submission_id in ignore:
+                continue
+            submission = self.event.submissions.filter(pk=submission_id).first()
+            if submission:
+                return submission
@@ -4,20 +4,43 @@
 
 from pretalx.celery_app import app
 from pretalx.event.models import Event
+from pretalx.submission.models import ReviewScoreCategory, Submission
 
 LOGGER = logging.getLogger(__name__)
 
 
-@app.task()
-def recalculate_all_review_scores(*, event_id: int):
+@app.task(bind=True)
+def recalculate_all_review_scores(self, *, event_id: int):
+    """Recalculates all review scores of an event. While it is running, the
+    task state is ``PROGRESS``, with the percentage of processed reviews in
+    the ``value`` of the task meta data."""
     with scopes_disabled():
-        event = (
-            Event.objects.prefetch_related("submissions").filter(pk=event_id).first()
-        )
+        event = Event.objects.filter(pk=event_id).first()
     if not event:
         LOGGER.error(f"Could not find Event ID {event_id} for export.")
         return
 
+    def set_progress(value):
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta={"value": value})
+
+    with scope(event=event):
+        ReviewScoreCategory.recalculate_scores(event, progress=set_progress)
+
+
+@app.task()
+def task_send_state_mails(*, event_id: int, submission_ids: list):
+    """Creates the acceptance and rejection emails for the given proposals,
+    after their state was changed with
+    :meth:`~pretalx.submission.models.submission.Submission.bulk_set_state`."""
+    with scopes_disabled():
+        event = Event.objects.filter(pk=event_id).first()
+    if not event:
+        LOGGER.error(f"Could not find Event ID {event_id} for state mails.")
+        return
+
     with scope(event=event):
-        for submission in event.submissions.all():
-            submission.update_review_scores()
+        submissions = event.submissions.filter(pk__in=submission_ids).prefetch_related(
+            "speakers"
+        )
+        Submission.send_state_mails(submissions)
@@ -1,6 +1,9 @@
+import datetime as dt
+import gzip
 import json
 import os
 from pathlib import Path
+from urllib.parse import urlparse
 
 import pytest
 import urllib3
@@ -9,11 +12,19 @@
 from django.test import override_settings
 from django.urls import reverse
 from django_scopes import scope
+from freezegun import freeze_time
 from lxml import etree
 
-from pretalx.agenda.tasks import export_schedule_html
+from pretalx.agenda.management.commands.export_schedule_html import (
+    event_page_fingerprints,
+    export_event,
+    export_file,
+)
+from pretalx.agenda.tasks import export_schedule_html, render_schedule_exports
+from pretalx.common.exporter import ExporterCache
 from pretalx.common.tasks import regenerate_css
 from pretalx.event.models import Event
+from pretalx.schedule.exporters import FrabJsonExporter, ICalExporter
 
 
 @pytest.mark.skipif(
@@ -38,6 +49,14 @@ def test_schedule_xsd_is_up_to_date():
 
 
 @pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "exporters_xml",
+        }
+    }
+)
 def test_schedule_frab_xml_export(
     slot,
     client,
@@ -53,17 +72,31 @@ def test_schedule_frab_xml_export(
             ),
             follow=True,
         )
-    assert response.status_code == 200, str(response.content.decode())
-    assert "ETag" in response
+        assert response.status_code == 200
+        assert response.streaming
+        content = b"".join(response.streaming_content)
 
-    content = response.content.decode()
-    assert slot.submission.title in content
-    assert slot.submission.urls.public.full() in content
+    assert slot.submission.title in content.decode()
+    assert slot.submission.urls.public.full() in content.decode()
 
     parser = etree.XMLParser(schema=schedule_schema)
     etree.fromstring(
-        response.content, parser
+        content, parser
     )  # Will raise if the schedule does not match the schema
+
+    # The streamed export has been stored, so the next response is served
+    # from the cache, with an ETag.
+    with django_assert_max_num_queries(15):
+        response = client.get(
+            reverse(
+                "agenda:export.schedule.xml",
+                kwargs={"event": slot.submission.event.slug},
+            ),
+            follow=True,
+        )
+    assert response.status_code == 200
+    assert "ETag" in response
+    assert response.content == content
     with django_assert_max_num_queries(15):
         response = client.get(
             reverse(
@@ -91,9 +124,10 @@ def test_schedule_frab_xml_export_control_char(
             ),
             follow=True,
         )
+        content = b"".join(response.streaming_content)
 
     parser = etree.XMLParser()
-    etree.fromstring(response.content, parser)
+    etree.fromstring(content, parser)
 
 
 @pytest.mark.django_db
@@ -142,6 +176,129 @@ def test_schedule_frab_json_export(
     assert regular_content != orga_content
 
 
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "exporters",
+        }
+    }
+)
+def test_schedule_export_is_rendered_once(slot, client, mocker):
+    render = mocker.spy(FrabJsonExporter, "render")
+    url = reverse(
+        "agenda:export.schedule.json", kwargs={"event": slot.submission.event.slug}
+    )
+    response = client.get(url)
+    assert response.status_code == 200
+    assert render.call_count == 1
+    etag = response["ETag"]
+
+    cached_response = client.get(url)
+    assert render.call_count == 1
+    assert cached_response.content == response.content
+    assert cached_response["ETag"] == etag
+
+    gzipped_response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert render.call_count == 1
+    assert gzipped_response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped_response.content) == response.content
+
+    not_modified_response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified_response.status_code == 304
+    assert render.call_count == 1
+
+    with scope(event=slot.event):
+        ExporterCache(slot.event).clear()
+    client.get(url)
+    assert render.call_count == 2
+
+
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "exporters_changes",
+        }
+    }
+)
+def test_schedule_export_cache_is_cleared_on_changes(slot, client, mocker):
+    render = mocker.spy(FrabJsonExporter, "render")
+    url = reverse(
+        "agenda:export.schedule.json", kwargs={"event": slot.submission.event.slug}
+    )
+    client.get(url)
+    assert render.call_count == 1
+
+    with scope(event=slot.event):
+        slot.event.settings.set("schedule_release", {"task_id": "something"})
+        client.get(url)
+        assert render.call_count == 1
+
+        track = slot.event.tracks.create(name="Track")
+        client.get(url)
+        assert render.call_count == 2
+        track.name = "Renamed track"
+        track.save()
+        client.get(url)
+        assert render.call_count == 3
+
+        slot.event.settings.set("display_header_pattern", "topo")
+        client.get(url)
+        assert render.call_count == 4
+
+        slot.event.name = "Renamed event"
+        slot.event.save()
+        client.get(url)
+        assert render.call_count == 5
+
+
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "exporters_expiry",
+        }
+    }
+)
+def test_schedule_export_outlives_default_cache_timeout(slot, client, mocker):
+    render = mocker.spy(FrabJsonExporter, "render")
+    url = reverse(
+        "agenda:export.schedule.json", kwargs={"event": slot.submission.event.slug}
+    )
+    with freeze_time() as frozen_time:
+        response = client.get(url)
+        assert render.call_count == 1
+        frozen_time.tick(dt.timedelta(hours=1))
+        assert client.get(url).content == response.content
+        assert render.call_count == 1
+
+
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "exporters_task",
+        }
+    }
+)
+def test_schedule_export_render_task(slot, client, mocker):
+    render_schedule_exports(event_id=slot.event.pk)
+    render = mocker.spy(FrabJsonExporter, "render")
+    response = client.get(
+        reverse(
+            "agenda:export.schedule.json", kwargs={"event": slot.submission.event.slug}
+        )
+    )
+    assert response.status_code == 200
+    assert slot.submission.title in response.content.decode()
+    assert render.call_count == 0
+
+
 @pytest.mark.django_db
 def test_schedule_frab_xcal_export(
     slot, client, django_assert_max_num_queries, break_slot
@@ -170,12 +327,40 @@ def test_schedule_ical_export(slot, client, django_assert_max_num_queries):
             ),
             follow=True,
         )
-    assert response.status_code == 200
+        assert response.status_code == 200
+        content = b"".join(response.streaming_content).decode()
 
-    content = response.content.decode()
+    assert content.startswith("BEGIN:VCALENDAR")
+    assert content.endswith("END:VCALENDAR\r\n")
     assert slot.submission.title in content
 
 
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "exporters_ical",
+        }
+    }
+)
+def test_schedule_ical_export_is_streamed_and_stored(slot, other_slot, client, mocker):
+    render_stream = mocker.spy(ICalExporter, "render_stream")
+    url = reverse(
+        "agenda:export.schedule.ics", kwargs={"event": slot.submission.event.slug}
+    )
+    response = client.get(url)
+    assert response.streaming
+    content = b"".join(response.streaming_content)
+    assert content.count(b"BEGIN:VEVENT") == 2
+
+    cached_response = client.get(url)
+    assert not cached_response.streaming
+    assert cached_response.content == content
+    assert "ETag" in cached_response
+    assert render_stream.call_count == 1
+
+
 @pytest.mark.django_db
 def test_schedule_single_ical_export(slot, client, django_assert_max_num_queries):
     with django_assert_max_num_queries(28):
@@ -240,7 +425,7 @@ def test_schedule_speaker_ical_export(
 
 @pytest.mark.django_db
 def test_feed_view(slot, client, django_assert_num_queries, schedule):
-    with django_assert_num_queries(13):
+    with django_assert_num_queries(8):
         response = client.get(slot.submission.event.urls.feed)
     assert response.status_code == 200
     assert schedule.version in response.content.decode()
@@ -299,7 +484,9 @@ def test_html_export_release_without_celery(mocker, event):
     },
     HAS_CELERY=True,
 )
-def test_html_export_release_with_celery(mocker, event):
+def test_html_export_release_with_celery(
+    mocker, event, django_capture_on_commit_callbacks
+):
     mocker.patch("django.core.management.call_command")
 
     from django.core.management import (  # Import here to avoid overriding mocks
@@ -309,10 +496,13 @@ def test_html_export_release_with_celery(mocker, event):
     with scope(event=event):
         event.cache.delete("rebuild_schedule_export")
         event.settings.export_html_on_schedule_release = True
-        event.wip_schedule.freeze(name="ohaio means hello")
+        with django_capture_on_commit_callbacks(execute=True):
+            event.wip_schedule.freeze(name="ohaio means hello")
         assert not event.cache.get("rebuild_schedule_export")
 
-    call_command.assert_called_with("export_schedule_html", event.slug, "--zip")
+    call_command.assert_called_with(
+        "export_schedule_html", event.slug, "--zip", "--incremental", "--parallel=1"
+    )
 
 
 @pytest.mark.django_db
@@ -352,6 +542,7 @@ def test_html_export_language(event, slot):
 
 
 @pytest.mark.django_db
+@override_settings(HTMLEXPORT_WORKERS=4)
 def test_schedule_export_schedule_html_task(mocker, event, slot):
     mocker.patch("django.core.management.call_command")
     from django.core.management import (  # Import here to avoid overriding mocks
@@ -360,7 +551,9 @@ def test_schedule_export_schedule_html_task(mocker, event, slot):
 
     export_schedule_html.apply_async(kwargs={"event_id": event.id})
 
-    call_command.assert_called_with("export_schedule_html", event.slug, "--zip")
+    call_command.assert_called_with(
+        "export_schedule_html", event.slug, "--zip", "--incremental", "--parallel=4"
+    )
 
 
 @pytest.mark.django_db
@@ -370,8 +563,10 @@ def test_schedule_export_schedule_html_task_nozip(mocker, event, slot):
         call_command,
     )
 
-    export_schedule_html.apply_async(kwargs={"event_id": event.id, "make_zip": False})
-    call_command.assert_called_with("export_schedule_html", event.slug)
+    export_schedule_html.apply_async(
+        kwargs={"event_id": event.id, "make_zip": False, "incremental": False}
+    )
+    call_command.assert_called_with("export_schedule_html", event.slug, "--parallel=1")
 
 
 @override_settings(
@@ -646,3 +841,82 @@ def test_wrong_export(
         follow=True,
     )
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_html_export_page_fingerprints(event, slot, other_slot):
+    with scope(event=event):
+        fingerprints = event_page_fingerprints(event)
+        talk_path = urlparse(slot.submission.urls.public).path
+        other_path = urlparse(other_slot.submission.urls.public).path
+        assert talk_path in fingerprints
+        assert other_path in fingerprints
+        assert event_page_fingerprints(event) == fingerprints
+
+        slot.submission.title = "A new title"
+        slot.submission.save()
+        event = Event.objects.get(pk=event.pk)
+        new_fingerprints = event_page_fingerprints(event)
+    assert new_fingerprints[talk_path] != fingerprints[talk_path]
+    assert new_fingerprints[other_path] == fingerprints[other_path]
+
+
+@pytest.mark.django_db
+def test_html_export_incremental_skips_unchanged_pages(
+    event, slot, other_slot, tmp_path, mocker
+):
+    rendered = []
+
+    def get_url_content(client, url):
+        rendered.append(url)
+        return url.encode()
+
+    mocker.patch(
+        "pretalx.agenda.management.commands.export_schedule_html.get_url_content",
+        get_url_content,
+    )
+    talk_path = urlparse(slot.submission.urls.public).path
+    other_path = urlparse(other_slot.submission.urls.public).path
+    with scope(event=event):
+        manifest, changed = export_event(event, tmp_path)
+        assert changed
+        assert talk_path in rendered
+        assert other_path in rendered
+
+        event.settings.set("schedule_release", {"task_id": "task", "version": "2"})
+        speaker = slot.submission.speakers.first()
+        speaker.name = "A new speaker name"
+        speaker.save()
+        rendered.clear()
+        event = Event.objects.get(pk=event.pk)
+        manifest, changed = export_event(event, tmp_path, manifest=manifest)
+    assert talk_path in rendered
+    assert other_path not in rendered
+
+
+def test_html_export_file_only_renders_changed_pages(tmp_path):
+    rendered = []
+
+    def get(path):
+        rendered.append(path)
+        return b'<html><img src="/media/test/avatar.png"></html>'
+
+    entry = export_file(tmp_path, "/test/talk/ABC/", get, "fingerprint")
+    assert entry.pop("written")
+    assert entry["assets"] == ["/media/test/avatar.png"]
+    assert (tmp_path / "test/talk/ABC/index.html").exists()
+
+    assert not export_file(tmp_path, "/test/talk/ABC/", get, "fingerprint", entry)[
+        "written"
+    ]
+    assert len(rendered) == 1
+    assert not export_file(tmp_path, "/test/talk/ABC/", get, "new fingerprint", entry)[
+        "written"
+    ]
+    assert len(rendered) == 2
+
+    (tmp_path / "test/talk/ABC/index.html").unlink()
+    assert export_file(tmp_path, "/test/talk/ABC/", get, "fingerprint", entry)[
+        "written"
+    ]
+    assert len(rendered) == 3
@@ -11,7 +11,7 @@
 def test_can_create_feedback(django_assert_num_queries, past_slot, client, event):
     with scope(event=event):
         assert past_slot.submission.speakers.count() == 1
-    with django_assert_num_queries(49):
+    with django_assert_num_queries(40):
         response = client.post(
             past_slot.submission.urls.feedback, {"review": "cool!"}, follow=True
         )
@@ -33,7 +33,7 @@ def test_can_create_feedback_for_multiple_speakers(
         past_slot.submission.speakers.add(other_speaker)
         past_slot.submission.speakers.add(speaker)
         assert past_slot.submission.speakers.count() == 2
-    with django_assert_num_queries(50):
+    with django_assert_num_queries(39):
         response = client.post(
             past_slot.submission.urls.feedback, {"review": "cool!"}, follow=True
         )
@@ -54,7 +54,7 @@ def test_cannot_create_feedback_before_talk(
             start=_now + dt.timedelta(minutes=30),
             end=_now + dt.timedelta(minutes=60),
         )
-    with django_assert_num_queries(16):
+    with django_assert_num_queries(12):
         response = client.post(
             slot.submission.urls.feedback, {"review": "cool!"}, follow=True
         )
@@ -67,7 +67,7 @@ def test_cannot_create_feedback_before_talk(
 @pytest.mark.django_db()
 def test_can_see_feedback(django_assert_num_queries, feedback, client):
     client.force_login(feedback.talk.speakers.first())
-    with django_assert_num_queries(24):
+    with django_assert_num_queries(16):
         response = client.get(feedback.talk.urls.feedback)
     assert response.status_code == 200
     assert feedback.review in response.content.decode()
@@ -75,13 +75,13 @@ def test_can_see_feedback(django_assert_num_queries, feedback, client):
 
 @pytest.mark.django_db()
 def test_can_see_feedback_form(django_assert_num_queries, past_slot, client):
-    with django_assert_num_queries(16):
+    with django_assert_num_queries(12):
         response = client.get(past_slot.submission.urls.feedback, follow=True)
     assert response.status_code == 200
 
 
 @pytest.mark.django_db()
 def test_cannot_see_feedback_form_before_talk(django_assert_num_queries, slot, client):
-    with django_assert_num_queries(18):
+    with django_assert_num_queries(14):
         response = client.get(slot.submission.urls.feedback, follow=True)
     assert response.status_code == 200
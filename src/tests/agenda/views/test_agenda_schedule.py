@@ -1,7 +1,11 @@
+import datetime as dt
 import textwrap
 from urllib.parse import quote
 
 import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_scopes import scope
 
@@ -16,7 +20,7 @@ def test_can_see_schedule(
         assert user.has_perm("agenda.view_schedule", event)
         url = event.urls.schedule if version == "js" else event.urls.schedule_nojs
 
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(url, follow=True, HTTP_ACCEPT="text/html")
     assert response.status_code == 200
     with scope(event=event):
@@ -100,18 +104,51 @@ def test_speaker_list(
     client, django_assert_num_queries, event, speaker, slot, other_slot
 ):
     url = event.urls.speakers
-    with django_assert_num_queries(12):
+    with django_assert_num_queries(8):
         response = client.get(url, follow=True)
     assert response.status_code == 200
     assert speaker.name in response.content.decode()
 
 
+@pytest.mark.django_db
+def test_speaker_list_groups_talks_and_is_cached(
+    client, event, speaker, other_speaker, slot
+):
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "speaker_list",
+            }
+        }
+    ):
+        with scope(event=event):
+            slot.submission.speakers.add(other_speaker)
+        url = event.urls.speakers
+        with CaptureQueriesContext(connection) as uncached:
+            response = client.get(url, follow=True)
+        content = response.content.decode()
+        assert speaker.name in content
+        assert other_speaker.name in content
+        assert content.count(slot.submission.title) == 2
+
+        with CaptureQueriesContext(connection) as cached:
+            assert client.get(url, follow=True).content.decode() == content
+        assert len(cached.captured_queries) < len(uncached.captured_queries)
+
+        response = client.get(url + "?q=Krümel", follow=True)
+        content = response.content.decode()
+        assert speaker.name not in content
+        assert other_speaker.name in content
+        assert content.count(slot.submission.title) == 1
+
+
 @pytest.mark.django_db
 def test_speaker_page(
     client, django_assert_num_queries, event, speaker, slot, other_slot
 ):
     url = reverse("agenda:speaker", kwargs={"code": speaker.code, "event": event.slug})
-    with django_assert_num_queries(22):
+    with django_assert_num_queries(18):
         response = client.get(url, follow=True)
     assert response.status_code == 200
     with scope(event=event):
@@ -148,7 +185,7 @@ def test_schedule_page_text_table(
     client, django_assert_num_queries, event, speaker, slot, schedule, other_slot
 ):
     url = event.urls.schedule
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(url, follow=True)
     assert response.status_code == 200
     title_lines = textwrap.wrap(slot.submission.title, width=16)
@@ -168,7 +205,7 @@ def test_schedule_page_text_table_explicit_header(
     other_slot,
 ):
     url = event.urls.schedule
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(url, follow=True, HTTP_ACCEPT="text/plain")
     assert response.status_code == 200
     title_lines = textwrap.wrap(slot.submission.title, width=16)
@@ -197,7 +234,7 @@ def test_schedule_page_redirects(
     target,
 ):
     url = event.urls.schedule
-    with django_assert_num_queries(9):
+    with django_assert_num_queries(5):
         response = client.get(url, HTTP_ACCEPT=header)
     assert response.status_code == 303
     assert response.headers["location"] == getattr(event.urls, target).full()
@@ -209,7 +246,7 @@ def test_schedule_page_text_list(
     client, django_assert_num_queries, event, speaker, slot, schedule, other_slot
 ):
     url = event.urls.schedule
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(url, {"format": "list"}, follow=True)
     assert response.status_code == 200
     assert slot.submission.title in response.content.decode()
@@ -220,7 +257,7 @@ def test_schedule_page_text_wrong_format(
     client, django_assert_num_queries, event, speaker, slot, schedule, other_slot
 ):
     url = event.urls.schedule
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(url, {"format": "wrong"}, follow=True)
     assert response.status_code == 200
     assert slot.submission.title[:10] in response.content.decode()
@@ -244,7 +281,7 @@ def test_versioned_schedule_page(
         test_string = "<pretalx-schedule" if version == "js" else slot.submission.title
 
     url = event.urls.schedule if version == "js" else event.urls.schedule_nojs
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(6):
         response = client.get(url, follow=True, HTTP_ACCEPT="text/html")
     if version == "js":
         assert (
@@ -256,13 +293,41 @@ def test_versioned_schedule_page(
         )  # But our talk has been made invisible
 
     url = schedule.urls.public if version == "js" else schedule.urls.nojs
-    with django_assert_num_queries(12):
+    with django_assert_num_queries(7):
         response = client.get(url, follow=True, HTTP_ACCEPT="text/html")
     assert response.status_code == 200
     assert test_string in response.content.decode()
 
     url = event.urls.schedule if version == "js" else event.urls.schedule_nojs
     url += f"?version={quote(schedule.version)}"
-    with django_assert_num_queries(21):
+    with django_assert_num_queries(11):
         redirected_response = client.get(url, follow=True, HTTP_ACCEPT="text/html")
     assert redirected_response._request.path == response._request.path
+
+
+@pytest.mark.django_db
+def test_changelog_query_count_independent_of_releases(client, event, slot, other_slot):
+    def release(version):
+        with scope(event=event):
+            event.wip_schedule.talks.filter(submission=slot.submission).update(
+                start=slot.start + dt.timedelta(hours=len(versions))
+            )
+            event.release_schedule(version)
+        versions.append(version)
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(event.urls.changelog, follow=True)
+        assert response.status_code == 200
+        for version in versions:
+            assert version in response.content.decode()
+        return len(context.captured_queries)
+
+    versions = []
+    release("v1")
+    count_queries()  # Changes of older releases are computed and stored once
+    query_count = count_queries()
+    for version in ("v2", "v3", "v4"):
+        release(version)
+    count_queries()
+    assert count_queries() == query_count
@@ -2,14 +2,19 @@
 
 import pytest
 import pytz
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import formats
 from django.utils.timezone import now
 from django_scopes import scope
 
+from pretalx.agenda.talk_context import TalkContext
+
 
 @pytest.mark.django_db
 def test_can_see_talk_list(client, django_assert_num_queries, event, slot, other_slot):
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(event.urls.talks, follow=True, HTTP_ACCEPT="text/html")
     assert response.status_code == 200
     assert "<pretalx-schedule" in response.content.decode()
@@ -17,7 +22,7 @@ def test_can_see_talk_list(client, django_assert_num_queries, event, slot, other
 
 @pytest.mark.django_db
 def test_can_see_talk(client, django_assert_num_queries, event, slot, other_slot):
-    with django_assert_num_queries(23):
+    with django_assert_num_queries(19):
         response = client.get(slot.submission.urls.public, follow=True)
     with scope(event=event):
         assert event.schedules.count() == 2
@@ -47,7 +52,7 @@ def test_can_see_talk(client, django_assert_num_queries, event, slot, other_slot
 @pytest.mark.django_db
 def test_cannot_see_new_talk(client, django_assert_num_queries, event, unreleased_slot):
     slot = unreleased_slot
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(slot.submission.urls.public, follow=True)
     assert response.status_code == 404
     with scope(event=event):
@@ -59,7 +64,7 @@ def test_orga_can_see_new_talk(
     orga_client, django_assert_num_queries, event, unreleased_slot
 ):
     slot = unreleased_slot
-    with django_assert_num_queries(30):
+    with django_assert_num_queries(22):
         response = orga_client.get(slot.submission.urls.public, follow=True)
     assert response.status_code == 200
     content = response.content.decode()
@@ -90,7 +95,7 @@ def test_can_see_talk_edit_btn(
     orga_client, django_assert_num_queries, orga_user, event, slot
 ):
     slot.submission.speakers.add(orga_user)
-    with django_assert_num_queries(31):
+    with django_assert_num_queries(23):
         response = orga_client.get(slot.submission.urls.public, follow=True)
     assert response.status_code == 200
     content = response.content.decode()
@@ -102,7 +107,7 @@ def test_can_see_talk_edit_btn(
 def test_can_see_talk_do_not_record(client, django_assert_num_queries, event, slot):
     slot.submission.do_not_record = True
     slot.submission.save()
-    with django_assert_num_queries(22):
+    with django_assert_num_queries(17):
         response = client.get(slot.submission.urls.public, follow=True)
     assert response.status_code == 200
     content = response.content.decode()
@@ -117,7 +122,7 @@ def test_can_see_talk_does_accept_feedback(
     slot.start = now() - dt.timedelta(days=1)
     slot.end = slot.start + dt.timedelta(hours=1)
     slot.save()
-    with django_assert_num_queries(23):
+    with django_assert_num_queries(19):
         response = client.get(slot.submission.urls.public, follow=True)
     assert response.status_code == 200
     content = response.content.decode()
@@ -130,7 +135,7 @@ def test_can_see_talk_does_accept_feedback(
 def test_cannot_see_nonpublic_talk(client, django_assert_num_queries, event, slot):
     event.is_public = False
     event.save()
-    with django_assert_num_queries(16):
+    with django_assert_num_queries(12):
         response = client.get(slot.submission.urls.public, follow=True)
     assert response.status_code == 404
 
@@ -139,7 +144,7 @@ def test_cannot_see_nonpublic_talk(client, django_assert_num_queries, event, slo
 def test_cannot_see_other_events_talk(
     client, django_assert_num_queries, event, slot, other_event
 ):
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(
             slot.submission.urls.public.replace(event.slug, other_event.slug),
             follow=True,
@@ -151,7 +156,7 @@ def test_cannot_see_other_events_talk(
 def test_event_talk_visiblity_submitted(
     client, django_assert_num_queries, event, submission
 ):
-    with django_assert_num_queries(9):
+    with django_assert_num_queries(5):
         response = client.get(submission.urls.public, follow=True)
     assert response.status_code == 404
 
@@ -160,7 +165,7 @@ def test_event_talk_visiblity_submitted(
 def test_event_talk_visiblity_accepted(
     client, django_assert_num_queries, event, slot, accepted_submission
 ):
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(6):
         response = client.get(accepted_submission.urls.public, follow=True)
     assert response.status_code == 404
 
@@ -169,7 +174,7 @@ def test_event_talk_visiblity_accepted(
 def test_event_talk_visiblity_confirmed(
     client, django_assert_num_queries, event, slot, confirmed_submission
 ):
-    with django_assert_num_queries(21):
+    with django_assert_num_queries(17):
         response = client.get(confirmed_submission.urls.public, follow=True)
     assert response.status_code == 200
 
@@ -178,7 +183,7 @@ def test_event_talk_visiblity_confirmed(
 def test_event_talk_visiblity_canceled(
     client, django_assert_num_queries, event, slot, canceled_submission
 ):
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(6):
         response = client.get(canceled_submission.urls.public, follow=True)
     assert response.status_code == 404
 
@@ -187,7 +192,7 @@ def test_event_talk_visiblity_canceled(
 def test_event_talk_visiblity_withdrawn(
     client, django_assert_num_queries, event, slot, withdrawn_submission
 ):
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(6):
         response = client.get(withdrawn_submission.urls.public, follow=True)
     assert response.status_code == 404
 
@@ -204,23 +209,23 @@ def test_talk_speaker_other_submissions(
 ):
     with scope(event=event):
         other_submission.speakers.add(speaker)
-    with django_assert_num_queries(23):
+    with django_assert_num_queries(17):
         response = client.get(other_submission.urls.public, follow=True)
 
     assert response.status_code == 200
     assert response.context["speakers"]
     assert len(response.context["speakers"]) == 2, response.context["speakers"]
     speaker_response = [
-        s for s in response.context["speakers"] if s.name == speaker.name
+        s for s in response.context["speakers"] if s["user"]["name"] == speaker.name
     ][0]
     other_response = [
-        s for s in response.context["speakers"] if s.name != speaker.name
+        s for s in response.context["speakers"] if s["user"]["name"] != speaker.name
     ][0]
-    assert len(speaker_response.other_submissions) == 1
-    assert len(other_response.other_submissions) == 0
+    assert len(speaker_response["other_submissions"]) == 1
+    assert len(other_response["other_submissions"]) == 0
     with scope(event=event):
         assert (
-            speaker_response.other_submissions[0].title
+            speaker_response["other_submissions"][0]["title"]
             == speaker.submissions.first().title
         )
 
@@ -242,27 +247,110 @@ def test_talk_speaker_other_submissions_only_if_visible(
         slot.save()
         slot.submission.save()
 
-    with django_assert_num_queries(23):
+    with django_assert_num_queries(17):
         response = client.get(other_submission.urls.public, follow=True)
 
     assert response.status_code == 200
     assert response.context["speakers"]
     assert len(response.context["speakers"]) == 2, response.context["speakers"]
     speaker_response = [
-        s for s in response.context["speakers"] if s.name == speaker.name
+        s for s in response.context["speakers"] if s["user"]["name"] == speaker.name
     ][0]
     other_response = [
-        s for s in response.context["speakers"] if s.name != speaker.name
+        s for s in response.context["speakers"] if s["user"]["name"] != speaker.name
     ][0]
-    assert len(speaker_response.other_submissions) == 0
-    assert len(other_response.other_submissions) == 0
+    assert len(speaker_response["other_submissions"]) == 0
+    assert len(other_response["other_submissions"]) == 0
 
 
 @pytest.mark.django_db
 def test_talk_review_page(
     client, django_assert_num_queries, event, submission, other_submission
 ):
-    with django_assert_num_queries(15):
+    with django_assert_num_queries(11):
         response = client.get(submission.urls.review, follow=True)
     assert response.status_code == 200
     assert submission.title in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_talk_context_is_built_in_bulk_and_cached(client, event, slot, other_slot):
+    from pretalx.event.models import Event
+
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "talk_context",
+            }
+        }
+    ):
+        with scope(event=event):
+            speaker = slot.submission.speakers.first()
+            other_slot.submission.speakers.add(speaker)
+            event = Event.objects.get(pk=event.pk)
+            contexts = TalkContext(event, event.current_schedule).store()
+            assert set(contexts) == {slot.submission.pk, other_slot.submission.pk}
+            for talk, other_talk in (
+                (slot.submission, other_slot.submission),
+                (other_slot.submission, slot.submission),
+            ):
+                speakers = {
+                    data["urls"]["public"]: data
+                    for data in contexts[talk.pk]["speakers"]
+                }
+                profile = speaker.event_profile(event)
+                assert speakers[profile.urls.public]["other_submissions"] == [
+                    {
+                        "title": other_talk.title,
+                        "urls": {"public": other_talk.urls.public},
+                    }
+                ]
+                assert "password" not in str(speakers)
+
+        url = slot.submission.urls.public
+        with CaptureQueriesContext(connection) as cached:
+            response = client.get(url, follow=True)
+        assert other_slot.submission.title in response.content.decode()
+        with scope(event=event):
+            profile = speaker.event_profile(event)
+            profile.biography = "An updated biography"
+            profile.save()
+        with CaptureQueriesContext(connection) as uncached:
+            response = client.get(url, follow=True)
+        assert "An updated biography" in response.content.decode()
+        assert len(cached.captured_queries) < len(uncached.captured_queries)
+
+        speaker.name = "A new speaker name"
+        speaker.save(update_fields=["name"])
+        response = client.get(url, follow=True)
+        assert "A new speaker name" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_talk_context_follows_question_and_room_changes(client, event, slot, question):
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "talk_context_questions",
+            }
+        }
+    ):
+        with scope(event=event):
+            question.is_public = True
+            question.save()
+            question.answers.create(submission=slot.submission, answer="42")
+        url = slot.submission.urls.public
+        content = client.get(url, follow=True).content.decode()
+        assert str(question.question) in content
+        assert str(slot.room.name) in content
+
+        with scope(event=event):
+            question.is_public = False
+            question.save()
+            slot.room.name = "A renamed room"
+            slot.room.save()
+        content = client.get(url, follow=True).content.decode()
+        assert str(question.question) not in content
+        assert "A renamed room" in content
@@ -1,5 +1,15 @@
+import datetime as dt
+import gzip
+import json
+
 import pytest
+from django.test import override_settings
 from django_scopes import scope
+from freezegun import freeze_time
+
+from pretalx.agenda.views import widget
+from pretalx.common.exporter import ExporterCache
+from pretalx.schedule import exporters
 
 
 @pytest.mark.parametrize("url", ("v1.en.js", "v1.json", "v1.css", "v2.json"))
@@ -65,6 +75,115 @@ def test_versioned_widget_data(client, event, schedule, slot):
     assert response.status_code == 200
 
 
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "widget_data",
+        }
+    }
+)
+def test_widget_data_is_stored_on_release(
+    client, event, slot, other_slot, mocker, django_assert_num_queries
+):
+    event.settings.show_schedule = True
+    with scope(event=event):
+        schedule, _ = event.wip_schedule.freeze("widget")
+    get_widget_data = mocker.spy(exporters, "get_widget_data")
+    url = event.urls.schedule + "widget/v2.json"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Access-Control-Allow-Origin"] == "*"
+    data = json.loads(response.content.decode())
+    assert data["version"] == "widget"
+    assert slot.submission.code in [talk.get("code") for talk in data["talks"]]
+    assert get_widget_data.call_count == 0
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.content).decode()) == data
+    assert get_widget_data.call_count == 0
+
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+    with scope(event=event):
+        ExporterCache(event).clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert get_widget_data.call_count == 1
+    etag = ExporterCache(event).get_etag(exporters.WIDGET_DATA_KEY)
+    assert response["ETag"] == f'"{etag}"'
+
+
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "widget_data_changes",
+        }
+    }
+)
+def test_widget_data_follows_changes(client, event, slot):
+    event.settings.show_schedule = True
+    with scope(event=event):
+        event.wip_schedule.freeze("widget")
+        track = event.tracks.create(name="Track")
+        slot.submission.track = track
+        slot.submission.save()
+    url = event.urls.schedule + "widget/v2.json"
+    data = json.loads(client.get(url).content.decode())
+    assert [entry["name"] for entry in data["tracks"]] == ["Track"]
+
+    with scope(event=event):
+        track.name = "Renamed track"
+        track.save()
+    data = json.loads(client.get(url).content.decode())
+    assert [entry["name"] for entry in data["tracks"]] == ["Renamed track"]
+
+    with scope(event=event):
+        speaker = slot.submission.speakers.first()
+        speaker.name = "A new speaker name"
+        speaker.save(update_fields=["name"])
+    data = json.loads(client.get(url).content.decode())
+    assert "A new speaker name" in [entry["name"] for entry in data["speakers"]]
+
+
+@pytest.mark.django_db
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "widget_data_wip",
+        }
+    }
+)
+def test_wip_widget_data_is_cached_briefly(orga_client, event, schedule, slot, mocker):
+    get_widget_data = mocker.spy(widget, "get_widget_data")
+    url = event.urls.schedule + "widget/v2.json?v=wip"
+
+    with freeze_time() as frozen_time:
+        response = orga_client.get(url)
+        assert response.status_code == 200
+        assert "ETag" not in response
+        data = json.loads(response.content.decode())
+        assert data["version"] is None
+        response = orga_client.get(url)
+        assert json.loads(response.content.decode()) == data
+        assert get_widget_data.call_count == 1
+
+        frozen_time.tick(dt.timedelta(minutes=2))
+        orga_client.get(url)
+        assert get_widget_data.call_count == 2
+
+
 @pytest.mark.django_db
 def test_bogus_versioned_widget_data(client, event, schedule, slot):
     response = client.get(event.urls.schedule + "widget/v2.json?v=nopedinope")
@@ -125,3 +125,19 @@ def test_reviewer_cannot_edit_answer(event, review_client, answer):
     with scope(event=event):
         answer.refresh_from_db()
         assert answer.answer != "ohno.png"
+
+
+@pytest.mark.django_db
+def test_organizer_can_expand_answer_question(orga_client, answer):
+    response = orga_client.get(answer.event.api_urls.answers, follow=True)
+    content = json.loads(response.content.decode())
+    assert set(content["results"][0]["question"].keys()) == {"id", "question"}
+
+    response = orga_client.get(
+        answer.event.api_urls.answers + "?expand=question&fields=id,question",
+        follow=True,
+    )
+    content = json.loads(response.content.decode())
+    assert response.status_code == 200
+    assert set(content["results"][0].keys()) == {"id", "question"}
+    assert content["results"][0]["question"]["variant"] == answer.question.variant
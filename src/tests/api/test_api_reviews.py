@@ -102,3 +102,14 @@ def test_reviewer_cannot_see_review_to_own_talk(
 
     assert response.status_code == 200
     assert len(content["results"]) == 1, content
+
+
+@pytest.mark.django_db
+def test_orga_can_expand_review_submission(orga_client, event, review):
+    response = orga_client.get(
+        event.api_urls.reviews + "?expand=submission", follow=True
+    )
+    content = json.loads(response.content.decode())
+    assert response.status_code == 200
+    assert content["results"][0]["submission"]["code"] == review.submission.code
+    assert content["results"][0]["submission"]["title"] == review.submission.title
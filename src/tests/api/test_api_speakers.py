@@ -1,6 +1,8 @@
 import json
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django_scopes import scope
 
 from pretalx.api.serializers.speaker import (
@@ -8,6 +10,9 @@
     SpeakerSerializer,
     SubmitterSerializer,
 )
+from pretalx.person.models import SpeakerProfile, User
+from pretalx.schedule.models import TalkSlot
+from pretalx.submission.models import Submission
 
 
 @pytest.mark.django_db
@@ -245,3 +250,111 @@ def test_orga_speakers_with_multiple_talks_are_not_duplicated(
 
     assert response.status_code == 200
     assert content["count"] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("is_orga", (True, False))
+def test_speaker_list_query_count_does_not_grow(
+    client, orga_user, event, slot, is_orga
+):
+    if is_orga:
+        client.force_login(orga_user)
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(event.api_urls.speakers, follow=True)
+        assert response.status_code == 200
+        return len(context.captured_queries), json.loads(response.content.decode())
+
+    count_queries()
+    query_count, content = count_queries()
+    assert content["count"] == 1
+    with scope(event=event):
+        for index in range(5):
+            user = User.objects.create_user(
+                email=f"speaker{index}@example.org", password="speakerpwd1!"
+            )
+            SpeakerProfile.objects.create(user=user, event=event)
+            slot.submission.speakers.add(user)
+    new_query_count, content = count_queries()
+    assert content["count"] == 6
+    assert new_query_count == query_count
+
+
+@pytest.mark.django_db
+def test_speaker_list_expand_submissions(
+    client, event, slot, past_slot, submission_data
+):
+    with scope(event=event):
+        hidden_submission = Submission.objects.create(**submission_data)
+        hidden_submission.speakers.add(slot.submission.speakers.first())
+        hidden_submission.accept()
+        hidden_submission.confirm()
+        TalkSlot.objects.create(
+            submission=hidden_submission,
+            schedule=slot.schedule,
+            room=slot.room,
+            start=slot.start,
+            end=slot.end,
+            is_visible=False,
+        )
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                event.api_urls.speakers + "?fields=code,submissions&expand=submissions",
+                follow=True,
+            )
+        assert response.status_code == 200
+        return len(context.captured_queries), json.loads(response.content.decode())
+
+    count_queries()
+    query_count, content = count_queries()
+    assert content["count"] == 2
+    results = {result["code"]: result for result in content["results"]}
+    result = results[slot.submission.speakers.first().code]
+    assert set(result.keys()) == {"code", "submissions"}
+    assert [submission["code"] for submission in result["submissions"]] == [
+        slot.submission.code
+    ]
+    assert result["submissions"][0]["title"] == slot.submission.title
+    assert result["submissions"][0]["slot"]["room"] == slot.room.name
+    assert result["submissions"][0]["speakers"][0]["code"] == result["code"]
+
+    with scope(event=event):
+        for index in range(3):
+            user = User.objects.create_user(
+                email=f"expanded{index}@example.org", password="speakerpwd1!"
+            )
+            SpeakerProfile.objects.create(user=user, event=event)
+            slot.submission.speakers.add(user)
+            hidden_submission.speakers.add(user)
+    new_query_count, content = count_queries()
+    assert content["count"] == 5
+    assert new_query_count == query_count
+    for result in content["results"]:
+        assert hidden_submission.code not in [
+            submission["code"] for submission in result["submissions"]
+        ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("can_view_speakers", (True, False))
+def test_speaker_serializer_expanded_submissions_are_anonymised(
+    event, slot, can_view_speakers
+):
+    with scope(event=event):
+        submission = slot.submission
+        submission.anonymised_data = json.dumps({"description": "CENSORED!"})
+        submission.save()
+        profile = submission.speakers.first().event_profile(event)
+        data = SpeakerSerializer(
+            profile,
+            event=event,
+            expand={"submissions"},
+            can_view_speakers=can_view_speakers,
+        ).data
+    assert data["submissions"][0]["code"] == submission.code
+    assert (data["submissions"][0]["description"] == "CENSORED!") is not (
+        can_view_speakers
+    )
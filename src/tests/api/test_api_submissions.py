@@ -1,6 +1,8 @@
 import json
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django_scopes import scope
 
 from pretalx.api.serializers.submission import (
@@ -8,6 +10,8 @@
     SubmissionSerializer,
     TagSerializer,
 )
+from pretalx.person.models import User
+from pretalx.submission.models import Answer, Submission
 
 
 @pytest.mark.django_db
@@ -357,3 +361,73 @@ def test_orga_can_see_single_tag(orga_client, tag):
 
     assert response.status_code == 200
     assert content["tag"] == tag.tag
+
+
+@pytest.mark.django_db
+def test_submission_list_query_count_does_not_grow(
+    orga_client, event, submission, answer, question, tag, resource
+):
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = orga_client.get(event.api_urls.submissions, follow=True)
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    count_queries()
+    query_count = count_queries()
+    with scope(event=event):
+        for index in range(5):
+            other = Submission.objects.create(
+                title=f"Talk {index}", event=event, content_locale="en"
+            )
+            other.speakers.add(
+                User.objects.create_user(
+                    email=f"speaker{index}@example.org", password="speakerpwd1!"
+                )
+            )
+            other.tags.add(tag)
+            Answer.objects.create(answer="12", submission=other, question=question)
+    assert count_queries() == query_count
+
+
+@pytest.mark.django_db
+def test_submission_list_cursor_pagination(
+    orga_client, event, submission, other_submission, accepted_submission
+):
+    response = orga_client.get(
+        event.api_urls.submissions + "?cursor=&page_size=2", follow=True
+    )
+    content = json.loads(response.content.decode())
+    assert response.status_code == 200
+    assert "count" not in content
+    assert [result["code"] for result in content["results"]] == [
+        submission.code,
+        other_submission.code,
+    ]
+
+    response = orga_client.get(content["next"], follow=True)
+    content = json.loads(response.content.decode())
+    assert [result["code"] for result in content["results"]] == [
+        accepted_submission.code
+    ]
+    assert content["next"] is None
+
+
+@pytest.mark.django_db
+def test_submission_list_sparse_fieldset(orga_client, event, slot, answer, resource):
+    with CaptureQueriesContext(connection) as context:
+        response = orga_client.get(
+            event.api_urls.submissions + "?fields=code,state,slot", follow=True
+        )
+    content = json.loads(response.content.decode())
+    assert response.status_code == 200
+    assert all(
+        set(result.keys()) == {"code", "state", "slot"} for result in content["results"]
+    )
+    slot_result = [
+        result for result in content["results"] if result["slot"] is not None
+    ]
+    assert slot_result[0]["code"] == slot.submission.code
+    queries = " ".join(query["sql"] for query in context.captured_queries)
+    assert "submission_resource" not in queries
+    assert "submission_answer" not in queries
@@ -2,6 +2,11 @@
 
 import pytest
 from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from pretalx.event.models import Event
 
 
 @pytest.fixture(autouse=True)
@@ -85,6 +90,41 @@ def test_unknown_event_on_custom_domain(event_on_foobar, client):
     assert r.status_code == 404
 
 
+@pytest.mark.django_db
+def test_custom_domain_redirects_to_most_recent_public_event(
+    event_on_foobar, other_event, client
+):
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "custom_domains",
+            }
+        }
+    ):
+        other_event.settings.set("custom_domain", "https://foobar/")
+        r = client.get("/", HTTP_HOST="foobar", secure=True)
+        assert r.status_code == 302
+        assert r["Location"] == f"https://foobar/{other_event.slug}/"
+        with CaptureQueriesContext(connection) as context:
+            assert Event.get_custom_domain_table() == {
+                "https://foobar": f"https://foobar/{other_event.slug}/"
+            }
+        assert not context.captured_queries
+
+        other_event.is_public = False
+        other_event.save()
+        r = client.get("/", HTTP_HOST="foobar", secure=True)
+        assert r["Location"] == f"https://foobar/{event_on_foobar.slug}/"
+
+        event_on_foobar.settings.delete("custom_domain")
+        r = client.get("/", HTTP_HOST="foobar", secure=True)
+        assert r.status_code == 404
+        other_event.settings.delete("custom_domain")
+        r = client.get("/", HTTP_HOST="foobar", secure=True)
+        assert r.status_code == 400
+
+
 @pytest.mark.django_db
 def test_with_forwarded_host(event_on_foobar, client):
     settings.USE_X_FORWARDED_HOST = True
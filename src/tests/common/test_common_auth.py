@@ -11,7 +11,8 @@ def test_can_see_schedule_with_bearer_token(event, schedule, slot, orga_user):
     event.settings.show_schedule = False
     response = client.get(f"/{event.slug}/schedule.xml")
     assert response.status_code == 200
-    assert slot.submission.title in response.content.decode()
+    content = b"".join(response.streaming_content).decode()
+    assert slot.submission.title in content
 
 
 @pytest.mark.flaky(reruns=3)
@@ -1,6 +1,21 @@
+from smtplib import SMTPResponseException
+
 import pytest
+from django.core import mail as djmail
+from django.core.mail.backends import locmem
+from django.core.mail.backends.smtp import EmailBackend
 
-from pretalx.common.mail import mail_send_task
+from pretalx.common import mail as common_mail
+from pretalx.common.exceptions import SendMailException
+from pretalx.common.mail import (
+    MAIL_BODY_PLACEHOLDER,
+    get_tag_styles,
+    mail_send_batch_task,
+    mail_send_task,
+    make_mail_html,
+    render_mail_body,
+)
+from pretalx.event.models import Event
 
 
 @pytest.mark.django_db
@@ -14,3 +29,183 @@ def test_mail_send_does_not_fail_with_sender(event):
     event.settings.mail_reply_to = "sender@example.com"
     event.settings.mail_from = "sender@example.com"
     mail_send_task("m@example.com", "S", "B", None, [], event.pk)
+
+
+@pytest.mark.django_db
+def test_mail_send_batch_uses_one_connection(event, monkeypatch):
+    connections = []
+    original_backend = Event.get_mail_backend
+
+    def get_mail_backend(self, *args, **kwargs):
+        connections.append(original_backend(self, *args, **kwargs))
+        return connections[-1]
+
+    monkeypatch.setattr(Event, "get_mail_backend", get_mail_backend)
+    djmail.outbox = []
+    mails = [
+        {"to": [f"m{index}@example.com"], "subject": "S", "body": "B", "html": None}
+        for index in range(3)
+    ]
+    mails.append({"to": ["m@localhost"], "subject": "S", "body": "B", "html": None})
+    mail_send_batch_task(mails, event.pk)
+    assert len(connections) == 1
+    assert [mail.to for mail in djmail.outbox] == [
+        ["m0@example.com"],
+        ["m1@example.com"],
+        ["m2@example.com"],
+    ]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.mark.parametrize(
+    "rate,sleeps",
+    (
+        (2, [1.0, 1.0]),
+        (0.5, [2.0, 2.0, 2.0, 2.0]),
+    ),
+)
+def test_mail_rate_limit_is_shared_per_server(settings, monkeypatch, rate, sleeps):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"mail_rate_limit_{rate}",
+        }
+    }
+    settings.MAIL_RATE_LIMIT = rate
+    clock = FakeClock()
+    monkeypatch.setattr(common_mail, "time", clock)
+    backend = EmailBackend(host="mail.example.org", port=25)
+    other_task_backend = EmailBackend(host="mail.example.org", port=25)
+    other_backend = EmailBackend(host="mail.example.com", port=25)
+
+    for current_backend in (backend, other_task_backend) * 2 + (backend,):
+        common_mail.wait_for_mail_rate_limit(current_backend)
+    common_mail.wait_for_mail_rate_limit(other_backend)
+    assert clock.sleeps == sleeps
+
+
+@pytest.mark.django_db
+def test_mail_send_batch_reports_unsent_mails(event, monkeypatch, caplog):
+    class FailingBackend(locmem.EmailBackend):
+        def send_messages(self, messages):
+            if messages[0].to == ["m0@example.com"]:
+                raise SMTPResponseException(452, "Too many mails")
+            return super().send_messages(messages)
+
+    monkeypatch.setattr(Event, "get_mail_backend", lambda self: FailingBackend())
+    djmail.outbox = []
+    mails = [
+        {"to": [f"m{index}@example.com"], "subject": "S", "body": "B", "html": None}
+        for index in range(3)
+    ]
+    result = mail_send_batch_task.apply(
+        kwargs={"mails": mails, "event": event.pk}, retries=5
+    )
+    assert isinstance(result.result, SendMailException)
+    assert "m0@example.com" in str(result.result)
+    assert "m0@example.com" in caplog.text
+    assert [mail.to for mail in djmail.outbox] == [
+        ["m1@example.com"],
+        ["m2@example.com"],
+    ]
+
+
+@pytest.mark.django_db
+def test_mail_send_batch_keeps_failures_over_retries(event, monkeypatch):
+    class Retry(Exception):
+        pass
+
+    class FailingBackend(locmem.EmailBackend):
+        def send_messages(self, messages):
+            if messages[0].to == ["m0@example.com"]:
+                raise SMTPResponseException(550, "Unknown recipient")
+            if messages[0].to == ["m1@example.com"] and not retries:
+                raise SMTPResponseException(452, "Too many mails")
+            return super().send_messages(messages)
+
+    def retry(kwargs, **options):
+        retries.append(kwargs)
+        raise Retry()
+
+    retries = []
+    monkeypatch.setattr(Event, "get_mail_backend", lambda self: FailingBackend())
+    monkeypatch.setattr(mail_send_batch_task, "retry", retry)
+    djmail.outbox = []
+    mails = [
+        {"to": [f"m{index}@example.com"], "subject": "S", "body": "B", "html": None}
+        for index in range(3)
+    ]
+    with pytest.raises(Retry):
+        mail_send_batch_task(mails=mails, event=event.pk)
+    assert retries[0]["mails"] == mails[1:]
+    assert [to for to, __ in retries[0]["failed"]] == [["m0@example.com"]]
+
+    result = mail_send_batch_task.apply(kwargs=retries[0])
+    assert isinstance(result.result, SendMailException)
+    assert "Failed to send 1 emails" in str(result.result)
+    assert "m0@example.com" in str(result.result)
+    assert [mail.to for mail in djmail.outbox] == [
+        ["m1@example.com"],
+        ["m2@example.com"],
+    ]
+
+
+def test_render_mail_body_is_cached():
+    render_mail_body.cache_clear()
+    assert render_mail_body("Hi **there**") == "<p>Hi <strong>there</strong></p>"
+    assert render_mail_body("Hi **there**") == "<p>Hi <strong>there</strong></p>"
+    assert render_mail_body.cache_info().hits == 1
+
+
+def test_get_tag_styles():
+    html = (
+        "<style>a, .x { color: red; } a:hover { color: blue } p { margin: 0 }</style>"
+    )
+    assert get_tag_styles(html) == {"a": "color: red", "p": "margin: 0"}
+
+
+@pytest.mark.django_db
+def test_make_mail_html_inlines_wrapper_once(event, settings, monkeypatch):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "mail_wrapper",
+        }
+    }
+    inlined = []
+
+    def inline_css(html):
+        inlined.append(html)
+        return html
+
+    monkeypatch.setattr("inlinestyler.utils.inline_css", inline_css)
+    event.primary_color = "#123456"
+    event.save()
+
+    first = make_mail_html(
+        render_mail_body("[Link](https://example.com)"), "A<B", event
+    )
+    second = make_mail_html("<p>Second</p>", "Second", event)
+    assert len(inlined) == 1
+    assert "<h1>A&lt;B</h1>" in first
+    assert (
+        '<a href="https://example.com" rel="nofollow" style="color: #123456;font-weight: bold">Link</a>'
+        in first
+    )
+    assert '<p style="margin: 0 0 10px">Second</p>' in second
+    assert MAIL_BODY_PLACEHOLDER not in second
+
+    make_mail_html("<p>Third</p>", "Third", event, locale="de")
+    assert len(inlined) == 2
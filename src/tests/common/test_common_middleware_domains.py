@@ -20,3 +20,45 @@ def test_event_on_unknown_domain(event, client):
 def test_orga_event_on_unknown_domain(event, client):
     r = client.get("/orga/event/{event.slug}/", HTTP_HOST="foobar")
     assert r.status_code == 404, r.content.decode()
+
+
+@pytest.mark.django_db
+def test_request_event_is_loaded_once(event, django_assert_num_queries):
+    from django.test import RequestFactory
+
+    from pretalx.common.middleware.event import get_request_event
+    from pretalx.event.models.event import EVENT_SLUG_CACHE
+
+    EVENT_SLUG_CACHE.clear()
+    request = RequestFactory().get(f"/{event.slug}/")
+    with django_assert_num_queries(2):
+        request.event = get_request_event(request, event.slug.upper())
+    assert request.event == event
+    assert request.event.get_deferred_fields() == {
+        "landing_page_text",
+        "featured_sessions_text",
+    }
+    with django_assert_num_queries(0):
+        assert get_request_event(request, event.slug) is request.event
+    with django_assert_num_queries(1):
+        assert get_request_event(RequestFactory().get("/"), event.slug) == event
+
+
+@pytest.mark.django_db
+def test_request_event_with_outdated_slug_cache(event, other_event):
+    from django.http import Http404
+    from django.test import RequestFactory
+
+    from pretalx.common.middleware.event import get_request_event
+    from pretalx.event.models.event import EVENT_SLUG_CACHE, Event
+
+    EVENT_SLUG_CACHE[Event.get_slug_cache_key(event.slug)] = other_event.pk
+    assert get_request_event(RequestFactory().get("/"), event.slug) == event
+    assert Event.get_id_for_slug(event.slug) == event.pk
+
+    old_slug = event.slug
+    event.slug = "renamed"
+    event.save()
+    assert Event.get_id_for_slug("renamed") == event.pk
+    with pytest.raises(Http404):
+        get_request_event(RequestFactory().get("/"), old_slug)
@@ -1,6 +1,11 @@
 import pytest
+from django.utils.timezone import now
+from django_scopes import scope
+from i18nfield.strings import LazyI18nString
 
+from pretalx.common import mail as common_mail
 from pretalx.common.mail import TolerantDict
+from pretalx.mail.context import get_mail_context, get_used_placeholders
 from pretalx.mail.models import QueuedMail
 
 
@@ -76,3 +81,77 @@ def test_mail_make_subject(event, text, prefix, expected):
     if prefix:
         event.settings.mail_subject_prefix = prefix
     assert QueuedMail(text=text, subject=text, event=event).make_subject() == expected
+
+
+@pytest.mark.django_db
+def test_mail_send_many_in_batches(
+    mail_template, speaker, other_speaker, event, settings, monkeypatch
+):
+    settings.MAIL_BATCH_SIZE = 2
+    batches = []
+    monkeypatch.setattr(
+        common_mail.mail_send_batch_task,
+        "apply_async",
+        lambda kwargs: batches.append(kwargs),
+    )
+    with scope(event=event):
+        mails = [mail_template.to_mail(user) for user in (speaker, other_speaker)]
+        mails[0].sent = now()
+        mails[0].save()
+        mails.append(mail_template.to_mail(speaker))
+        count = QueuedMail.send_many(
+            event.queued_mails.all().prefetch_related("to_users")
+        )
+        assert count == 2
+        assert len(batches) == 1
+        assert batches[0]["event"] == event.pk
+        assert [mail["to"] for mail in batches[0]["mails"]] == [
+            [other_speaker.email],
+            [speaker.email],
+        ]
+        assert not event.queued_mails.filter(sent__isnull=True).exists()
+
+        mails = [mail_template.to_mail(speaker) for _ in range(3)]
+        assert QueuedMail.send_many(mails) == 3
+        assert [len(batch["mails"]) for batch in batches[1:]] == [2, 1]
+
+
+@pytest.mark.parametrize(
+    "texts,expected",
+    (
+        (("Hi {name}",), {"name"}),
+        (("{name}", "{event_name} {name} {{escaped}}"), {"name", "event_name"}),
+        (("{submission.title} {speakers[0]}",), {"submission", "speakers"}),
+        (("Broken {name",), set()),
+        ((LazyI18nString({"en": "{name}", "de": "{email}"}),), {"name", "email"}),
+    ),
+)
+def test_get_used_placeholders(texts, expected):
+    assert get_used_placeholders(*texts) == expected
+
+
+@pytest.mark.django_db
+def test_mail_template_renders_only_used_placeholders(
+    mail_template, submission, speaker
+):
+    with scope(event=submission.event):
+        mail_template.text = "Hi {name}, we received “{proposal_title}”."
+        mail_template.save()
+        placeholders = mail_template.get_placeholders()
+        assert {placeholder.identifier for placeholder in placeholders} == {
+            "name",
+            "proposal_title",
+        }
+        assert (
+            get_mail_context(
+                placeholders=placeholders,
+                event=submission.event,
+                submission=submission,
+                user=speaker,
+            )
+            == {"name": speaker.name, "proposal_title": submission.title}
+        )
+        mail = mail_template.to_mail(
+            speaker, context_kwargs={"submission": submission, "user": speaker}
+        )
+        assert mail.text == f"Hi {speaker.name}, we received “{submission.title}”."
@@ -1,4 +1,7 @@
 import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django_scopes import scope, scopes_disabled
 
 from pretalx.person.models.user import User, avatar_path
@@ -106,6 +109,60 @@ def test_user_attributes(orga_user):
     assert not orga_user.has_local_avatar
 
 
+@pytest.mark.django_db
+def test_user_permission_matrix(review_user, event, submission):
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "permission_matrix",
+            }
+        }
+    ):
+        with scope(event=event):
+            track = event.tracks.create(name="Track")
+            submission.track = track
+            submission.save()
+            user = User.objects.get(pk=review_user.pk)
+            assert user.get_permissions_for_event(event) == {"is_reviewer"}
+            assert user.has_perm("submission.review_submission", submission)
+            assert user.has_perm("orga.view_speakers", event)
+            assert not user.has_perm("orga.change_settings", event)
+
+            user = User.objects.get(pk=review_user.pk)
+            with CaptureQueriesContext(connection) as context:
+                matrix = user.get_permission_matrix()
+            assert not context.captured_queries
+            assert matrix["events"][event.pk]["reviewer_tracks"] is None
+
+            team = review_user.teams.get()
+            team.limit_tracks.add(event.tracks.create(name="Other track"))
+            assert not user.has_perm("submission.review_submission", submission)
+            team.limit_tracks.add(track)
+            assert user.has_perm("submission.review_submission", submission)
+
+            team.members.remove(review_user)
+            assert not user.get_permission_matrix()["events"]
+            assert not user.has_perm("submission.review_submission", submission)
+
+
+@pytest.mark.django_db
+def test_user_permission_matrix_without_cache(review_user, orga_user, event):
+    with scope(event=event):
+        user = User.objects.get(pk=review_user.pk)
+        assert user.get_permissions_for_event(event) == {"is_reviewer"}
+        with CaptureQueriesContext(connection) as context:
+            user.get_permission_matrix()
+        assert not context.captured_queries
+
+        orga_version = User.get_permission_matrix_version(orga_user.pk)
+        team = review_user.teams.get()
+        team.can_change_submissions = True
+        team.save()
+        assert orga_version == User.get_permission_matrix_version(orga_user.pk)
+        assert "can_change_submissions" in user.get_permissions_for_event(event)
+
+
 @pytest.mark.django_db
 def test_user_reset_password_without_text(orga_user, event):
     with scope(event=event):
@@ -1,8 +1,10 @@
 import datetime as dt
 
 import pytest
+import pytz
 
 from pretalx.schedule.models import Availability
+from pretalx.schedule.models.availability import IntervalSet
 
 
 @pytest.mark.parametrize(
@@ -580,3 +582,73 @@ def test_availability_contains(one, two, expected):
     one = Availability(start=dt.datetime(*one[0]), end=dt.datetime(*one[1]))
     two = Availability(start=dt.datetime(*two[0]), end=dt.datetime(*two[1]))
     assert one.contains(two) is expected
+
+
+def ranges(*hours):
+    return [
+        (dt.datetime(2017, 1, 1, start), dt.datetime(2017, 1, 1, end))
+        for start, end in hours
+    ]
+
+
+@pytest.mark.parametrize(
+    "one,two,union,intersection,difference",
+    (
+        ([], [], [], [], []),
+        ([(4, 6)], [], [(4, 6)], [], [(4, 6)]),
+        ([], [(4, 6)], [(4, 6)], [], []),
+        ([(4, 6)], [(6, 8)], [(4, 8)], [], [(4, 6)]),
+        ([(4, 8)], [(5, 6)], [(4, 8)], [(5, 6)], [(4, 5), (6, 8)]),
+        (
+            [(2, 5), (7, 10), (12, 14)],
+            [(1, 3), (4, 8), (9, 13)],
+            [(1, 14)],
+            [(2, 3), (4, 5), (7, 8), (9, 10), (12, 13)],
+            [(3, 4), (8, 9), (13, 14)],
+        ),
+    ),
+)
+def test_interval_set_operations(one, two, union, intersection, difference):
+    one = IntervalSet.from_ranges(ranges(*one))
+    two = IntervalSet.from_ranges(ranges(*two))
+    assert list(one | two) == ranges(*union)
+    assert list(two | one) == ranges(*union)
+    assert list(one & two) == ranges(*intersection)
+    assert list(two & one) == ranges(*intersection)
+    assert list(one - two) == ranges(*difference)
+
+
+@pytest.mark.parametrize(
+    "start,end,expected",
+    (
+        (1, 2, False),
+        (4, 5, True),
+        (4, 8, True),
+        (7, 9, False),
+        (10, 12, True),
+        (12, 13, False),
+    ),
+)
+def test_interval_set_contains(start, end, expected):
+    intervals = IntervalSet.from_ranges(ranges((10, 12), (4, 6), (6, 8)))
+    assert len(intervals) == 2
+    assert (
+        intervals.contains(dt.datetime(2017, 1, 1, start), dt.datetime(2017, 1, 1, end))
+        is expected
+    )
+
+
+def test_interval_set_keeps_timezone():
+    tz = pytz.timezone("America/New_York")
+    availabilities = [
+        Availability(
+            start=tz.localize(dt.datetime(2017, 3, 12, hour)),
+            end=tz.localize(dt.datetime(2017, 3, 12, hour + 1)),
+        )
+        for hour in (0, 1, 2, 3)
+    ]
+    result = IntervalSet.from_availabilities(availabilities).to_availabilities()
+    assert len(result) == 1
+    assert result[0].start == availabilities[0].start
+    assert result[0].end == availabilities[-1].end
+    assert result[0].start.tzinfo.zone == tz.zone
@@ -0,0 +1,89 @@
+import datetime as dt
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django_scopes import scope
+
+from pretalx.schedule.conflicts import IntervalIndex, ScheduleConflicts
+from pretalx.schedule.models import TalkSlot
+
+
+@pytest.mark.parametrize(
+    "start,end,expected",
+    (
+        (0, 1, set()),
+        (1, 2, set()),
+        (1, 3, {"a"}),
+        (2, 4, {"a"}),
+        (4, 5, {"a", "b"}),
+        (6, 7, {"b"}),
+        (10, 11, {"c"}),
+        (8, 9, set()),
+        (0, 20, {"a", "b", "c"}),
+    ),
+)
+def test_interval_index_overlapping(start, end, expected):
+    index = IntervalIndex([(2, 5, "a"), (10, 12, "c")])
+    index.add(4, 8, "b")
+    assert set(index.overlapping(start, end)) == expected
+    index.remove("b")
+    assert set(index.overlapping(start, end)) == expected - {"b"}
+
+
+@pytest.mark.django_db
+def test_schedule_conflicts_query_count(slot, other_slot, speaker, room):
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            warnings = slot.schedule.get_all_talk_warnings()
+        return len(context.captured_queries), warnings
+
+    with scope(event=slot.event):
+        other_slot.submission.speakers.add(speaker)
+        other_slot.start = slot.start
+        other_slot.end = slot.end
+        other_slot.save()
+        count_queries()  # Load the schedule, event and settings
+        query_count, warnings = count_queries()
+        assert len(warnings) == 2
+        for index in range(10):
+            TalkSlot.objects.create(
+                submission=other_slot.submission,
+                schedule=slot.schedule,
+                room=room,
+                start=slot.start + dt.timedelta(days=1, hours=index),
+                end=slot.start + dt.timedelta(days=1, hours=index, minutes=30),
+            )
+        assert count_queries() == (query_count, warnings)
+
+
+@pytest.mark.django_db
+def test_schedule_conflicts_update(slot, other_slot, speaker):
+    with scope(event=slot.event):
+        other_slot.submission.speakers.add(speaker)
+        other_slot.start = slot.start + dt.timedelta(minutes=10)
+        other_slot.end = slot.end + dt.timedelta(minutes=10)
+        other_slot.save()
+        conflicts = ScheduleConflicts(slot.schedule, with_speakers=False)
+        assert conflicts.get_warnings(slot)
+
+        other_slot.start = slot.real_end
+        other_slot.end = other_slot.start + dt.timedelta(minutes=30)
+        conflicts.update(other_slot)
+        assert not conflicts.get_warnings(slot)
+        assert not conflicts.get_warnings(other_slot)
+
+
+@pytest.mark.django_db
+def test_talk_warnings_only_load_the_moved_slot(slot, other_slot, speaker):
+    with scope(event=slot.event):
+        conflicts = ScheduleConflicts(slot.schedule, with_speakers=True, talk=slot)
+        assert set(conflicts.slots) == {slot.pk}
+
+        other_slot.submission.speakers.add(speaker)
+        other_slot.start = slot.start
+        other_slot.end = slot.end
+        other_slot.save()
+        conflicts = ScheduleConflicts(slot.schedule, with_speakers=True, talk=slot)
+        assert set(conflicts.slots) == {slot.pk, other_slot.pk}
+        assert len(slot.schedule.get_talk_warnings(slot)) == 1
@@ -1,9 +1,14 @@
 import datetime as dt
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django_scopes import scope
 
-from pretalx.schedule.exporters import ScheduleData
+from pretalx.person.models import SpeakerProfile, User
+from pretalx.schedule.exporters import FrabJsonExporter, ScheduleData
+from pretalx.schedule.models import TalkSlot
+from pretalx.submission.models import Answer, Submission
 
 
 def test_schedule_data_empty_methods():
@@ -36,3 +41,40 @@ def test_schedule_data_out_of_order_slots(event, slot, other_slot):
         slot.save()
         other_slot.save()
         assert ScheduleData(event=event, schedule=slot.schedule).data
+
+
+@pytest.mark.django_db
+def test_frab_json_export_query_count_independent_of_talk_count(
+    event, slot, room, personal_answer
+):
+    def render():
+        exporter = FrabJsonExporter(event, schedule=slot.schedule)
+        exporter.is_orga = True
+        with CaptureQueriesContext(connection) as queries:
+            exporter.render()
+        return len(queries)
+
+    with scope(event=event):
+        render()  # Warm up instance-wide caches
+        initial_count = render()
+        for index in range(5):
+            speaker = User.objects.create_user(
+                email=f"speaker{index}@example.org", password="speakerpwd1!"
+            )
+            SpeakerProfile.objects.create(user=speaker, event=event, biography="Hi")
+            submission = Submission.objects.create(
+                title=f"Talk {index}", event=event, state="confirmed"
+            )
+            submission.speakers.add(speaker)
+            Answer.objects.create(
+                answer="True", submission=submission, question=personal_answer.question
+            )
+            TalkSlot.objects.create(
+                submission=submission,
+                schedule=slot.schedule,
+                room=room,
+                start=slot.start,
+                end=slot.end,
+                is_visible=True,
+            )
+        assert render() == initial_count
@@ -1,5 +1,4 @@
 import datetime as dt
-from collections import namedtuple
 
 import pytest
 from django.core import mail as djmail
@@ -8,6 +7,7 @@
 
 from pretalx.mail.models import QueuedMail
 from pretalx.schedule.models import Schedule, TalkSlot
+from pretalx.schedule.signals import schedule_release
 from pretalx.submission.models import Submission
 
 
@@ -195,13 +195,10 @@ def test_schedule_changes(event, slot, room, accepted_submission):
         slot.save()
         assert QueuedMail.objects.filter(sent__isnull=True).count() == 0
         schedule, _ = event.wip_schedule.freeze("test")
-        Slot = namedtuple("Slot", ["submission", "room", "start"])
         assert schedule.changes == {
             "count": 1,
             "action": "update",
-            "new_talks": [
-                Slot(current_slot.submission, current_slot.room, current_slot.start)
-            ],
+            "new_talks": [current_slot],
             "canceled_talks": [],
             "moved_talks": [],
         }
@@ -258,3 +255,210 @@ def test_schedule_changes(event, slot, room, accepted_submission):
         schedule, _ = event.wip_schedule.freeze("test4")
         assert schedule.changes["count"] == 1
         assert len(schedule.changes["canceled_talks"]) == 1
+
+
+@pytest.mark.django_db
+def test_schedule_changes_are_stored_on_release(event, slot, mocker):
+    with scope(event=event):
+        wip_slot = event.wip_schedule.talks.get(submission=slot.submission)
+        wip_slot.start += dt.timedelta(hours=1)
+        wip_slot.save()
+        schedule, _ = event.wip_schedule.freeze("test", notify_speakers=False)
+        assert schedule.stored_changes
+
+        compute = mocker.spy(Schedule, "_compute_changes_data")
+        schedule = Schedule.objects.get(pk=schedule.pk)
+        changes = schedule.changes
+        assert compute.call_count == 0
+        assert changes["count"] == 1
+        assert changes["moved_talks"][0]["submission"] == slot.submission
+        assert changes["moved_talks"][0]["old_start"] == slot.start
+        assert changes["moved_talks"][0]["new_start"] == wip_slot.start
+
+
+@pytest.mark.django_db
+def test_freeze_saves_speaker_notifications(unreleased_slot, other_speaker):
+    with scope(event=unreleased_slot.event):
+        event = unreleased_slot.event
+        submission = unreleased_slot.submission
+        submission.speakers.add(other_speaker)
+        existing = list(event.queued_mails.values_list("pk", flat=True))
+        event.wip_schedule.freeze("test")
+        mails = list(
+            event.queued_mails.exclude(pk__in=existing).prefetch_related("to_users")
+        )
+        assert len(mails) == 2
+        assert {user for mail in mails for user in mail.to_users.all()} == set(
+            submission.speakers.all()
+        )
+        for mail in mails:
+            assert not mail.to
+            assert submission.title in mail.text
+
+
+@pytest.mark.django_db
+def test_freeze_stale_schedule_fails(slot):
+    with scope(event=slot.event):
+        stale = Schedule.objects.get(pk=slot.event.wip_schedule.pk)
+        slot.event.wip_schedule.freeze("first")
+        schedule_count = Schedule.objects.count()
+        with pytest.raises(Exception):
+            stale.freeze("second")
+        assert Schedule.objects.count() == schedule_count
+        assert not slot.event.schedules.filter(version="second").exists()
+
+
+@pytest.mark.django_db
+def test_freeze_defers_release_stages_to_task(
+    slot, settings, mocker, django_capture_on_commit_callbacks
+):
+    from pretalx.schedule.tasks import task_finish_schedule_release
+
+    settings.HAS_CELERY = True
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test_freeze_defers_release_stages_to_task",
+        }
+    }
+    apply_async = mocker.patch.object(task_finish_schedule_release, "apply_async")
+    finish_release = mocker.patch.object(Schedule, "finish_release")
+    send_signal = mocker.patch.object(schedule_release, "send_robust")
+    with scope(event=slot.event):
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule, _ = slot.event.wip_schedule.freeze("test", notify_speakers=False)
+            assert not apply_async.called
+            send_signal.assert_called_once_with(
+                slot.event, schedule=schedule, user=None
+            )
+        assert schedule.version == "test"
+        assert not finish_release.called
+        apply_async.assert_called_once()
+        kwargs = apply_async.call_args.kwargs
+        assert kwargs["kwargs"] == {
+            "schedule_id": schedule.pk,
+            "user_id": None,
+            "notify_speakers": False,
+        }
+        slot.event.settings.flush()
+        assert slot.event.settings.schedule_release == {
+            "task_id": kwargs["task_id"],
+            "version": "test",
+        }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fails", (False, True))
+def test_release_status_is_kept_until_task_is_done(
+    slot, settings, mocker, django_capture_on_commit_callbacks, fails
+):
+    from pretalx.orga.views.schedule import get_release_status
+    from pretalx.schedule.tasks import task_finish_schedule_release
+
+    settings.HAS_CELERY = True
+    apply_async = mocker.patch.object(task_finish_schedule_release, "apply_async")
+    if fails:
+        mocker.patch.object(Schedule, "finish_release", side_effect=ValueError)
+    event = slot.event
+    with scope(event=event):
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule, _ = event.wip_schedule.freeze("test", notify_speakers=False)
+        event.settings.flush()
+        status = get_release_status(event)
+        assert status["version"] == "test"
+        assert status["state"] == "PENDING"
+
+        task_kwargs = apply_async.call_args.kwargs
+        result = task_finish_schedule_release.apply(
+            kwargs=task_kwargs["kwargs"], task_id=task_kwargs["task_id"]
+        )
+        assert result.failed() is fails
+        event.settings.flush()
+        status = get_release_status(event)
+    assert status["state"] == ("FAILURE" if fails else None)
+
+
+@pytest.mark.django_db
+def test_finish_release_reports_progress(unreleased_slot):
+    with scope(event=unreleased_slot.event):
+        schedule, _ = unreleased_slot.event.wip_schedule.freeze(
+            "test", notify_speakers=False
+        )
+        progress = []
+        schedule.finish_release(
+            notify_speakers=False,
+            progress=lambda value, stage: progress.append((value, stage)),
+        )
+        assert [stage for __, stage in progress] == list(Schedule.RELEASE_STAGES)
+        assert [value for value, __ in progress] == [0, 20, 40, 60, 80]
+
+
+@pytest.mark.django_db
+def test_finish_release_generates_notifications_in_own_task(
+    unreleased_slot, settings, mocker
+):
+    from pretalx.schedule.tasks import task_generate_schedule_notifications
+
+    settings.HAS_CELERY = True
+    mocker.patch("pretalx.schedule.models.schedule.render_schedule_exports")
+    apply_async = mocker.patch.object(
+        task_generate_schedule_notifications, "apply_async"
+    )
+    event = unreleased_slot.event
+    with scope(event=event):
+        mail_count = event.queued_mails.count()
+        schedule, _ = event.wip_schedule.freeze("test", notify_speakers=False)
+        schedule.finish_release(notify_speakers=True)
+        apply_async.assert_called_once_with(kwargs={"schedule_id": schedule.pk})
+        assert event.queued_mails.count() == mail_count
+
+        task_generate_schedule_notifications.apply(kwargs={"schedule_id": schedule.pk})
+        assert event.queued_mails.count() == mail_count + 1
+
+
+@pytest.mark.django_db
+def test_release_preview_counts_notifications_without_rendering(
+    unreleased_slot, other_speaker, mocker
+):
+    from pretalx.mail.models import MailTemplate
+
+    with scope(event=unreleased_slot.event):
+        unreleased_slot.submission.speakers.add(other_speaker)
+        to_mail = mocker.spy(MailTemplate, "to_mail")
+        preview = unreleased_slot.event.wip_schedule.release_preview
+        assert to_mail.call_count == 0
+        assert preview["notifications"] == 2
+        assert preview["changes"]["action"] == "create"
+        assert not preview["warnings"]["unscheduled"]
+        assert preview["notifications"] == len(
+            Schedule.objects.get(
+                pk=unreleased_slot.event.wip_schedule.pk
+            ).generate_notifications()
+        )
+
+
+@pytest.mark.django_db
+def test_release_preview_is_cached_until_slots_change(slot, settings, mocker):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test_release_preview_is_cached_until_slots_change",
+        }
+    }
+    with scope(event=slot.event):
+        wip_pk = slot.event.wip_schedule.pk
+        assert Schedule.objects.get(pk=wip_pk).release_preview["changes"]["count"] == 0
+
+        compute = mocker.spy(Schedule, "_compute_changes_data")
+        schedule = Schedule.objects.get(pk=wip_pk)
+        assert schedule.release_preview["changes"]["count"] == 0
+        assert schedule.changes["count"] == 0
+        assert compute.call_count == 0
+
+        wip_slot = schedule.talks.get(submission=slot.submission)
+        wip_slot.start += dt.timedelta(hours=1)
+        wip_slot.save()
+        preview = Schedule.objects.get(pk=wip_pk).release_preview
+        assert compute.call_count == 1
+        assert preview["changes"]["count"] == 1
+        assert preview["notifications"] == 1
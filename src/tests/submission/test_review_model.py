@@ -1,7 +1,8 @@
 import pytest
 from django_scopes import scope
 
-from pretalx.submission.models import Review
+from pretalx.event.models import Event
+from pretalx.submission.models import Review, ReviewScoreCategory
 
 
 @pytest.mark.django_db
@@ -46,3 +47,130 @@ def test_review_score_display(submission, score, expected, speaker):
     )
     assert submission.title in str(r)
     assert r.display_score == expected
+
+
+@pytest.mark.django_db
+def test_review_aggregate_is_updated(submission, review_user, other_review_user):
+    with scope(event=submission.event):
+        category = submission.event.score_categories.create(
+            name="Novelty", is_independent=True
+        )
+        low = category.scores.create(value=1)
+        high = category.scores.create(value=2)
+        review = Review.objects.create(submission=submission, user=review_user, score=3)
+        aggregate = submission.review_aggregate
+        assert aggregate.review_count == 1
+        assert aggregate.median_score == 3
+        assert aggregate.get_category_score(category) is None
+
+        review.scores.add(low)
+        review.save(update_score=False)
+        other_review = Review.objects.create(
+            submission=submission, user=other_review_user, score=1
+        )
+        other_review.scores.add(high)
+        other_review.save(update_score=False)
+        aggregate.refresh_from_db()
+        assert aggregate.review_count == 2
+        assert aggregate.median_score == 2
+        assert aggregate.mean_score == 2
+        assert aggregate.get_category_score(category) == 1.5
+        assert aggregate.get_category_score(category, "mean") == 1.5
+
+        review.delete()
+        aggregate.refresh_from_db()
+        assert aggregate.review_count == 1
+        assert aggregate.median_score == 1
+        assert aggregate.get_category_score(category) == 2
+
+
+@pytest.mark.django_db
+def test_recalculate_scores_in_bulk(
+    submission, other_submission, review_user, django_assert_max_num_queries
+):
+    with scope(event=submission.event):
+        track = submission.event.tracks.create(name="Security")
+        submission.track = track
+        submission.save()
+        category = submission.event.score_categories.create(name="Content")
+        limited_category = submission.event.score_categories.create(
+            name="Track fit", weight=2
+        )
+        limited_category.limit_tracks.add(track)
+        reviews = []
+        for sub in (submission, other_submission):
+            review = Review.objects.create(submission=sub, user=review_user)
+            review.scores.add(
+                category.scores.create(value=2),
+                limited_category.scores.create(value=3),
+            )
+            reviews.append(review)
+
+        progress = []
+        with django_assert_max_num_queries(10):
+            ReviewScoreCategory.recalculate_scores(
+                submission.event, progress=progress.append
+            )
+        assert progress == [100]
+        for review in reviews:
+            review.refresh_from_db()
+        assert reviews[0].score == 8
+        assert reviews[1].score == 2
+        submission.review_aggregate.refresh_from_db()
+        assert submission.review_aggregate.median_score == 8
+
+        category.weight = 0
+        category.save()
+        other_submission.update_review_scores()
+        reviews[1].refresh_from_db()
+        assert reviews[1].score == 0
+        reviews[0].refresh_from_db()
+        assert reviews[0].score == 8
+
+
+@pytest.mark.django_db
+def test_review_queue(
+    submission, other_submission, review_user, other_review_user, settings, mocker
+):
+    from pretalx.submission.review_queue import ReviewQueue
+
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test_review_queue",
+        }
+    }
+    event = Event.objects.get(pk=submission.event.pk)
+    with scope(event=event):
+        submission = event.submissions.get(pk=submission.pk)
+        other_submission = event.submissions.get(pk=other_submission.pk)
+        Review.objects.create(submission=submission, user=other_review_user)
+        find = mocker.spy(Review, "find_missing_reviews")
+        queue = ReviewQueue(event, review_user)
+        assert queue.pending == [other_submission.pk, submission.pk]
+        assert queue.next_submission() == other_submission
+        assert queue.next_submission(ignore=[other_submission.pk]) == submission
+        assert find.call_count == 1
+
+        # The queue does not depend on the event cache
+        event.cache.clear()
+        assert len(ReviewQueue(event, review_user)) == 2
+        assert find.call_count == 1
+
+        Review.objects.create(submission=other_submission, user=review_user)
+        queue = ReviewQueue(event, review_user)
+        assert len(queue) == 1
+        assert queue.next_submission() == submission
+        assert queue.next_submission(ignore=[submission.pk]) is None
+        assert find.call_count == 1
+
+        submission.reject()
+        assert len(ReviewQueue(event, review_user)) == 0
+        assert find.call_count == 2
+
+        assert len(ReviewQueue(event, other_review_user)) == 1
+        track = event.tracks.create(name="Test Track")
+        review_user.teams.first().limit_tracks.add(track)
+        assert len(ReviewQueue(event, review_user)) == 0
+        other_review_user.teams.first().limit_tracks.add(track)
+        assert len(ReviewQueue(event, other_review_user)) == 0
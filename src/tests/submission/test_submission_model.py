@@ -1,9 +1,14 @@
+import datetime as dt
+
 import pytest
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django_scopes import scope
 
 from pretalx.common.exceptions import SubmissionError
+from pretalx.schedule.models import TalkSlot
 from pretalx.submission.models import Answer, Submission, SubmissionStates
 from pretalx.submission.models.submission import submission_image_path
 
@@ -59,6 +64,52 @@ def test_accept_fail(submission, state, force):
             assert submission.event.wip_schedule.talks.count() == 0
 
 
+@pytest.mark.parametrize(
+    "new_state,mails,talks",
+    (
+        (SubmissionStates.ACCEPTED, 3, 2),
+        (SubmissionStates.REJECTED, 3, 0),
+        (SubmissionStates.WITHDRAWN, 0, 0),
+    ),
+)
+@pytest.mark.django_db
+def test_bulk_set_state(
+    submission,
+    other_submission,
+    withdrawn_submission,
+    other_speaker,
+    new_state,
+    mails,
+    talks,
+):
+    event = submission.event
+    with scope(event=event):
+        submission.speakers.add(other_speaker)
+        log_count = submission.logged_actions().count()
+        existing_mails = list(event.queued_mails.values_list("pk", flat=True))
+
+        changed = Submission.bulk_set_state(
+            event, [submission, other_submission, withdrawn_submission], new_state
+        )
+
+        assert set(changed) == {submission, other_submission}
+        for sub in (submission, other_submission):
+            sub.refresh_from_db()
+            assert sub.state == new_state
+        withdrawn_submission.refresh_from_db()
+        assert withdrawn_submission.state == SubmissionStates.WITHDRAWN
+        assert submission.logged_actions().count() == log_count + 1
+        assert event.wip_schedule.talks.count() == talks
+        new_mails = event.queued_mails.exclude(pk__in=existing_mails)
+        assert new_mails.count() == mails
+        assert sorted(mail.to_users.get().pk for mail in new_mails) == sorted(
+            speaker.pk
+            for sub in (submission, other_submission)
+            for speaker in sub.speakers.all()
+            if mails
+        )
+
+
 @pytest.mark.parametrize(
     "state", (SubmissionStates.SUBMITTED, SubmissionStates.ACCEPTED)
 )
@@ -286,6 +337,51 @@ def test_submission_change_slot_count(accepted_submission):
         )
 
 
+@pytest.mark.django_db
+def test_bulk_update_talk_slots(slot, accepted_submission, submission, room):
+    confirmed_submission = slot.submission
+    event = confirmed_submission.event
+    with scope(event=event):
+        wip_slots = event.wip_schedule.talks
+        scheduled = wip_slots.get(submission=confirmed_submission)
+        scheduled.room = room
+        scheduled.start = slot.start
+        scheduled.save()
+        TalkSlot.objects.create(
+            submission=confirmed_submission, schedule=event.wip_schedule
+        )
+        submission.state = SubmissionStates.ACCEPTED
+        submission.slot_count = 2
+        accepted_submission.state = SubmissionStates.REJECTED
+
+        with CaptureQueriesContext(connection) as context:
+            Submission.bulk_update_talk_slots(
+                event, [confirmed_submission, accepted_submission, submission]
+            )
+        assert len(context.captured_queries) <= 4
+
+        assert list(wip_slots.filter(submission=confirmed_submission)) == [scheduled]
+        assert not wip_slots.filter(submission=accepted_submission).exists()
+        assert wip_slots.filter(submission=submission, is_visible=False).count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_update_duration(slot, other_slot):
+    event = slot.event
+    with scope(event=event):
+        submissions = [slot.submission, other_slot.submission]
+        for submission in submissions:
+            submission.duration = 90
+        event.wip_schedule.talks.filter(submission__in=submissions).update(
+            start=slot.start, end=slot.end
+        )
+        Submission.bulk_update_duration(event, submissions)
+        wip_slots = event.wip_schedule.talks.filter(submission__in=submissions)
+        assert len(wip_slots) == 2
+        for wip_slot in wip_slots:
+            assert wip_slot.end - wip_slot.start == dt.timedelta(minutes=90)
+
+
 @pytest.mark.django_db
 def test_submission_assign_code(submission, monkeypatch):
     from pretalx.common.mixins import models as models_mixins